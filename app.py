@@ -1,7 +1,12 @@
 # app.py
 from __future__ import annotations
+import time
+
 import streamlit as st
 
+from utils.warmup import start_warmup
+from utils.watch import start_watcher
+
 
 st.set_page_config(layout="wide")  # 🌍 растягивает весь контент
 st.set_page_config(page_title="Продажи — отчёты", page_icon="📚", layout="wide")
@@ -25,4 +30,34 @@ st.markdown(
 
 👉 Выбирайте страницы слева. Порядок задаётся префиксами `01_`, `02_` в имени файла.
 """
-)
\ No newline at end of file
+)
+
+# Прогрев кэша: первый клик по любому отчёту уже берёт данные из кэша
+st.subheader("Подготовка данных")
+warmup = start_warmup()
+if not warmup.finished:
+    st.progress(warmup.fraction, text=f"Загружаю: {warmup.current} ({warmup.done}/{warmup.total})")
+else:
+    took = (warmup.finished_at or warmup.started_at) - warmup.started_at
+    st.success(f"Данные подготовлены за {took:.0f} с — отчёты открываются из кэша.")
+for label, err in warmup.error_items():
+    st.warning(f"{label}: {err}")
+
+# Слежение за data/: новые выгрузки обрабатываются сами, кэши сбрасываются
+watch = start_watcher()
+event = watch.last_event
+if event is not None:
+    rebuilt = ", ".join(event.rebuilt) or "—"
+    st.caption(f"Новые выгрузки обработаны в {time.strftime('%H:%M', time.localtime(event.at))}: "
+               f"файлов {len(event.changed)}, пересобрано заведений: {rebuilt}.")
+    for name, modes in event.abc_changes.items():
+        st.caption(f"{name}: продажи дописаны, сменили класс ABC — "
+                   + ", ".join(f"{mode}: {n}" for mode, n in modes.items()) + ".")
+    for name, err in event.errors.items():
+        st.warning(f"{name}: {err}")
+if watch.error is not None:
+    st.warning(f"Слежение за data/: {watch.error}. Файлы будут обработаны на следующем опросе.")
+
+if not warmup.finished:
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,12 @@
+"""
+Тесты pytest лежат рядом с модулями (test_*.py). Этот файл в корне репозитория
+добавляет корень в sys.path, чтобы тесты импортировали preprocessing.* и utils.*:
+
+    python -m pytest -q
+
+Дисковый кэш тестов — во временном каталоге, а не в processed/cache.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("VINOLOGIA_CACHE_DIR", tempfile.mkdtemp(prefix="vinologia-cache-"))
@@ -2,79 +2,70 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
-import base64
+
+from preprocessing.scripts.prefix_index import period_presets
+from utils.data import ALL_SALES_PATH, load_sales_index
+from utils.disk_cache import file_digest
+from utils.table import paged_table
 
 st.set_page_config(page_title="Отчёт по продажам", layout="wide")
 
 # ==== 1. Загружаем данные ====
-@st.cache_data
-def load_data():
-    df = pd.read_excel("/Users/nl/streamlit_test/data/all_sales.xlsx")
-
-    # Приводим дату к формату open_timetime
-    df["open_time"] = pd.to_datetime(df["open_time"])
-    df["month"] = df["open_time"].dt.to_period("M")
-    return df
-
-df = load_data()
-
-# ==== 2. Определяем последний и предыдущий месяц ====
-last_month = df["month"].max()
-prev_month = last_month - 1
-
-# ==== 3. Считаем суммы ====
-# Сумма за последний месяц
-last_month_final_sum = (
-    df[df["month"] == last_month]
-    .groupby("article_name")["final_sum"]
-    .sum()
-    .rename("last_month")
-)
-
-# Сумма за предыдущий месяц
-prev_month_final_sum = (
-    df[df["month"] == prev_month]
-    .groupby("article_name")["final_sum"]
-    .sum()
-    .rename("prev_month")
-)
+# накопленные суммы товар × день: сумма за любой период — разность двух столбцов
+index = load_sales_index()
 
-# ==== 4. Собираем таблицу ====
-summary = pd.DataFrame(last_month_final_sum).join(prev_month_final_sum, how="left").fillna(0)
-summary["diff_abs"] = summary["last_month"] - summary["prev_month"]
-summary["diff_pct"] = summary.apply(
-    lambda row: (row["diff_abs"] / row["prev_month"] * 100) if row["prev_month"] != 0 else None,
-    axis=1,
-)
-
-# ==== 5. Функция для спарклайна ====
-def make_sparkline(article_name_sales):
-    fig, ax = plt.subplots(figsize=(2, 0.5))
-    ax.plot(article_name_sales["open_time"], article_name_sales["final_sum"], color="tab:blue", linewidth=1)
-    ax.axis("off")
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", bbox_inches="tight", pad_inches=0)
-    plt.close(fig)
-    b64 = base64.b64encode(buf.getvalue()).decode()
-    return f'<img src="data:image/png;base64,{b64}" width="120"/>'
-
-# ==== 6. Добавляем спарклайны ====
-sparklines = {}
-for article_name in df["article_name"].unique():
-    article_name_sales = df[df["article_name"] == article_name].groupby("open_time")["final_sum"].sum().reset_index()
-    sparklines[article_name] = make_sparkline(article_name_sales)
-
-summary["sparkline"] = summary.index.map(sparklines)
-
-# ==== 7. Финальная таблица ====
+# ==== 2. Выбираем периоды ====
 st.title("📊 Отчёт по продажам")
-st.write(f"Период: {last_month} (сравнение с {prev_month})")
 
-# Форматируем таблицу для отображения
-table = summary.reset_index()[["article_name", "last_month", "prev_month", "diff_abs", "diff_pct", "sparkline"]]
-table["diff_pct"] = table["diff_pct"].apply(lambda x: f"{x:.1f}%" if pd.notnull(x) else "-")
-
-st.write(table.to_html(escape=False), unsafe_allow_html=True)
+presets = period_presets(index.last_day)
+CUSTOM = "Свои периоды"
+choice = st.selectbox("Сравнение", [*presets, CUSTOM], index=0)
+
+first, last = index.first_day.date(), index.last_day.date()
+if choice == CUSTOM:
+    # по умолчанию — первое типовое сравнение, прижатое к датам данных
+    # (иначе date_input падает, если месяц данных неполный)
+    default_current, default_base = next(iter(presets.values()))
+    clamp = lambda period: tuple(min(max(d.date(), first), last) for d in period)
+    c1, c2 = st.columns(2)
+    with c1:
+        current = st.date_input("Период", value=clamp(default_current), min_value=first, max_value=last)
+    with c2:
+        base = st.date_input("Сравнить с", value=clamp(default_base), min_value=first, max_value=last)
+    # пока выбрана только одна дата диапазона — ждём вторую
+    if len(current) != 2 or len(base) != 2:
+        st.stop()
+else:
+    current, base = presets[choice]
+
+# ==== 3. Считаем суммы: по две разности накопленных сумм на период ====
+summary = index.compare(tuple(current), tuple(base)).rename(columns={
+    "current": "current_period", "base": "base_period",
+})
+hide_empty = st.checkbox("Скрыть товары без продаж в обоих периодах", value=True)
+if hide_empty:
+    summary = summary[(summary["current_period"] != 0) | (summary["base_period"] != 0)]
+
+# ==== 4. Спарклайн: суммы по месяцам за всю историю ====
+months = pd.period_range(index.first_day, index.last_day, freq="M")
+bounds = [m.start_time for m in months] + [index.last_day + pd.Timedelta(days=1)]
+by_month = index.boundary_sums(bounds)
+summary["sparkline"] = list(by_month[summary.index.to_numpy()])
+
+# ==== 5. Финальная таблица ====
+fmt = lambda period: f"{pd.Timestamp(period[0]):%Y-%m-%d} — {pd.Timestamp(period[1]):%Y-%m-%d}"
+st.write(f"Период: {fmt(current)} (сравнение с {fmt(base)})")
+
+paged_table(
+    summary.reset_index(drop=True),
+    key="sales_compare",
+    search_columns=["article_name"],
+    sort_columns=["article_name", "current_period", "base_period", "diff_abs", "diff_pct"],
+    default_sort="diff_abs",
+    column_config={
+        "diff_pct": st.column_config.NumberColumn("diff_pct", format="%.1f%%"),
+        "sparkline": st.column_config.LineChartColumn("по месяцам", y_min=0),
+    },
+    # строки таблицы — это файл продаж, периоды и фильтр пустых
+    data_key=(file_digest(ALL_SALES_PATH), tuple(current), tuple(base), hide_empty),
+)
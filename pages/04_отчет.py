@@ -18,14 +18,23 @@
 
 Как добавить в проект:
   1) Сохраните этот файл как pages/03_Сравнение_по_месяцам.py
-  2) Положите all_sales.xlsx в корень проекта (рядом с app.py) или измените путь ниже.
+  2) Положите выгрузки iiko в data/<заведение>/ (см. utils/venues.py).
   3) Запускайте: streamlit run app.py → вкладка «03 Сравнение по месяцам»
 """
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from preprocessing.scripts.export_bundle import EXPORT_FORMATS
+from preprocessing.scripts.monthly_matrix import build_product_month_matrix
+from utils import background, store
+from utils.export import export_report, export_table
+from utils.preview import daily_sales_or_preview, preview_notice, refresh_until_exact, weighted
+from utils.venues import venue_selector
+from utils.table import paged_table
+
 st.set_page_config(page_title="Сравнение по месяцам", page_icon="🗓️", layout="wide")
 
 st.title("🗓️ Сравнение продаж по месяцам")
@@ -34,30 +43,14 @@ st.caption("Фильтры внутри страницы. Никакого 'те
 # ------------------------------
 # Загрузка и нормализация данных
 # ------------------------------
-@st.cache_data(show_spinner=False)
-def load_sales(path: str = "/Users/nl/streamlit_test/data/all_sales.xlsx") -> pd.DataFrame:
-    df = pd.read_excel(path)
-    # Приведём имена колонок к нижнему регистру — так надёжнее
-    df.columns = [str(c).strip().lower() for c in df.columns]
-
-    need = {"open_time", "article_name", "final_sum"}
-    missing = need - set(df.columns)
-    if missing:
-        raise ValueError(f"В файле отсутствуют колонки: {sorted(missing)}")
-
-    # Типы
-    df["open_time"] = pd.to_datetime(df["open_time"], errors="coerce")
-    df = df.dropna(subset=["open_time"]).copy()
-    df["final_sum"] = pd.to_numeric(df["final_sum"], errors="coerce").fillna(0)
-
-    # Месяц из даты
-    df["month"] = df["open_time"].dt.to_period("M")
-    return df
+venues = venue_selector()
 
 try:
-    df = load_sales()
+    # дневные агрегаты продаж; для сети — сумма готовых агрегатов заведений
+    # (или их выборка в режиме предпросмотра, пока точные считаются в фоне)
+    df, is_preview = daily_sales_or_preview(venues, key="monthly")
 except Exception as e:
-    st.error("Не удалось загрузить all_sales.xlsx. Нужны колонки: open_time, article_name, final_sum")
+    st.error("Не удалось подготовить продажи из processed/. Проверьте выгрузки в data/.")
     st.exception(e)
     st.stop()
 
@@ -99,25 +92,47 @@ with st.expander("Фильтры", expanded=True):
 
     top_n = st.slider("Размер ТОП‑N / Антилидеров‑N", min_value=3, max_value=30, value=5)
 
-# Применяем фильтры к исходным данным
-mask_period = (df["month"] >= start_m) & (df["month"] <= end_m)
-cut = df.loc[mask_period].copy()
-
-if sel_cat != "(все)" and cat_col:
-    cut = cut[cut[cat_col].astype(str) == sel_cat]
-
-if only_glass:
-    if glass_cat_col and cut[glass_cat_col].notna().any():
-        cut = cut[cut[glass_cat_col].astype(str).str.len() > 0]
-    elif glass_flag_col and glass_flag_col in cut.columns:
-        cut[glass_flag_col] = cut[glass_flag_col].astype(str).str.lower().isin(["true", "1", "да", "yes", "y"])  # приводим к bool
-        cut = cut[cut[glass_flag_col] == True]
+# ------------------------------
+# Фильтры и матрица товар × месяц за весь период (numpy): из неё берутся все суммы ниже.
+# Считаются в фоне: пока идёт пересчёт под новые фильтры, показывается прошлый результат,
+# а следующая смена фильтров отменяет незаконченный расчёт (utils/background.py)
+# ------------------------------
+def filtered_matrix(task, df, start_m, end_m, sel_cat, only_glass, is_preview):
+    """(строки после фильтров, матрица товар × месяц); в предпросмотре матрица — по взвешенной выборке."""
+    task.report(0.0, "фильтры")
+    mask_period = (df["month"] >= start_m) & (df["month"] <= end_m)
+    cut = df.loc[mask_period]
+
+    if sel_cat != "(все)" and cat_col:
+        cut = cut[cut[cat_col].astype(str) == sel_cat]
+
+    if only_glass:
+        if glass_cat_col and cut[glass_cat_col].notna().any():
+            cut = cut[cut[glass_cat_col].astype(str).str.len() > 0]
+        elif glass_flag_col and glass_flag_col in cut.columns:
+            cut[glass_flag_col] = cut[glass_flag_col].astype(str).str.lower().isin(["true", "1", "да", "yes", "y"])  # приводим к bool
+            cut = cut[cut[glass_flag_col] == True]
+
+    task.report(0.5, "матрица товар × месяц")
+    # В предпросмотре суммы выборки масштабируются весами слоёв
+    values = weighted(cut, ["final_sum"]) if is_preview else cut
+    return cut, build_product_month_matrix(values, start_m, end_m, value_col="final_sum")
+
+
+# с версией данных: после новой выгрузки матрица пересчитывается
+matrix_key = (venues, store.data_version(venues), is_preview, start_m, end_m, sel_cat, only_glass)
+(cut, pm), fresh = background.latest_result(
+    "monthly_matrix", matrix_key,
+    filtered_matrix, df, start_m, end_m, sel_cat, only_glass, is_preview,
+)
+if is_preview:
+    preview_notice(cut, "final_sum")
 
 # ------------------------------
 # Общая динамика по всем товарам (месячная)
 # ------------------------------
 
-total_monthly = cut.groupby("month")["final_sum"].sum().sort_index()
+total_monthly = pm.monthly_totals()
 colA, colB = st.columns([2, 1])
 with colA:
     st.subheader("Общая динамика (сумма по всем товарам)")
@@ -126,7 +141,7 @@ with colA:
     st.line_chart(tmp)
 with colB:
     st.metric("Период", f"{start_m.strftime('%Y-%m')} — {end_m.strftime('%Y-%m')}")
-    st.metric("Товаров в выборке", f"{cut['article_name'].nunique():,}".replace(",", " "))
+    st.metric("Товаров в выборке", f"{len(pm.products):,}".replace(",", " "))
     st.metric("Сумма продаж", f"{int(total_monthly.sum()):,}".replace(",", " "))
 
 st.divider()
@@ -134,7 +149,7 @@ st.divider()
 # ------------------------------
 # ТОП‑N / Антилидеры‑N по сумме за период
 # ------------------------------
-by_product_total = cut.groupby("article_name")["final_sum"].sum().sort_values(ascending=False)
+by_product_total = pd.Series(pm.totals(), index=pm.products).sort_values(ascending=False)
 col1, col2 = st.columns(2)
 with col1:
     st.subheader(f"ТОП‑{top_n} по сумме за период")
@@ -149,33 +164,14 @@ st.divider()
 # Таблица по товарам с мини‑графиком (месяц к месяцу) — АБСОЛЮТНЫЕ значения
 # ------------------------------
 
-# Подготовим список месяцев периода
-period_months = pd.period_range(start=start_m, end=end_m, freq="M")
-
-# product×month → сумма final_sum
-pm = (
-    cut.groupby(["article_name", "month"], dropna=False)["final_sum"]
-      .sum().unstack(fill_value=0)
-)
-
-# Добавим недостающие месяцы, чтобы у всех был одинаковый диапазон
-for m in period_months:
-    if m not in pm.columns:
-        pm[m] = 0
-pm = pm[sorted(pm.columns)]
-
-# Абсолютные месячные ряды по каждому товару
-series_list = [pm.loc[idx, period_months].astype(float).tolist() for idx in pm.index]
-
-# Сводка
-summary = pd.DataFrame(index=pm.index)
-summary["Сумма за период"] = [sum(vs) for vs in series_list]
-summary["Среднее в мес."] = [round(sum(vs) / len(period_months), 2) for vs in series_list]
-summary = (
-    summary.sort_values("Сумма за период", ascending=False)
-           .reset_index()
-           .rename(columns={"article_name": "Товар"})
-)
+# Сводка: векторные суммы/средние по строкам матрицы, ряды — строки матрицы
+order = np.argsort(-pm.totals(), kind="stable")
+summary = pd.DataFrame({
+    "Товар": pm.products[order],
+    "Сумма за период": pm.totals()[order],
+    "Среднее в мес.": pm.means()[order].round(2),
+})
+series_list = pm.values[order].tolist()
 
 # Выбор вида микрографика: столбики (гистограмма) или линия
 with st.expander("Настройка мини‑графика", expanded=False):
@@ -207,19 +203,40 @@ column_config = {
 visible_cols = ["Товар", "Сумма за период", "Среднее в мес.", trend_col]
 
 st.subheader("Подробная таблица по товарам")
-st.dataframe(
+# в браузер уходит только видимая страница (с колонкой-трендом), поиск и сортировка — на сервере
+paged_table(
     summary[visible_cols],
-    use_container_width=True,
-    hide_index=True,
+    key="products_monthly",
+    search_columns=["Товар"],
+    sort_columns=["Товар", "Сумма за период", "Среднее в мес."],
     column_config=column_config,
+    # пока показан прошлый результат, ключ расчёта ему не соответствует
+    data_key=matrix_key if fresh else None,
 )
 
-# Экспорт CSV
-with st.expander("📥 Экспорт таблицы (CSV)"):
-    csv = summary[visible_cols].to_csv(index=False).encode("utf-8-sig")
-    st.download_button(
-        "Скачать CSV",
-        data=csv,
-        file_name=f"products_monthly_{start_m.strftime('%Y-%m')}_{end_m.strftime('%Y-%m')}.csv",
-        mime="text/csv",
-    )
+# Экспорт: таблица страницы или полный отчёт; файл пишется на диск и отдаётся открытым файлом
+with st.expander("📥 Экспорт"):
+    scope = st.radio("Что выгрузить", ["Эта таблица", "Полный отчёт (ABC, ликвидность, по месяцам)"], horizontal=True)
+    fmt = st.radio("Формат", list(EXPORT_FORMATS), horizontal=True,
+                   help="csv и parquet — zip-архив, по файлу на таблицу; html — страница для телефона")
+    if st.button("Подготовить файл"):
+        with st.spinner("Пишем файл…"):
+            if scope == "Эта таблица":
+                stem = f"products_monthly_{start_m.strftime('%Y-%m')}_{end_m.strftime('%Y-%m')}"
+                st.session_state["export_path"] = export_table(summary[visible_cols], "По месяцам", stem, fmt)
+            else:
+                st.session_state["export_path"] = export_report(venues, fmt)
+            st.session_state["export_format"] = fmt
+
+    path = st.session_state.get("export_path")
+    if path is not None and path.exists():
+        with open(path, "rb") as f:
+            st.download_button(
+                f"Скачать {path.name}",
+                data=f,
+                file_name=path.name,
+                mime=EXPORT_FORMATS[st.session_state["export_format"]][1],
+            )
+
+refresh_until_exact(is_preview)
+background.rerun_while(not fresh)
@@ -6,18 +6,18 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime, date
 
+from preprocessing.scripts.liquidity import ABC_A, ABC_B, XYZ_X, XYZ_Y, liquidity_rows, liquidity_tables
+from utils import background
+from utils.table import paged_table
+from utils.readers import UPLOAD_TYPES, load_uploaded_sales, load_sales_path, source_digest
+from utils.data import ALL_POSITIONS_PATH, LIQUIDITY_AFTER, ALL_POSITIONS_COLUMNS
+
 # -------------------- Константы конфигурации --------------------
 PAGE_TITLE = "Все позиции — отчёт по ликвидности (по неделям, только таблицы)"
 LAYOUT = "wide"
 
-# Пороги ABC / XYZ (фиксированы; показываем как справку)
-ABC_A = 0.80
-ABC_B = 0.95
-XYZ_X = 0.35
-XYZ_Y = 0.80
-
 # Тихий путь (если файл не загружен через UI). Не показываем пользователю.
-FILE_PATH = Path("/Users/nl/streamlit_test/all.xlsx")
+FILE_PATH = ALL_POSITIONS_PATH
 
 # Ожидаемые названия столбцов (данные уже предобработаны)
 COL_DATETIME     = "open_time"
@@ -31,22 +31,25 @@ COL_QTY          = "quantity"
 st.set_page_config(page_title=PAGE_TITLE, layout=LAYOUT)
 st.title(PAGE_TITLE)
 
+# -------------------- Единственный контрол: дата-граница --------------------
+filter_after = st.date_input("Показывать продажи ПОСЛЕ даты", value=LIQUIDITY_AFTER)
+cutoff_dt = datetime.combine(filter_after, datetime.min.time())
+
 # -------------------- Загрузка данных --------------------
-uploaded_file = st.file_uploader("Загрузите Excel (xlsx/xls)", type=["xlsx", "xls"])
+# Читаем только нужные колонки и только строки после даты (CSV/Parquet — по частям)
+READ_COLUMNS = ALL_POSITIONS_COLUMNS
+uploaded_file = st.file_uploader("Загрузите файл продаж (xlsx/xls, csv, csv.gz, parquet)", type=UPLOAD_TYPES)
 
 def load_dataframe():
     if uploaded_file is not None:
-        return pd.read_excel(uploaded_file)
-    if FILE_PATH.exists() and FILE_PATH.suffix.lower() in [".xlsx", ".xls"]:
-        return pd.read_excel(FILE_PATH)
-    st.error("Файл не загружен. Загрузите Excel-файл.")
+        return load_uploaded_sales(uploaded_file, READ_COLUMNS, (COL_DATETIME,), cutoff_dt)
+    if FILE_PATH.exists():
+        return load_sales_path(str(FILE_PATH), READ_COLUMNS, (COL_DATETIME,), cutoff_dt)
+    st.error("Файл не загружен. Загрузите файл продаж.")
     st.stop()
 
 df_raw = load_dataframe()
 
-# -------------------- Единственный контрол: дата-граница --------------------
-filter_after = st.date_input("Показывать продажи ПОСЛЕ даты", value=date(2025, 6, 23))
-
 # -------------------- Информативный блок (без контролов) --------------------
 st.info(
     f"""
@@ -73,11 +76,12 @@ if missing:
     st.stop()
 
 # -------------------- Подготовка данных --------------------
+# df_raw — общая таблица процесса (utils/shared.py), только чтение: колонки пишем в свою копию
 df = df_raw.copy()
 
 # Дата/время и период неделя
 df[COL_DATETIME] = pd.to_datetime(df[COL_DATETIME], errors="coerce")
-df = df.dropna(subset=[COL_DATETIME]).copy()
+df = df.dropna(subset=[COL_DATETIME])
 df["week"] = df[COL_DATETIME].dt.to_period("W")     # недели (по умолчанию до воскресенья)
 df["date"] = df[COL_DATETIME].dt.date
 
@@ -94,124 +98,35 @@ profit_per_unit = pd.to_numeric(df[COL_GLASS_PROFIT], errors="coerce").fillna(0.
 df["total_revenue"] = price_per_unit  * df["qty"]
 df["profit"]        = profit_per_unit * df["qty"]
 
-# Фильтр по дате
-cutoff_dt = datetime.combine(filter_after, datetime.min.time())
-df = df.loc[df[COL_DATETIME] > cutoff_dt].copy()
+# Фильтр по дате (основная часть отсеяна уже при чтении) — общий с выгрузкой и API
+df = liquidity_rows(df, filter_after, time_col=COL_DATETIME)
 if df.empty:
     st.warning("После выбранной даты данных нет.")
     st.stop()
 
 st.caption(f"Строк после фильтра по дате: {len(df):,}".replace(",", " "))
 
-# -------------------- Агрегации по неделям и позициям --------------------
-# недельные суммы по позиции (name)
-weekly = df.groupby(["name", "week"], as_index=False)[["total_revenue", "profit"]].sum()
-
-# Базовые метрики по позиции (на основе недельных сумм)
-stats = weekly.groupby("name").agg(
-    total_revenue=("total_revenue", "sum"),
-    profit=("profit", "sum"),
-    mean_rev=("total_revenue", "mean"),
-    std_rev=("total_revenue", "std"),
-    weeks_sold=("week", "count"),
-).reset_index()
-
-# Недельный CV и coverage
-stats["cv"] = stats["std_rev"] / stats["mean_rev"]
-stats.loc[~np.isfinite(stats["cv"]), "cv"] = np.nan
-total_weeks = weekly["week"].nunique()
-stats["coverage"] = stats["weeks_sold"] / (total_weeks if total_weeks else 1)
-
-# Последняя неделя продажи
-last_sold = weekly.groupby("name")["week"].max().reset_index().rename(columns={"week": "last_sold"})
-stats = stats.merge(last_sold, on="name", how="left")
-
-# Маржа, %
-stats["margin_pct"] = np.where(
-    stats["total_revenue"] > 0,
-    stats["profit"] / stats["total_revenue"] * 100,
-    np.nan
-)
-
-# Основная категория позиции (берём категорию с максимальной выручкой у этой позиции)
-cat_map = (
-    df.groupby(["name", "category"], as_index=False)["total_revenue"].sum()
-      .sort_values(["name", "total_revenue"], ascending=[True, False])
-      .drop_duplicates("name")[["name", "category"]]
-      .rename(columns={"category": "main_category"})
-)
-stats = stats.merge(cat_map, on="name", how="left")
-
-# -------------------- ABC (по total_revenue, по всем позициям) --------------------
-by_item = (
-    df.groupby("name", as_index=False)
-      .agg(revenue=("total_revenue", "sum"))
-      .sort_values("revenue", ascending=False)
-      .reset_index(drop=True)
-)
-sum_revenue = by_item["revenue"].sum()
-by_item["rev_share"] = np.where(sum_revenue > 0, by_item["revenue"] / sum_revenue, 0.0)
-by_item["cum_share"] = by_item["rev_share"].cumsum()
-
-def abc_bucket(cum_share: float, a: float = ABC_A, b: float = ABC_B) -> str:
-    if cum_share <= a:
-        return "A"
-    if cum_share <= b:
-        return "B"
-    return "C"
-
-by_item["ABC"] = by_item["cum_share"].apply(abc_bucket)
-
-# -------------------- XYZ (метка по недельному CV) --------------------
-xyz_basis = weekly.groupby("name")["total_revenue"].agg(mean="mean", std="std").reset_index()
-xyz_basis["cv_xyz"] = xyz_basis["std"] / xyz_basis["mean"]
-
-def xyz_bucket(cv_value: float, x_thr: float = XYZ_X, y_thr: float = XYZ_Y) -> str:
-    if pd.isna(cv_value) or cv_value == np.inf:
-        return "Z"
-    if cv_value <= x_thr:
-        return "X"
-    if cv_value <= y_thr:
-        return "Y"
-    return "Z"
-
-xyz_basis["XYZ"] = xyz_basis["cv_xyz"].apply(xyz_bucket)
-
-# -------------------- Сборка итогового отчёта --------------------
-report = (
-    stats.merge(by_item[["name", "rev_share", "cum_share", "ABC"]], on="name", how="left")
-         .merge(xyz_basis[["name", "XYZ"]], on="name", how="left")  # численный cv берём из stats["cv"]
+# -------------------- Отчёт: недельные агрегаты, ABC, XYZ (в фоне) --------------------
+# пока считается отчёт под новую дату, показываем прошлый (utils/background.py)
+# источник — по содержимому: тот же файл с новыми продажами пересчитывается
+source = source_digest(uploaded_file, FILE_PATH)
+tables, fresh = background.latest_result(
+    "liquidity_all", (source, cutoff_dt),
+    lambda task: liquidity_tables(df, ABC_A, ABC_B, XYZ_X, XYZ_Y, category_col="category",
+                                  main_category_col="main_category", step=task.report),
 )
 
-# Сортировка: ABC (A→B→C), затем XYZ (X→Y→Z), затем по выручке
-order_abc = {"A": 0, "B": 1, "C": 2}
-order_xyz = {"X": 0, "Y": 1, "Z": 2}
-report["abc_ord"] = report["ABC"].map(order_abc).fillna(9)
-report["xyz_ord"] = report["XYZ"].map(order_xyz).fillna(9)
-report = report.sort_values(["abc_ord", "xyz_ord", "total_revenue"], ascending=[True, True, False]).reset_index(drop=True)
-
 # -------------------- Вывод: по одной таблице на каждую only_glass_cat --------------------
 st.subheader("Только таблицы: 1 категория (only_glass_cat) = 1 таблица")
 
-columns_to_show = [
-    "name", "total_revenue", "profit", "margin_pct",
-    "weeks_sold", "coverage", "last_sold",
-    "cv", "ABC", "XYZ", "rev_share", "cum_share"
-]
-
-# Список категорий — отсортирован по сумме выручки
-categories = (
-    df.groupby("category", as_index=False)["total_revenue"].sum()
-      .sort_values("total_revenue", ascending=False)["category"]
-      .tolist()
-)
-
-if not categories:
+if not tables:
     st.write("Категорий (only_glass_cat) не найдено.")
 else:
-    st.caption(f"Категорий: {len(categories)}")
-    for cat in categories:
-        names_in_cat = df.loc[df["category"] == cat, "name"].unique().tolist()
-        table = report.loc[report["name"].isin(names_in_cat), columns_to_show].reset_index(drop=True)
+    st.caption(f"Категорий: {len(tables)}")
+    for cat, table in tables.items():
         st.markdown(f"### {cat}")
-        st.dataframe(table, use_container_width=True, hide_index=True)
+        # ключ индекса поиска — входы показанного отчёта; пока показан прошлый (не fresh) — без ключа
+        paged_table(table, key=f"liq_{cat}", search_columns=["name"],
+                    data_key=(source, cutoff_dt, cat) if fresh else None)
+
+background.rerun_while(not fresh)
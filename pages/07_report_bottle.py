@@ -6,19 +6,25 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime, date
 
+from utils.data import REPORT_DISH_PATH, LIQUIDITY_AFTER
+from preprocessing.scripts.liquidity import ABC_B, liquidity_rows, liquidity_tables
+from utils import background
+from utils.table import paged_table
+from utils.readers import UPLOAD_TYPES, detect_format, load_uploaded_sales, load_sales_path, source_digest
+
 st.set_page_config(page_title="Ликвидность ассортимента — таблицы", layout="wide")
 st.title("Ликвидность ассортимента (минималистично) — только таблицы")
 
 # --------- Ввод: файл и фильтр даты (без сайдбара) ----------
 col_a, col_b = st.columns([2, 1])
 with col_a:
-    uploaded = st.file_uploader("Загрузите Excel (report_dish_new_menu.xlsx или all_sales.xlsx)", type=["xlsx", "xls"])
+    uploaded = st.file_uploader("Загрузите файл (report_dish_new_menu.xlsx, all_sales.xlsx, csv, csv.gz или parquet)", type=UPLOAD_TYPES)
 with col_b:
-    local_path = st.text_input("...или путь к файлу на диске", value="/Users/nl/streamlit_test/report_dish_new_menu.xlsx")
+    local_path = st.text_input("...или путь к файлу на диске", value=str(REPORT_DISH_PATH))
 
 col1, col2, col3 = st.columns([1,1,1])
 with col1:
-    filter_after = st.date_input("Показывать после даты", value=date(2025, 6, 23))
+    filter_after = st.date_input("Показывать после даты", value=LIQUIDITY_AFTER)
 with col2:
     abc_a = st.slider("ABC: граница A (доля)", 0.5, 0.9, 0.80, 0.01)
 with col3:
@@ -43,19 +49,31 @@ def pick(df, options):
         if c in df.columns: return c
     return None
 
+# Все варианты колонок: читаем только их, строки до даты отсекаем прямо при чтении
+READ_COLUMNS = tuple(dict.fromkeys(c for options in LIKELY_COLUMNS.values() for c in options))
+DATETIME_OPTIONS = tuple(LIKELY_COLUMNS["datetime"])
+cutoff = datetime.combine(filter_after, datetime.min.time())
+
+def supported(pth):
+    try:
+        detect_format(pth.name)
+        return True
+    except ValueError:
+        return False
+
 def load_df():
     if uploaded is not None:
-        return pd.read_excel(uploaded)
+        return load_uploaded_sales(uploaded, READ_COLUMNS, DATETIME_OPTIONS, cutoff)
     p = local_path.strip()
     if p:
         pth = Path(p)
         if pth.exists():
-            return pd.read_excel(pth) if pth.suffix.lower() in [".xlsx",".xls"] else None
+            return load_sales_path(str(pth), READ_COLUMNS, DATETIME_OPTIONS, cutoff) if supported(pth) else None
     # попробовать локальный файл для удобства
     demo = Path("report_dish_new_menu.xlsx")
     if demo.exists():
         st.info("Использую локальный report_dish_new_menu.xlsx")
-        return pd.read_excel(demo)
+        return load_sales_path(str(demo), READ_COLUMNS, DATETIME_OPTIONS, cutoff)
     return None
 
 df_raw = load_df()
@@ -79,9 +97,10 @@ if missing:
     st.stop()
 
 # --------- Подготовка ----------
+# df_raw — общая таблица процесса (utils/shared.py), только чтение: колонки пишем в свою копию
 df = df_raw.copy()
 df[dt_col] = pd.to_datetime(df[dt_col], errors="coerce")
-df = df.dropna(subset=[dt_col]).copy()
+df = df.dropna(subset=[dt_col])
 df["month"] = df[dt_col].dt.to_period("M")
 df["date"]  = df[dt_col].dt.date
 
@@ -96,107 +115,37 @@ if pa_col: profits.append(pd.to_numeric(df[pa_col], errors="coerce"))
 if pg_col: profits.append(pd.to_numeric(df[pg_col], errors="coerce"))
 df["profit"] = pd.concat(profits, axis=1).max(axis=1) if profits else np.nan
 
-# Фильтр по дате
-cutoff = datetime.combine(filter_after, datetime.min.time())
-df = df.loc[df[dt_col] > cutoff].copy()
+# Фильтр по дате (основная часть отсеяна уже при чтении) — общий с выгрузкой и API
+df = liquidity_rows(df, filter_after, time_col=dt_col)
 if df.empty:
     st.warning("После выбранной даты данных нет.")
     st.stop()
 
-# --------- Агрегации по месяцам и позициям ----------
-monthly = df.groupby(["name","month"], as_index=False)["revenue"].sum()
-
-# Базовые метрики по позиции
-stats = monthly.groupby("name")["revenue"].agg(
-    total_revenue="sum",
-    mean_rev="mean",
-    std_rev="std",
-    months_sold="count",
-).reset_index()
-
-# CV и coverage
-stats["cv"] = stats["std_rev"] / stats["mean_rev"]
-total_months = monthly["month"].nunique()
-stats["coverage"] = stats["months_sold"] / (total_months if total_months else 1)
-
-# Последний месяц продажи
-last_sold = monthly.groupby("name")["month"].max().reset_index().rename(columns={"month":"last_sold"})
-stats = stats.merge(last_sold, on="name", how="left")
-
-# Прибыль и маржа
-profit_item = df.groupby("name", as_index=False)["profit"].sum()
-stats = stats.merge(profit_item, on="name", how="left")
-stats["profit"] = stats["profit"].fillna(0.0)
-stats["margin_pct"] = np.where(stats["total_revenue"]>0, stats["profit"]/stats["total_revenue"]*100, np.nan)
-
-# Привязка основной категории (берём ту, где у позиции наибольшая выручка)
-cat_map = (
-    df.groupby(["name","category"], as_index=False)["revenue"].sum()
-      .sort_values(["name","revenue"], ascending=[True, False])
-      .drop_duplicates("name")[["name","category"]]
-      .rename(columns={"category":"main_category"})
+# --------- Отчёт: помесячные суммы, ABC, XYZ (в фоне) ----------
+# тот же расчёт, что на страницах 07/08 (liquidity_tables), только период — месяц.
+# Пока идёт пересчёт под новые пороги, показываем прошлый отчёт, а следующее
+# движение слайдера отменяет незаконченный расчёт (utils/background.py).
+# Источник — по содержимому файла (загруженного, по пути или демонстрационного, как в load_df)
+df = df.assign(total_revenue=df["revenue"])
+source = source_digest(uploaded, local_path.strip() or "report_dish_new_menu.xlsx")
+tables, fresh = background.latest_result(
+    "liquidity_report_bottle", (source, cutoff, abc_a, xyz_x, xyz_y),
+    lambda task: liquidity_tables(df, abc_a, ABC_B, xyz_x, xyz_y, category_col="category",
+                                  main_category_col="main_category", period_col="month", step=task.report),
 )
-stats = stats.merge(cat_map, on="name", how="left")
-
-# --------- ABC ----------
-by_item = df.groupby("name", as_index=False).agg(revenue=("revenue","sum"))
-by_item = by_item.sort_values("revenue", ascending=False).reset_index(drop=True)
-total_rev = by_item["revenue"].sum()
-by_item["rev_share"] = np.where(total_rev>0, by_item["revenue"]/total_rev, 0.0)
-by_item["cum_share"] = by_item["rev_share"].cumsum()
-
-def abc_bucket(x, a=0.80, b=0.95):
-    if x <= a: return "A"
-    if x <= b: return "B"
-    return "C"
-
-by_item["ABC"] = by_item["cum_share"].apply(lambda x: abc_bucket(x, abc_a, 0.95))
-
-# --------- XYZ ----------
-daily = df.groupby(["name", df["month"].dt.to_timestamp("D")], as_index=False)["revenue"].sum()
-xyz = daily.groupby("name")["revenue"].agg(mean="mean", std="std").reset_index()
-xyz["cv"] = xyz["std"] / xyz["mean"]
-
-def xyz_bucket(cv, x_thr, y_thr):
-    if pd.isna(cv) or cv == np.inf: return "Z"
-    if cv <= x_thr: return "X"
-    if cv <= y_thr: return "Y"
-    return "Z"
-
-xyz["XYZ"] = xyz["cv"].apply(lambda v: xyz_bucket(v, xyz_x, xyz_y))
-
-# --------- Сборка отчёта ----------
-report = (
-    stats.merge(by_item[["name","rev_share","cum_share","ABC"]], on="name", how="left")
-         .merge(xyz[["name","XYZ"]], on="name", how="left")
-)
-
-# Сортировка для удобства просмотра
-order_abc = {"A":0,"B":1,"C":2}
-order_xyz = {"X":0,"Y":1,"Z":2}
-report["abc_ord"] = report["ABC"].map(order_abc).fillna(9)
-report["xyz_ord"] = report["XYZ"].map(order_xyz).fillna(9)
-report = report.sort_values(["abc_ord","xyz_ord","total_revenue"], ascending=[True,True,False])
 
 # --------- Вывод: одна таблица на КАЖДУЮ категорию ----------
 st.subheader("Только таблицы (1 категория = 1 таблица)")
-show_cols = [
-    "name","total_revenue","profit","margin_pct","months_sold","coverage","last_sold",
-    "cv","ABC","XYZ","rev_share","cum_share"
-]
-
-categories = (
-    df.groupby("category", as_index=False)["revenue"].sum()
-      .sort_values("revenue", ascending=False)["category"]
-      .tolist()
-)
 
-if not categories:
+if not tables:
     st.write("Категорий нет.")
 else:
-    st.caption(f"Категорий: {len(categories)}")
-    for cat in categories:
-        names_in_cat = df.loc[df["category"]==cat, "name"].unique().tolist()
-        table = report.loc[report["name"].isin(names_in_cat), show_cols].reset_index(drop=True)
+    st.caption(f"Категорий: {len(tables)}")
+    for cat, table in tables.items():
         st.markdown(f"### {cat}")
-        st.dataframe(table, use_container_width=True, hide_index=True)
+        # период отчёта — месяц: weeks_sold здесь — число месяцев с продажами
+        # ключ индекса поиска — входы показанного отчёта; пока показан прошлый (не fresh) — без ключа
+        paged_table(table.rename(columns={"weeks_sold": "months_sold"}), key=f"liq_{cat}", search_columns=["name"],
+                    data_key=(source, cutoff, abc_a, xyz_x, xyz_y, cat) if fresh else None)
+
+background.rerun_while(not fresh)
@@ -6,22 +6,23 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime, date
 
+from preprocessing.scripts.liquidity import ABC_A, ABC_B, XYZ_X, XYZ_Y, liquidity_rows, liquidity_tables
+from preprocessing.scripts.order_metrics import GLASS_SECTION
+from utils import background
+from utils.table import paged_table
+from utils.readers import UPLOAD_TYPES, load_uploaded_sales, load_sales_path, source_digest
+from utils.data import REPORT_DISH_PATH, LIQUIDITY_AFTER, GLASS_REPORT_COLUMNS
+
 # -------------------- Константы конфигурации --------------------
 PAGE_TITLE = "Побокальные вина — отчёт (только таблицы, по неделям)"
 LAYOUT = "wide"
 
 # Фильтр по категории (жёстко задан, не редактируется пользователем)
-ARTICLE_CATEGORY_FILTER = "вина_по_бокалам_150_мл"
-
-# Пороги ABC / XYZ (фиксированы; выводим как справку)
-ABC_A = 0.80
-ABC_B = 0.95
-XYZ_X = 0.35
-XYZ_Y = 0.80
+ARTICLE_CATEGORY_FILTER = GLASS_SECTION
 
 # Необязательный «тихий» путь: если файл не загружают через UI — попробуем прочитать отсюда
 # (путь не отображается пользователю)
-FILE_PATH = Path("/Users/nl/streamlit_test/report_dish_new_menu.xlsx")
+FILE_PATH = REPORT_DISH_PATH
 
 # Ожидаемые названия столбцов (данные уже предобработаны)
 COL_DATETIME = "open_time"
@@ -36,23 +37,26 @@ COL_QTY = "quantity"
 st.set_page_config(page_title=PAGE_TITLE, layout=LAYOUT)
 st.title(PAGE_TITLE)
 
+# -------------------- Единственный контрол: дата-граница --------------------
+filter_after = st.date_input("Показывать продажи ПОСЛЕ даты", value=LIQUIDITY_AFTER)
+cutoff_dt = datetime.combine(filter_after, datetime.min.time())
+
 # -------------------- Загрузка данных --------------------
-uploaded_file = st.file_uploader("Загрузите Excel (xlsx/xls)", type=["xlsx", "xls"])
+# Читаем только нужные колонки и только строки после даты (CSV/Parquet — по частям)
+READ_COLUMNS = GLASS_REPORT_COLUMNS
+uploaded_file = st.file_uploader("Загрузите файл продаж (xlsx/xls, csv, csv.gz, parquet)", type=UPLOAD_TYPES)
 
 def load_dataframe():
     if uploaded_file is not None:
-        return pd.read_excel(uploaded_file)
+        return load_uploaded_sales(uploaded_file, READ_COLUMNS, (COL_DATETIME,), cutoff_dt)
     # тихая попытка прочитать из FILE_PATH
-    if FILE_PATH.exists() and FILE_PATH.suffix.lower() in [".xlsx", ".xls"]:
-        return pd.read_excel(FILE_PATH)
-    st.error("Файл не загружен. Загрузите Excel-файл.")
+    if FILE_PATH.exists():
+        return load_sales_path(str(FILE_PATH), READ_COLUMNS, (COL_DATETIME,), cutoff_dt)
+    st.error("Файл не загружен. Загрузите файл продаж.")
     st.stop()
 
 df_raw = load_dataframe()
 
-# -------------------- Единственный контрол: дата-граница --------------------
-filter_after = st.date_input("Показывать продажи ПОСЛЕ даты", value=date(2025, 6, 23))
-
 # -------------------- Информативный блок: что за фильтры и пороги используются --------------------
 st.info(
     f"""
@@ -77,11 +81,12 @@ if missing:
     st.stop()
 
 # -------------------- Подготовка данных --------------------
+# df_raw — общая таблица процесса (utils/shared.py), только чтение: колонки пишем в свою копию
 df = df_raw.copy()
 
 # Дата/время и период неделя
 df[COL_DATETIME] = pd.to_datetime(df[COL_DATETIME], errors="coerce")
-df = df.dropna(subset=[COL_DATETIME]).copy()
+df = df.dropna(subset=[COL_DATETIME])
 df["week"] = df[COL_DATETIME].dt.to_period("W")     # недели (по умолчанию до воскресенья)
 df["date"] = df[COL_DATETIME].dt.date
 
@@ -99,129 +104,36 @@ profit_per_glass = pd.to_numeric(df[COL_GLASS_PROFIT], errors="coerce").fillna(0
 df["total_revenue"] = price_per_glass * df["qty"]
 df["profit"] = profit_per_glass * df["qty"]
 
-# Фильтр по дате
-cutoff_dt = datetime.combine(filter_after, datetime.min.time())
-df = df.loc[df[COL_DATETIME] > cutoff_dt].copy()
-if df.empty:
-    st.warning("После выбранной даты данных нет.")
-    st.stop()
-
-# Фильтр по категории (жёстко задан)
-df = df.loc[df["article_category"] == ARTICLE_CATEGORY_FILTER].copy()
+# Фильтр по дате (основная часть отсеяна уже при чтении) и по категории (жёстко задан) —
+# общий с выгрузкой и API (liquidity_rows)
+df = liquidity_rows(df, filter_after, "бокал", time_col=COL_DATETIME, glass_category=ARTICLE_CATEGORY_FILTER)
 if df.empty:
-    st.warning(f"В категории '{ARTICLE_CATEGORY_FILTER}' данных нет.")
+    st.warning(f"После выбранной даты в категории '{ARTICLE_CATEGORY_FILTER}' данных нет.")
     st.stop()
 
 st.caption(f"Фильтр: article_category == '{ARTICLE_CATEGORY_FILTER}'. Строк после фильтра: {len(df):,}".replace(",", " "))
 
-# -------------------- Агрегации по неделям и позициям --------------------
-weekly = df.groupby(["name", "week"], as_index=False)[["total_revenue", "profit"]].sum()
-
-# Базовые метрики по позиции (на основе недельных сумм)
-stats = weekly.groupby("name").agg(
-    total_revenue=("total_revenue", "sum"),
-    profit=("profit", "sum"),
-    mean_rev=("total_revenue", "mean"),
-    std_rev=("total_revenue", "std"),
-    weeks_sold=("week", "count"),
-).reset_index()
-
-# Недельный CV и coverage
-stats["cv"] = stats["std_rev"] / stats["mean_rev"]
-stats.loc[~np.isfinite(stats["cv"]), "cv"] = np.nan
-total_weeks = weekly["week"].nunique()
-stats["coverage"] = stats["weeks_sold"] / (total_weeks if total_weeks else 1)
-
-# Последняя неделя продажи
-last_sold = weekly.groupby("name")["week"].max().reset_index().rename(columns={"week": "last_sold"})
-stats = stats.merge(last_sold, on="name", how="left")
-
-# Маржа, %
-stats["margin_pct"] = np.where(
-    stats["total_revenue"] > 0,
-    stats["profit"] / stats["total_revenue"] * 100,
-    np.nan
+# -------------------- Отчёт: недельные агрегаты, ABC, XYZ (в фоне) --------------------
+# пока считается отчёт под новую дату, показываем прошлый (utils/background.py)
+# источник — по содержимому: тот же файл с новыми продажами пересчитывается
+source = source_digest(uploaded_file, FILE_PATH)
+tables, fresh = background.latest_result(
+    "liquidity_glass", (source, cutoff_dt),
+    lambda task: liquidity_tables(df, ABC_A, ABC_B, XYZ_X, XYZ_Y, category_col="only_glass_cat",
+                                  main_category_col="main_glass_cat", step=task.report),
 )
 
-# Основная подкатегория only_glass_cat (по максимальной выручке позиции в ней)
-glass_map = (
-    df.groupby(["name", "only_glass_cat"], as_index=False)["total_revenue"].sum()
-      .sort_values(["name", "total_revenue"], ascending=[True, False])
-      .drop_duplicates("name")[["name", "only_glass_cat"]]
-      .rename(columns={"only_glass_cat": "main_glass_cat"})
-)
-stats = stats.merge(glass_map, on="name", how="left")
-
-# -------------------- ABC (по total_revenue, в текущем фильтре) --------------------
-by_item = (
-    df.groupby("name", as_index=False)
-      .agg(revenue=("total_revenue", "sum"))
-      .sort_values("revenue", ascending=False)
-      .reset_index(drop=True)
-)
-sum_revenue = by_item["revenue"].sum()
-by_item["rev_share"] = np.where(sum_revenue > 0, by_item["revenue"] / sum_revenue, 0.0)
-by_item["cum_share"] = by_item["rev_share"].cumsum()
-
-def abc_bucket(cum_share: float, a: float = ABC_A, b: float = ABC_B) -> str:
-    if cum_share <= a:
-        return "A"
-    if cum_share <= b:
-        return "B"
-    return "C"
-
-by_item["ABC"] = by_item["cum_share"].apply(abc_bucket)
-
-# -------------------- XYZ (метка по недельному CV) --------------------
-# Рассчитываем ещё раз mean/std по недельным суммам (эквивалентно stats, но оставим отдельно для чистоты)
-xyz_basis = weekly.groupby("name")["total_revenue"].agg(mean="mean", std="std").reset_index()
-xyz_basis["cv_xyz"] = xyz_basis["std"] / xyz_basis["mean"]
-
-def xyz_bucket(cv_value: float, x_thr: float = XYZ_X, y_thr: float = XYZ_Y) -> str:
-    if pd.isna(cv_value) or cv_value == np.inf:
-        return "Z"
-    if cv_value <= x_thr:
-        return "X"
-    if cv_value <= y_thr:
-        return "Y"
-    return "Z"
-
-xyz_basis["XYZ"] = xyz_basis["cv_xyz"].apply(xyz_bucket)
-
-# -------------------- Сборка итогового отчёта --------------------
-report = (
-    stats.merge(by_item[["name", "rev_share", "cum_share", "ABC"]], on="name", how="left")
-         .merge(xyz_basis[["name", "XYZ"]], on="name", how="left")  # численный cv берём из stats["cv"]
-)
-
-# Сортировка: ABC (A→B→C), затем XYZ (X→Y→Z), затем по выручке
-order_abc = {"A": 0, "B": 1, "C": 2}
-order_xyz = {"X": 0, "Y": 1, "Z": 2}
-report["abc_ord"] = report["ABC"].map(order_abc).fillna(9)
-report["xyz_ord"] = report["XYZ"].map(order_xyz).fillna(9)
-report = report.sort_values(["abc_ord", "xyz_ord", "total_revenue"], ascending=[True, True, False]).reset_index(drop=True)
-
 # -------------------- Вывод таблиц: одна таблица на каждую only_glass_cat --------------------
 st.subheader("Только таблицы: 1 подкатегория (only_glass_cat) = 1 таблица")
 
-columns_to_show = [
-    "name", "total_revenue", "profit", "margin_pct",
-    "weeks_sold", "coverage", "last_sold",
-    "cv", "ABC", "XYZ", "rev_share", "cum_share"
-]
-
-glass_categories = (
-    df.groupby("only_glass_cat", as_index=False)["total_revenue"].sum()
-      .sort_values("total_revenue", ascending=False)["only_glass_cat"]
-      .tolist()
-)
-
-if not glass_categories:
+if not tables:
     st.write("Подкатегорий (only_glass_cat) не найдено.")
 else:
-    st.caption(f"Подкатегорий (only_glass_cat): {len(glass_categories)}")
-    for gcat in glass_categories:
-        items_in_gcat = df.loc[df["only_glass_cat"] == gcat, "name"].unique().tolist()
-        table = report.loc[report["name"].isin(items_in_gcat), columns_to_show].reset_index(drop=True)
+    st.caption(f"Подкатегорий (only_glass_cat): {len(tables)}")
+    for gcat, table in tables.items():
         st.markdown(f"### {gcat}")
-        st.dataframe(table, use_container_width=True, hide_index=True)
+        # ключ индекса поиска — входы показанного отчёта; пока показан прошлый (не fresh) — без ключа
+        paged_table(table, key=f"liq_{gcat}", search_columns=["name"],
+                    data_key=(source, cutoff_dt, gcat) if fresh else None)
+
+background.rerun_while(not fresh)
@@ -6,19 +6,26 @@ import streamlit as st
 from pathlib import Path
 from datetime import datetime, date
 
+from utils.data import REPORT_DISH_PATH, LIQUIDITY_AFTER
+from preprocessing.scripts.liquidity import ABC_B, liquidity_rows, liquidity_tables
+from preprocessing.scripts.order_metrics import GLASS_SECTION
+from utils import background
+from utils.table import paged_table
+from utils.readers import UPLOAD_TYPES, detect_format, load_uploaded_sales, load_sales_path, source_digest
+
 st.set_page_config(page_title="Побокальные вина — отчёт (только таблицы, по неделям)", layout="wide")
 st.title("Побокальные вина — отчёт по ликвидности (по неделям, только таблицы)")
 
 # -------------------- Ввод: файл и параметры (без сайдбара) --------------------
 col_a, col_b = st.columns([2, 1])
 with col_a:
-    uploaded = st.file_uploader("Загрузите Excel (например, all_sales.xlsx / report_dish_new_menu.xlsx)", type=["xlsx","xls"])
+    uploaded = st.file_uploader("Загрузите файл (например, all_sales.xlsx / report_dish_new_menu.xlsx, csv, csv.gz, parquet)", type=UPLOAD_TYPES)
 with col_b:
-    local_path = st.text_input("...или путь к файлу на диске", value="/Users/nl/streamlit_test/report_dish_new_menu.xlsx")
+    local_path = st.text_input("...или путь к файлу на диске", value=str(REPORT_DISH_PATH))
 
 col1, col2, col3 = st.columns([1,1,1])
 with col1:
-    filter_after = st.date_input("Показывать ПОСЛЕ даты", value=date(2025, 6, 23))
+    filter_after = st.date_input("Показывать ПОСЛЕ даты", value=LIQUIDITY_AFTER)
 with col2:
     abc_a = st.slider("ABC: граница A (доля)", 0.5, 0.9, 0.80, 0.01)
 with col3:
@@ -27,7 +34,7 @@ xyz_y = st.slider("XYZ: Y (CV ≤)", 0.2, 2.0, 0.80, 0.05)
 
 st.markdown("---")
 
-default_by_glass_category = "вина_по_бокалам_150_мл"
+default_by_glass_category = GLASS_SECTION
 by_glass_category = st.text_input("Фильтр по article_category (по бокалам):", value=default_by_glass_category)
 
 # -------------------- Загрузка --------------------
@@ -45,25 +52,31 @@ def pick(df, options):
         if c in df.columns: return c
     return None
 
+# Все варианты колонок (+ quantity): читаем только их, строки до даты отсекаем прямо при чтении
+READ_COLUMNS = tuple(dict.fromkeys([c for options in LIKELY_COLUMNS.values() for c in options] + ["quantity"]))
+DATETIME_OPTIONS = tuple(LIKELY_COLUMNS["datetime"])
+cutoff = datetime.combine(filter_after, datetime.min.time())
+
 def load_df():
     if uploaded is not None:
-        return pd.read_excel(uploaded)
+        return load_uploaded_sales(uploaded, READ_COLUMNS, DATETIME_OPTIONS, cutoff)
     p = local_path.strip()
     if p:
         pth = Path(p)
         if pth.exists():
-            if pth.suffix.lower() in [".xlsx",".xls"]:
-                return pd.read_excel(pth)
-            else:
+            try:
+                detect_format(pth.name)
+            except ValueError:
                 st.error(f"Неподдерживаемое расширение: {pth.suffix}")
                 return None
+            return load_sales_path(str(pth), READ_COLUMNS, DATETIME_OPTIONS, cutoff)
         else:
             st.error("Файл по указанному пути не найден.")
             return None
     demo = Path("report_dish_new_menu.xlsx")
     if demo.exists():
         st.info("Использую локальный report_dish_new_menu.xlsx")
-        return pd.read_excel(demo)
+        return load_sales_path(str(demo), READ_COLUMNS, DATETIME_OPTIONS, cutoff)
     return None
 
 df_raw = load_df()
@@ -89,11 +102,12 @@ if missing:
     st.stop()
 
 # -------------------- Подготовка --------------------
+# df_raw — общая таблица процесса (utils/shared.py), только чтение: колонки пишем в свою копию
 df = df_raw.copy()
 
 # Дата/время
 df[dt_col] = pd.to_datetime(df[dt_col], errors="coerce")
-df = df.dropna(subset=[dt_col]).copy()
+df = df.dropna(subset=[dt_col])
 df["week"] = df[dt_col].dt.to_period("W")    # недели
 df["date"] = df[dt_col].dt.date
 
@@ -108,120 +122,37 @@ df["qty"] = pd.to_numeric(df["quantity"], errors="coerce").fillna(1.0)
 df["total_revenue"] = pd.to_numeric(df[gp_col], errors="coerce").fillna(0.0) * df["qty"]
 df["profit"] = pd.to_numeric(df[gpr_col], errors="coerce").fillna(0.0) * df["qty"]
 
-# Фильтр по дате
-cutoff = datetime.combine(filter_after, datetime.min.time())
-df = df.loc[df[dt_col] > cutoff].copy()
-if df.empty:
-    st.warning("После выбранной даты данных нет.")
-    st.stop()
-
-# Фильтр по article_category (по бокалам)
-df = df.loc[df["article_category"] == by_glass_category].copy()
+# Фильтр по дате (основная часть отсеяна уже при чтении) и по article_category (по бокалам) —
+# общий с выгрузкой и API (liquidity_rows)
+df = liquidity_rows(df, filter_after, "бокал", time_col=dt_col, glass_category=by_glass_category)
 if df.empty:
-    st.warning(f"В категории '{by_glass_category}' данных нет. Проверь название.")
+    st.warning(f"После выбранной даты в категории '{by_glass_category}' данных нет. Проверь название.")
     st.stop()
 
 st.caption(f"Фильтр: article_category == '{by_glass_category}'. Строк: {len(df):,}".replace(","," "))
 
-# -------------------- Агрегации по неделям и позициям --------------------
-weekly = df.groupby(["name","week"], as_index=False)[["total_revenue","profit"]].sum()
-
-# Базовые метрики по позиции (по неделям)
-stats = weekly.groupby("name").agg(
-    total_revenue=("total_revenue","sum"),
-    profit=("profit","sum"),
-    mean_rev=("total_revenue","mean"),
-    std_rev=("total_revenue","std"),
-    weeks_sold=("week","count"),
-).reset_index()
-
-# CV и coverage (по неделям)
-stats["cv"] = stats["std_rev"] / stats["mean_rev"]
-stats.loc[~np.isfinite(stats["cv"]), "cv"] = np.nan
-total_weeks = weekly["week"].nunique()
-stats["coverage"] = stats["weeks_sold"] / (total_weeks if total_weeks else 1)
-
-# Последняя неделя продажи
-last_sold = weekly.groupby("name")["week"].max().reset_index().rename(columns={"week":"last_sold"})
-stats = stats.merge(last_sold, on="name", how="left")
-
-# Маржа, %
-stats["margin_pct"] = np.where(stats["total_revenue"]>0,
-                               stats["profit"]/stats["total_revenue"]*100,
-                               np.nan)
-
-# Главная подкатегория only_glass_cat по выручке
-glass_map = (
-    df.groupby(["name","only_glass_cat"], as_index=False)["total_revenue"].sum()
-      .sort_values(["name","total_revenue"], ascending=[True, False])
-      .drop_duplicates("name")[["name","only_glass_cat"]]
-      .rename(columns={"only_glass_cat":"main_glass_cat"})
+# -------------------- Отчёт: недельные агрегаты, ABC (в текущем фильтре), XYZ --------------------
+# Считается в фоне: пока идёт пересчёт под новые пороги, показываем прошлый отчёт,
+# а следующее движение слайдера отменяет незаконченный расчёт (utils/background.py)
+# источник — по содержимому файла (загруженного, по пути или демонстрационного, как в load_df)
+source = source_digest(uploaded, local_path.strip() or "report_dish_new_menu.xlsx")
+tables, fresh = background.latest_result(
+    "liquidity_report_glass", (source, cutoff, by_glass_category, abc_a, xyz_x, xyz_y),
+    lambda task: liquidity_tables(df, abc_a, ABC_B, xyz_x, xyz_y, category_col="only_glass_cat",
+                                  main_category_col="main_glass_cat", step=task.report),
 )
-stats = stats.merge(glass_map, on="name", how="left")
-
-# -------------------- ABC (по total_revenue, в текущем фильтре) --------------------
-by_item = df.groupby("name", as_index=False).agg(revenue=("total_revenue","sum"))
-by_item = by_item.sort_values("revenue", ascending=False).reset_index(drop=True)
-sum_rev = by_item["revenue"].sum()
-by_item["rev_share"] = np.where(sum_rev>0, by_item["revenue"]/sum_rev, 0.0) 
-by_item["cum_share"] = by_item["rev_share"].cumsum()
-
-def abc_bucket(x, a=0.80, b=0.95):
-    if x <= a: return "A"
-    if x <= b: return "B"
-    return "C"
-
-by_item["ABC"] = by_item["cum_share"].apply(lambda x: abc_bucket(x, abc_a, 0.95))
-
-# -------------------- XYZ (по недельной динамике) --------------------
-# Для метки XYZ используем отдельный расчёт CV (но в отчёт берём именно метку XYZ),
-# чтобы не конфликтовать с stats["cv"]
-daily_w = weekly.rename(columns={"week":"period"})  # просто для ясности имени
-xyz = daily_w.groupby("name")["total_revenue"].agg(mean="mean", std="std").reset_index()
-xyz["cv_xyz"] = xyz["std"] / xyz["mean"]
-
-def xyz_bucket(cv, x_thr, y_thr):
-    if pd.isna(cv) or cv == np.inf: return "Z"
-    if cv <= x_thr: return "X"
-    if cv <= y_thr: return "Y"
-    return "Z"
-
-xyz["XYZ"] = xyz["cv_xyz"].apply(lambda v: xyz_bucket(v, xyz_x, xyz_y))
-
-# -------------------- Сборка отчёта --------------------
-report = (
-    stats.merge(by_item[["name","rev_share","cum_share","ABC"]], on="name", how="left")
-         .merge(xyz[["name","XYZ"]], on="name", how="left")  # cv в таблице берём из stats
-)
-
-# Сортировка для удобного чтения
-order_abc = {"A":0,"B":1,"C":2}
-order_xyz = {"X":0,"Y":1,"Z":2}
-report["abc_ord"] = report["ABC"].map(order_abc).fillna(9)
-report["xyz_ord"] = report["XYZ"].map(order_xyz).fillna(9)
-report = report.sort_values(["abc_ord","xyz_ord","total_revenue"], ascending=[True,True,False]).reset_index(drop=True)
 
 # -------------------- Вывод: по одной таблице на каждую only_glass_cat --------------------
 st.subheader("Только таблицы: 1 подкатегория (only_glass_cat) = 1 таблица")
 
-show_cols = [
-    "name","total_revenue","profit","margin_pct",
-    "weeks_sold","coverage","last_sold",
-    "cv","ABC","XYZ","rev_share","cum_share"
-]
-
-glass_cats = (
-    df.groupby("only_glass_cat", as_index=False)["total_revenue"].sum()
-      .sort_values("total_revenue", ascending=False)["only_glass_cat"]
-      .tolist()
-)
-
-if not glass_cats:
+if not tables:
     st.write("Подкатегорий (only_glass_cat) не найдено.")
 else:
-    st.caption(f"Подкатегорий (only_glass_cat): {len(glass_cats)}")
-    for gcat in glass_cats:
-        names_in_gcat = df.loc[df["only_glass_cat"]==gcat, "name"].unique().tolist()
-        table = report.loc[report["name"].isin(names_in_gcat), show_cols].reset_index(drop=True)
+    st.caption(f"Подкатегорий (only_glass_cat): {len(tables)}")
+    for gcat, table in tables.items():
         st.markdown(f"### {gcat}")
-        st.dataframe(table, use_container_width=True, hide_index=True)
+        # ключ индекса поиска — входы показанного отчёта; пока показан прошлый (не fresh) — без ключа
+        paged_table(table, key=f"liq_{gcat}", search_columns=["name"],
+                    data_key=(source, cutoff, by_glass_category, abc_a, xyz_x, xyz_y, gcat) if fresh else None)
+
+background.rerun_while(not fresh)
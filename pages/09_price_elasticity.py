@@ -0,0 +1,43 @@
+import streamlit as st
+
+from utils import store
+from utils.data import load_price_elasticity
+from utils.venues import venue_selector
+from utils.table import paged_table
+
+
+st.set_page_config(page_title="Эластичность спроса по цене", layout="wide")
+
+st.title("Эластичность спроса по цене")
+st.caption(
+    "Изменение цены — день, когда цена позиции отличается от предыдущего дня продаж больше чем на порог. "
+    "Эластичность по событиям: изменение продаж в день за окно до/после к изменению цены (в логарифмах). "
+    "Регрессия: наклон ln(продажи в день) по ln(цена) за всю историю позиции. "
+    "−1 и ниже — спрос заметно падает при росте цены."
+)
+
+venues = venue_selector()
+
+c1, c2 = st.columns(2)
+with c1:
+    window_days = st.slider("Окно до/после изменения, дней", 7, 90, 28, 7)
+with c2:
+    min_change_pct = st.slider("Порог изменения цены, %", 1, 20, 3, 1)
+
+summary, events = load_price_elasticity(venues, window_days, min_change_pct / 100)
+# от чего зависят строки таблиц — ключ индекса поиска
+data_key = (venues, store.data_version(venues), window_days, min_change_pct)
+
+only_changed = st.checkbox("Только позиции с изменениями цены", value=True)
+if only_changed:
+    summary = summary[summary["price_changes"] > 0]
+
+st.caption(f"Позиций: {len(summary)}, изменений цены: {len(events)}")
+
+# только видимая страница уходит в браузер; поиск и сортировка — на сервере
+paged_table(summary, key="elasticity", search_columns=["article_name"],
+            default_sort="price_changes", default_ascending=False, data_key=(*data_key, only_changed))
+
+with st.expander("События изменения цены"):
+    paged_table(events, key="elasticity_events", search_columns=["article_name"],
+                default_sort="day", default_ascending=False, data_key=data_key)
@@ -0,0 +1,53 @@
+import pandas as pd
+import streamlit as st
+
+from preprocessing.scripts.order_metrics import ORDER_BREAKDOWNS
+from utils import store
+from utils.data import load_order_metrics, load_orders
+from utils.venues import venue_selector
+from utils.table import paged_table
+
+
+st.set_page_config(page_title="Заказы: чек, вино, гости", layout="wide")
+
+st.title("Заказы: средний чек, вино в заказе, бокалы на гостя")
+st.caption(
+    "Заказ — смена × номер заказа из выгрузки продаж (все блюда). "
+    "Доля с вином — доля заказов, где было хоть одно вино из каталога. "
+    "Бокалы на гостя — все проданные бокалы / число гостей (по номерам гостей в заказе)."
+)
+
+venues = venue_selector()
+
+orders, _ = load_orders(venues)
+if orders.empty:
+    st.warning("В выгрузках нет заказов (нужны колонки «№ смены» и «№ заказа»).")
+    st.stop()
+
+first_day = orders["open_time"].min().date()
+last_day = orders["open_time"].max().date()
+c1, c2 = st.columns([2, 1])
+with c1:
+    period = st.date_input("Период", value=(max(first_day, last_day - pd.Timedelta(days=364)), last_day),
+                           min_value=first_day, max_value=last_day)
+with c2:
+    by = st.radio("Разрез", list(ORDER_BREAKDOWNS), format_func=ORDER_BREAKDOWNS.get, horizontal=True)
+if len(period) != 2:
+    st.info("Выберите конец периода.")
+    st.stop()
+start, end = period
+
+total = load_order_metrics(venues, start, end).iloc[0]
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Заказов", f"{int(total['orders']):,}".replace(",", " "))
+m2.metric("Средний чек", f"{total['avg_check']:,.0f} ₽".replace(",", " "))
+m3.metric("Заказов с вином", f"{total['attach_rate']:.1%}")
+m4.metric("Бокалов на гостя", f"{total['glasses_per_guest']:.2f}")
+
+table = load_order_metrics(venues, start, end, by)
+if by == "category":
+    st.bar_chart(table.set_index("category")["attach_rate"])
+else:
+    st.bar_chart(table.set_index(by)[["attach_rate", "glasses_per_guest"]])
+
+paged_table(table, key=f"orders_{by}", data_key=(venues, store.data_version(venues), start, end, by))
@@ -1,9 +1,151 @@
 import os
 
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.exact_units import MILLI, KOPECKS, milli_times_kopecks
+
+# Колонки, которые при объединении нескольких заведений складываются (целые)
+ABC_SUM_COLUMNS = ['units_milli', 'revenue_kop', 'profit_kop']
+
+# mode -> (колонка количества, колонка себестоимости, колонка цены) в итоговой таблице
+ABC_COLUMNS = {
+    'бокал': ('glasses_sold', 'cost_per_glass', 'price_per_glass'),
+    'бутылка': ('bottles_sold', 'cost_per_bottle', 'price_per_bottle'),
+}
+
+
+def _add_float_columns(grouped, mode):
+    """Рубли и штуки для отображения — из точных целых колонок."""
+    qty_col, cost_col, price_col = ABC_COLUMNS[mode]
+    grouped[qty_col] = grouped['units_milli'] / MILLI
+    grouped[cost_col] = grouped['cost_kop'] / KOPECKS
+    grouped[price_col] = grouped['price_kop'] / KOPECKS
+    grouped['revenue'] = grouped['revenue_kop'] / KOPECKS
+    grouped['profit'] = grouped['profit_kop'] / KOPECKS
+    return grouped
+
+
+def aggregate_abc(df, mode='бокал'):
+    """
+    Первый шаг ABC-анализа: группировка продаж по позициям (без классификации).
+
+    Выручка и себестоимость считаются по каждой строке (количество × цена версии
+    каталога на момент продажи) и только потом суммируются по позиции, поэтому
+    смена цены учитывается с даты версии. Количество — в милли-единицах, деньги —
+    в копейках, итоги точные. Строки с готовыми revenue_kop / cost_kop (свёрнутый
+    слой, retention.rollup_sales) берутся как есть. Цена и себестоимость единицы
+    в результате — по самой поздней продаже (строки без open_time — действующая
+    версия — считаются самыми поздними), независимо от порядка строк на входе.
+    Результат аддитивен, и агрегаты разных заведений можно объединить через merge_abc_aggregates.
+    """
+    if mode not in ABC_COLUMNS:
+        raise ValueError("mode должен быть 'бокал' или 'бутылка'")
+
+    # фильтруем нужный тип продаж
+    df_filtered = df[df['glass'] == mode]
+    price_col, cost_col = ('glass_price_kop', 'glass_profit_kop') if mode == 'бокал' \
+        else ('article_price_kop', 'article_profit_kop')
+
+    quantity = df_filtered['quantity_milli'].to_numpy(dtype='int64')
+    line_revenue = pd.Series(milli_times_kopecks(quantity, df_filtered[price_col]), index=df_filtered.index)
+    line_cost = pd.Series(milli_times_kopecks(quantity, df_filtered[cost_col]), index=df_filtered.index)
+    if 'revenue_kop' in df_filtered.columns:
+        line_revenue = df_filtered['revenue_kop'].fillna(line_revenue).astype('int64')
+        line_cost = df_filtered['cost_kop'].fillna(line_cost).astype('int64')
+    lines = df_filtered.assign(line_revenue_kop=line_revenue, line_cost_kop=line_cost)
+    # 'last' ниже — цена самой поздней продажи, а не последней строки входа
+    lines = lines.sort_values('open_time', kind='stable', na_position='last')
+
+    agg = dict(
+        units_milli=('quantity_milli', 'sum'),
+        cost_kop=(cost_col, 'last'),
+        price_kop=(price_col, 'last'),
+        category=('article_category', 'first'),
+    )
+    if mode == 'бокал':
+        agg['category_cat'] = ('only_glass_cat', 'first')
+    agg |= dict(revenue_kop=('line_revenue_kop', 'sum'), line_cost_kop=('line_cost_kop', 'sum'))
+    grouped = lines.groupby('article_name').agg(**agg).reset_index()
+
+    grouped['profit_kop'] = grouped['revenue_kop'] - grouped.pop('line_cost_kop')
+    return _add_float_columns(grouped, mode)
+
+
+def merge_abc_aggregates(parts, mode='бокал'):
+    """
+    Объединяет результаты aggregate_abc нескольких заведений в один (сетевой) агрегат:
+    количество, выручка и прибыль складываются, цены/категории берутся первые.
+    """
+    if mode not in ABC_COLUMNS:
+        raise ValueError("mode должен быть 'бокал' или 'бутылка'")
+
+    combined = pd.concat(list(parts), ignore_index=True)
+    first_cols = [c for c in combined.columns if c not in ABC_SUM_COLUMNS and c != 'article_name']
+    agg = {c: 'sum' for c in ABC_SUM_COLUMNS} | {c: 'first' for c in first_cols}
+    merged = combined.groupby('article_name', as_index=False).agg(agg)[combined.columns]
+    return _add_float_columns(merged, mode)
+
+
+def abc_classes(cumulative, total):
+    """
+    Классы A/B/C по накопленной сумме: A — до 80 %, B — до 95 %, иначе C.
+
+    Для целых сумм (копейки) границы сравниваются в целых числах
+    (cumulative * 5 <= total * 4), поэтому результат не зависит от округления
+    и одинаков у полного пересчёта и у IncrementalABC (abc_incremental.py).
+    """
+    cumulative = np.asarray(cumulative)
+    if total > 0 and np.issubdtype(cumulative.dtype, np.integer):
+        is_a = cumulative * 5 <= total * 4
+        is_b = cumulative * 20 <= total * 19
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = cumulative / total * 100
+        is_a = percentage <= 80
+        is_b = percentage <= 95
+    return np.select([is_a, is_b], ['A', 'B'], default='C')
+
+
+def add_cumulative_columns(df_sorted, value_column='revenue'):
+    """
+    Накопленные значения, доли и классы для уже отсортированной таблицы.
+
+    Если есть точная колонка f'{value_column}_kop', накопление считается по ней.
+    """
+    exact_column = f'{value_column}_kop' if f'{value_column}_kop' in df_sorted.columns else value_column
+    values = df_sorted[exact_column].to_numpy()
+    total = values.sum()
+    cumulative = values.cumsum()
+    scale = KOPECKS if exact_column != value_column else 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df_sorted['cumulative_value'] = cumulative / scale
+        df_sorted['cumulative_percentage'] = (cumulative / total) * 100
+        df_sorted['value_percentage'] = (values / total) * 100
+    df_sorted['ABC_category'] = abc_classes(cumulative, total)
+    return df_sorted
+
+
+def classify_abc(grouped, value_column='revenue'):
+    """
+    Второй шаг ABC-анализа: сортировка, накопленные доли и классы A/B/C.
+
+    Порядок детерминирован: по убыванию значения, при равенстве — по article_name,
+    так что одинаковые входы всегда дают одинаковые классы.
+    """
+    exact_column = f'{value_column}_kop' if f'{value_column}_kop' in grouped.columns else value_column
+
+    # сортировка
+    df_sorted = grouped.sort_values(by=[exact_column, 'article_name'], ascending=[False, True],
+                                    kind='stable').reset_index(drop=True)
+
+    return add_cumulative_columns(df_sorted, value_column)
+
+
 def perform_abc_analysis(df, mode='бокал', value_column='revenue', save_to_excel=False, filename=None):
     """
     Универсальный ABC-анализ для вина (по бокалам или по бутылкам).
-    
+
     Parameters:
     df : DataFrame с данными о продажах (после обработки)
     mode : 'бокал' или 'бутылка' — что анализировать
@@ -15,55 +157,7 @@ def perform_abc_analysis(df, mode='бокал', value_column='revenue', save_to_
     DataFrame с результатами ABC-анализа
     """
 
-    # фильтруем нужный тип продаж
-    df_filtered = df[df['glass'] == mode].copy()
-
-    if mode == 'бокал':
-        grouped = df_filtered.groupby('article_name').agg(
-            glasses_sold=('quantity', 'sum'),
-            cost_per_glass=('glass_profit', 'first'),
-            price_per_glass=('glass_price', 'first'),
-            category=('article_category', 'first'),
-            category_cat=('only_glass_cat', 'first')
-        ).reset_index()
-
-        grouped['revenue'] = grouped['glasses_sold'] * grouped['price_per_glass']
-        grouped['profit'] = (grouped['price_per_glass'] - grouped['cost_per_glass']) * grouped['glasses_sold']
-
-    elif mode == 'бутылка':
-        grouped = df_filtered.groupby('article_name').agg(
-            bottles_sold=('quantity', 'sum'),
-            cost_per_bottle=('article_profit', 'first'),
-            price_per_bottle=('article_price', 'first'),
-            category=('article_category', 'first'),
-        ).reset_index()
-
-        grouped['revenue'] = grouped['bottles_sold'] * grouped['price_per_bottle']
-        grouped['profit'] = (grouped['price_per_bottle'] - grouped['cost_per_bottle']) * grouped['bottles_sold']
-
-    else:
-        raise ValueError("mode должен быть 'бокал' или 'бутылка'")
-
-    # сортировка
-    df_sorted = grouped.sort_values(by=value_column, ascending=False).reset_index(drop=True)
-
-    # накопленные значения
-    df_sorted['cumulative_value'] = df_sorted[value_column].cumsum()
-    df_sorted['cumulative_percentage'] = (df_sorted['cumulative_value'] /
-                                          df_sorted[value_column].sum()) * 100
-    df_sorted['value_percentage'] = (df_sorted[value_column] /
-                                     df_sorted[value_column].sum()) * 100
-
-    # классификация
-    def classify_abc(cumulative_percentage):
-        if cumulative_percentage <= 80:
-            return 'A'
-        elif cumulative_percentage <= 95:
-            return 'B'
-        else:
-            return 'C'
-
-    df_sorted['ABC_category'] = df_sorted['cumulative_percentage'].apply(classify_abc)
+    df_sorted = classify_abc(aggregate_abc(df, mode), value_column)
 
     # если нужно сохранить
     if save_to_excel:
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.abc_analys import ABC_COLUMNS, ABC_SUM_COLUMNS, _add_float_columns, \
+    add_cumulative_columns, aggregate_abc
+
+
+class IncrementalABC:
+    """
+    ABC-анализ, который обновляется дневными (или внутридневными) порциями продаж
+    без повторной группировки и сортировки всей истории.
+
+    Хранит по каждой позиции накопленные целые суммы (как aggregate_abc) и порядок
+    позиций по убыванию значения (при равенстве — по article_name, как classify_abc).
+    Новая порция продаж меняет суммы только затронутых позиций; они вынимаются
+    из порядка и вставляются обратно двоичным поиском. Накопленные доли и классы
+    затем считаются одним проходом по целым числам, поэтому result() совпадает
+    с classify_abc(aggregate_abc(все продажи)) строка в строку — если порции
+    идут по времени (каждая позже предыдущих), как новые выгрузки продаж.
+
+        abc = IncrementalABC.from_aggregate(aggregate_abc(history), 'бокал')
+        abc.apply_sales(sales_of_the_day)   # -> позиции, сменившие класс
+        table = abc.result()                # как classify_abc
+        stored = abc.aggregate()            # как aggregate_abc (для abc_*.parquet)
+    """
+
+    def __init__(self, mode='бокал', value_column='revenue'):
+        if mode not in ABC_COLUMNS:
+            raise ValueError("mode должен быть 'бокал' или 'бутылка'")
+        self.mode = mode
+        self.value_column = value_column
+        self.exact_column = f'{value_column}_kop'
+        self._table = None                         # агрегат по позициям (строка = позиция)
+        self._rows = {}                            # article_name -> номер строки в _table
+        self._order = np.empty(0, dtype='int64')   # номера строк в порядке ABC
+        self._classes = np.empty(0, dtype=object)  # класс каждой строки _table
+        self._result = None
+
+    @classmethod
+    def from_sales(cls, df, mode='бокал', value_column='revenue'):
+        abc = cls(mode, value_column)
+        abc.apply_sales(df)
+        return abc
+
+    @classmethod
+    def from_aggregate(cls, aggregate, mode='бокал', value_column='revenue'):
+        """Начальное состояние из готового агрегата aggregate_abc (например, abc_*.parquet заведения)."""
+        abc = cls(mode, value_column)
+        abc.apply_delta(aggregate)
+        return abc
+
+    def __len__(self):
+        return len(self._rows)
+
+    def apply_sales(self, df) -> pd.DataFrame:
+        """Добавляет продажи (строки после process_wine_sales). Возвращает сменившие класс позиции."""
+        return self.apply_delta(aggregate_abc(df, self.mode))
+
+    def apply_delta(self, delta) -> pd.DataFrame:
+        """
+        Добавляет агрегат aggregate_abc по новой порции продаж.
+
+        Количество, выручка и прибыль складываются (они посчитаны по строкам продаж).
+        Цена и себестоимость единицы у известных позиций берутся из порции — она
+        позже прежних продаж (как 'last' по времени в aggregate_abc), категории остаются
+        прежние (как 'first'). Возвращает таблицу article_name, old_class, new_class
+        для позиций, у которых поменялся класс (новые позиции — с old_class = None).
+        """
+        if delta.empty:
+            return self._changes(self._classes)
+
+        known = delta['article_name'].map(self._rows)
+        is_new = known.isna().to_numpy()
+
+        old_classes = self._classes.copy()
+        touched = []
+
+        if (~is_new).any():
+            rows = known[~is_new].astype('int64').to_numpy()
+            update = delta.loc[~is_new]
+            for col in ABC_SUM_COLUMNS:
+                column = self._table[col].to_numpy(dtype='int64').copy()
+                np.add.at(column, rows, update[col].to_numpy(dtype='int64'))
+                self._table[col] = column
+            for col in ('price_kop', 'cost_kop'):
+                column = self._table[col].to_numpy(dtype='int64').copy()
+                column[rows] = update[col].to_numpy(dtype='int64')
+                self._table[col] = column
+            touched.append(rows)
+
+        if is_new.any():
+            start = 0 if self._table is None else len(self._table)
+            new_rows = delta.loc[is_new].reset_index(drop=True)
+            new_rows.index = new_rows.index + start
+            self._table = new_rows if self._table is None else pd.concat([self._table, new_rows[self._table.columns]])
+            for offset, name in enumerate(new_rows['article_name']):
+                self._rows[name] = start + offset
+            touched.append(np.arange(start, start + len(new_rows)))
+            self._classes = np.concatenate([self._classes, np.full(len(new_rows), None, dtype=object)])
+            old_classes = np.concatenate([old_classes, np.full(len(new_rows), None, dtype=object)])
+
+        touched = np.unique(np.concatenate(touched))
+        self._reposition(touched)
+        self._result = self._classify()
+        self._classes[self._order] = self._result['ABC_category'].to_numpy()
+        return self._changes(old_classes)
+
+    def _reposition(self, touched: np.ndarray):
+        """Вынимает затронутые позиции из порядка и вставляет их на новые места двоичным поиском."""
+        values = self._table[self.exact_column].to_numpy()
+        names = self._table['article_name'].to_numpy(dtype=object)
+
+        keep = self._order[~np.isin(self._order, touched)]
+        keys = -values[keep]              # порядок: по возрастанию -value, затем по имени
+        moved = sorted(touched, key=lambda r: (-values[r], names[r]))
+
+        positions = []
+        for row in moved:
+            lo = np.searchsorted(keys, -values[row], side='left')
+            hi = np.searchsorted(keys, -values[row], side='right')
+            positions.append(lo + np.searchsorted(names[keep[lo:hi]], names[row]))
+        self._order = np.insert(keep, positions, moved).astype('int64')
+
+    def _changes(self, old_classes: np.ndarray) -> pd.DataFrame:
+        changed = np.flatnonzero(old_classes != self._classes)
+        names = np.empty(0, dtype=object) if self._table is None else self._table['article_name'].to_numpy()
+        return pd.DataFrame({
+            'article_name': names[changed],
+            'old_class': old_classes[changed],
+            'new_class': self._classes[changed],
+        })
+
+    def result(self) -> pd.DataFrame:
+        """Таблица как у classify_abc: позиции в порядке ABC, доли и классы."""
+        if self._result is None:
+            raise ValueError("Нет данных: сначала apply_sales / apply_delta")
+        return self._result
+
+    def aggregate(self) -> pd.DataFrame:
+        """Текущий агрегат в виде aggregate_abc (строки — по article_name)."""
+        if self._table is None:
+            raise ValueError("Нет данных: сначала apply_sales / apply_delta")
+        table = self._table.sort_values('article_name', kind='stable').reset_index(drop=True)
+        return _add_float_columns(table, self.mode)
+
+    def _classify(self) -> pd.DataFrame:
+        df_sorted = self._table.iloc[self._order].reset_index(drop=True)
+        df_sorted = _add_float_columns(df_sorted, self.mode)
+        return add_cumulative_columns(df_sorted, self.value_column)
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# Длина символьных n-грамм для сравнения названий
+NGRAM = 3
+
+# Пороги сходства (косинус по n-граммам с весами idf):
+# не ниже AUTO_SCORE и с отрывом AUTO_MARGIN от второго кандидата — подставляется сам,
+# не ниже REVIEW_SCORE — попадает в таблицу на проверку, ниже — «не найдено»
+AUTO_SCORE = 0.85
+AUTO_MARGIN = 0.1
+REVIEW_SCORE = 0.5
+
+# n-граммы, которые есть больше чем в этой доле названий каталога («вино», « кр»…),
+# не порождают кандидатов — на оценку это почти не влияет (вес idf у них маленький)
+MAX_GRAM_SHARE = 0.2
+
+MAPPING_COLUMNS = ['dish', 'dish_example', 'rows', 'final_sum', 'article', 'article_name', 'score',
+                   'runner_up', 'runner_up_score', 'status']
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """Нижний регистр, ё -> е, знаки препинания и повторные пробелы — в один пробел."""
+    # не \W: у строк pandas на pyarrow он знает только латиницу и съедает кириллицу
+    return (names.fillna('').astype(str).str.lower()
+            .str.replace('ё', 'е', regex=False)
+            .str.replace(r'[^0-9a-zа-я]+', ' ', regex=True)
+            .str.strip())
+
+
+def name_ngrams(names: pd.Series, n: int = NGRAM) -> pd.DataFrame:
+    """
+    Уникальные символьные n-граммы каждого названия: колонки id (индекс names), gram.
+    Цикл — по позиции в строке (десятки шагов), каждый шаг — срез сразу всех названий.
+    """
+    padded = ' ' + names + ' '
+    lengths = padded.str.len().to_numpy()
+    parts = []
+    for start in range(int(lengths.max(initial=0)) - n + 1):
+        alive = lengths >= start + n
+        parts.append(pd.DataFrame({'id': padded.index[alive],
+                                   'gram': padded[alive].str.slice(start, start + n).to_numpy()}))
+    if not parts:
+        return pd.DataFrame({'id': pd.Series(dtype=names.index.dtype), 'gram': pd.Series(dtype=object)})
+    return pd.concat(parts, ignore_index=True).drop_duplicates()
+
+
+def _norms(grams: pd.DataFrame) -> pd.Series:
+    return np.sqrt(grams.groupby('id')['w2'].sum())
+
+
+def similarity_top(queries: pd.Series, catalog: pd.Series, top: int = 2) -> pd.DataFrame:
+    """
+    Лучшие кандидаты каталога для каждого запроса: колонки query, candidate (индексы),
+    score, rank (0 — лучший).
+
+    Сходство — косинус векторов n-грамм с весами idf по каталогу. Разреженное
+    «умножение матриц» делается соединением по n-грамме и суммой по паре
+    (запрос, кандидат), без попарного цикла по названиям.
+    """
+    q_grams = name_ngrams(queries)
+    c_grams = name_ngrams(catalog)
+    n_catalog = max(len(catalog), 1)
+
+    doc_freq = c_grams.groupby('gram')['id'].size()
+    idf = np.log((1 + n_catalog) / (1 + doc_freq)) + 1
+    unseen = np.log(1 + n_catalog) + 1
+    c_grams = c_grams.assign(w2=c_grams['gram'].map(idf) ** 2)
+    q_grams = q_grams.assign(w2=q_grams['gram'].map(idf).fillna(unseen) ** 2)
+
+    frequent = doc_freq.index[doc_freq > max(MAX_GRAM_SHARE * n_catalog, 5)]
+    shared = q_grams.loc[~q_grams['gram'].isin(frequent)].merge(c_grams[['id', 'gram']], on='gram',
+                                                                suffixes=('_q', '_c'))
+    if shared.empty:
+        return pd.DataFrame(columns=['query', 'candidate', 'score', 'rank'])
+
+    dot = shared.groupby(['id_q', 'id_c'])['w2'].sum().reset_index()
+    dot['score'] = dot['w2'] / (dot['id_q'].map(_norms(q_grams)) * dot['id_c'].map(_norms(c_grams)))
+    dot = dot.sort_values(['id_q', 'score'], ascending=[True, False], kind='stable')
+    dot['rank'] = dot.groupby('id_q').cumcount()
+    dot = dot.loc[dot['rank'] < top]
+    return dot.rename(columns={'id_q': 'query', 'id_c': 'candidate'})[['query', 'candidate', 'score', 'rank']]
+
+
+def match_unmatched(dish_df: pd.DataFrame, article_df: pd.DataFrame, known_articles=()) -> pd.DataFrame:
+    """
+    Таблица сопоставления для строк продаж, чей код блюда не найден в каталоге:
+    по одному ряду на нормализованное название блюда (dish), с лучшим артикулом
+    каталога, оценкой, вторым кандидатом и статусом auto / review / none.
+    rows и final_sum — сколько продаж стоит за названием (что проверять первым).
+
+    known_articles — все коды полного каталога (кухня, бар…): строки с таким кодом —
+    известные не винные позиции, их с винами не сопоставляем. Кандидаты — строки
+    без кода или с кодом, которого нет ни в одном разделе каталога.
+    """
+    catalog = article_df.drop_duplicates('article', keep='last')[['article', 'article_name']].reset_index(drop=True)
+    if 'dish' not in dish_df.columns:
+        return pd.DataFrame(columns=MAPPING_COLUMNS)
+
+    known = dish_df['article'].isin(catalog['article']) | dish_df['article'].isin(pd.Series(list(known_articles)))
+    lost = dish_df.loc[~known]
+    lost = lost.assign(dish_norm=normalize_names(lost['dish']))
+    lost = lost.loc[lost['dish_norm'] != '']
+    names = lost.groupby('dish_norm', sort=True).agg(dish_example=('dish', 'first'), rows=('dish', 'size'),
+                                                     final_sum=('final_sum', 'sum')).reset_index()
+    names = names.rename(columns={'dish_norm': 'dish'})
+
+    top = similarity_top(names['dish'], normalize_names(catalog['article_name']))
+    best = top.loc[top['rank'] == 0].set_index('query')
+    second = top.loc[top['rank'] == 1].set_index('query')
+
+    mapping = names.assign(
+        article=best['candidate'].reindex(names.index).map(catalog['article']),
+        article_name=best['candidate'].reindex(names.index).map(catalog['article_name']),
+        score=best['score'].reindex(names.index).fillna(0.0),
+        runner_up=second['candidate'].reindex(names.index).map(catalog['article_name']),
+        runner_up_score=second['score'].reindex(names.index).fillna(0.0),
+    )
+    auto = (mapping['score'] >= AUTO_SCORE) & (mapping['score'] - mapping['runner_up_score'] >= AUTO_MARGIN)
+    mapping['status'] = np.select([auto, mapping['score'] >= REVIEW_SCORE], ['auto', 'review'], 'none')
+    return mapping.sort_values('final_sum', ascending=False, kind='stable')[MAPPING_COLUMNS].reset_index(drop=True)
+
+
+def apply_mapping(dish_df: pd.DataFrame, mapping: pd.DataFrame, catalog_articles,
+                  reviewed: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Подставляет артикул строкам продаж, чей код не найден в каталоге, по названию блюда.
+
+    Берутся сопоставления со статусом auto. reviewed — проверенная вручную таблица
+    того же вида (dish, article, status): её строки важнее автоматических,
+    подставляются со статусом auto или approved, любой другой статус — «не сопоставлять».
+    """
+    if 'dish' not in dish_df.columns:
+        return dish_df
+    pairs = mapping.loc[mapping['status'] == 'auto', ['dish', 'article']]
+    if reviewed is not None and not reviewed.empty:
+        # артикулы проверенной таблицы — текст (ведущие нули); приводим к кодам каталога
+        catalog_codes = pd.Series(catalog_articles).drop_duplicates()
+        by_text = pd.Series(catalog_codes.to_numpy(), index=catalog_codes.astype(str).str.lower())
+        by_text = by_text[~by_text.index.duplicated()]
+        reviewed = reviewed.assign(dish=normalize_names(reviewed['dish']),
+                                   article=reviewed['article'].str.strip().str.lower().map(by_text))
+        accepted = reviewed.loc[reviewed['status'].isin(['auto', 'approved']), ['dish', 'article']].dropna()
+        pairs = pd.concat([pairs.loc[~pairs['dish'].isin(reviewed['dish'])], accepted])
+    if pairs.empty:
+        return dish_df
+
+    lost = ~dish_df['article'].isin(catalog_articles)
+    found = normalize_names(dish_df.loc[lost, 'dish']).map(pairs.drop_duplicates('dish', keep='last')
+                                                           .set_index('dish')['article'])
+    found = found.dropna()
+    dish_df = dish_df.copy()
+    dish_df.loc[found.index, 'article'] = found.to_numpy()
+    return dish_df
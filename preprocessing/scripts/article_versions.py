@@ -0,0 +1,106 @@
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Поля каталога, изменение которых порождает новую версию артикула
+VERSIONED_COLUMNS = ['article_name', 'article_category', 'only_glass_cat',
+                     'article_price_kop', 'article_profit_kop']
+
+# Дата в имени выгрузки каталога: «Блюда артикулы 2025-06-23.xlsx» или «… 23.06.2025.xlsx»
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_RU_DATE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+
+
+def catalog_valid_from(path) -> pd.Timestamp:
+    """С какого дня действует выгрузка каталога: дата из имени файла, иначе дата изменения файла."""
+    path = Path(path)
+    if m := _ISO_DATE.search(path.stem):
+        return pd.Timestamp(int(m[1]), int(m[2]), int(m[3]))
+    if m := _RU_DATE.search(path.stem):
+        return pd.Timestamp(int(m[3]), int(m[2]), int(m[1]))
+    return pd.Timestamp(datetime.fromtimestamp(path.stat().st_mtime).date())
+
+
+def append_catalog_version(versions: pd.DataFrame | None, article_df: pd.DataFrame,
+                           valid_from, source: str = '') -> pd.DataFrame:
+    """
+    Добавляет выгрузку каталога как новую версию.
+
+    В версии попадают только артикулы, у которых что-то из VERSIONED_COLUMNS
+    изменилось относительно действовавшей на valid_from версии (или новые),
+    поэтому повторная загрузка того же каталога ничего не добавляет.
+    Старые строки не меняются — версия только дописывается.
+    """
+    valid_from = pd.Timestamp(valid_from).normalize()
+    snapshot = article_df.drop_duplicates('article').assign(valid_from=valid_from, source=source)
+    if versions is None or versions.empty:
+        return snapshot.reset_index(drop=True)
+
+    current = versions.loc[versions['valid_from'] <= valid_from] \
+        .sort_values('valid_from').drop_duplicates('article', keep='last')
+    compared = snapshot.merge(current[['article', *VERSIONED_COLUMNS]], on='article', how='left',
+                              suffixes=('', '_prev'), indicator=True)
+    changed = compared['_merge'] == 'left_only'
+    for col in VERSIONED_COLUMNS:
+        changed |= compared[col] != compared[f'{col}_prev']
+    new_rows = snapshot.loc[changed.to_numpy()]
+    # та же дата и тот же артикул — новая выгрузка заменяет строку этой даты
+    versions = versions.loc[~((versions['valid_from'] == valid_from) & versions['article'].isin(new_rows['article']))]
+    return pd.concat([versions, new_rows], ignore_index=True)
+
+
+def build_article_versions(catalogs) -> pd.DataFrame:
+    """Версии каталога из последовательных выгрузок: catalogs — [(valid_from, article_df, source), ...]."""
+    versions = None
+    for valid_from, article_df, source in sorted(catalogs, key=lambda c: c[0]):
+        versions = append_catalog_version(versions, article_df, valid_from, source)
+    return add_valid_to(versions)
+
+
+def add_valid_to(versions: pd.DataFrame) -> pd.DataFrame:
+    """valid_to — начало следующей версии того же артикула (NaT у действующей)."""
+    versions = versions.sort_values(['article', 'valid_from'], kind='stable').reset_index(drop=True)
+    next_from = versions.groupby('article')['valid_from'].shift(-1)
+    versions['valid_to'] = next_from
+    return versions
+
+
+def asof_join(dish_df: pd.DataFrame, versions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Присоединяет к каждой продаже версию артикула, действовавшую на open_time
+    (pd.merge_asof по артикулу, одним векторным проходом).
+
+    Продажи раньше первой версии получают первую версию (старше каталога нет),
+    продажи без open_time — действующую. Как и обычный right-merge в
+    merge_and_select, артикулы каталога без продаж остаются строками без продаж.
+    Результат идёт по open_time (продажи без времени и артикулы без продаж — в конце),
+    поэтому последняя строка позиции несёт действующую версию.
+    """
+    versions = versions.assign(valid_from=versions['valid_from'].astype('datetime64[ns]')) \
+        .sort_values('valid_from', kind='stable')
+    first = versions.drop_duplicates('article', keep='first')
+    latest = versions.drop_duplicates('article', keep='last')
+    catalog_cols = [c for c in versions.columns if c not in ('valid_from', 'valid_to', 'source')]
+
+    dish = dish_df.loc[dish_df['article'].isin(versions['article'])]
+    # коды без пропусков — того же типа, что в каталоге (merge_asof сравнивает by строго)
+    dish = dish.assign(article=dish['article'].astype(versions['article'].dtype))
+    timed = dish.loc[dish['open_time'].notna()]
+    timed = timed.assign(open_time=timed['open_time'].astype('datetime64[ns]')).sort_values('open_time', kind='stable')
+    untimed = dish.loc[dish['open_time'].isna()]
+
+    matched = pd.merge_asof(timed, versions[catalog_cols + ['valid_from']], left_on='open_time',
+                            right_on='valid_from', by='article', direction='backward')
+    early = matched['valid_from'].isna().to_numpy()
+    if early.any():
+        fill = matched.loc[early, dish.columns].merge(first[catalog_cols], on='article', how='left')
+        matched = pd.concat([matched.loc[~early], fill], ignore_index=True)
+    parts = [matched.drop(columns='valid_from'), untimed.merge(latest[catalog_cols], on='article', how='left')]
+
+    unsold = latest.loc[~latest['article'].isin(dish['article']), catalog_cols]
+    parts.append(unsold)
+    # ранние продажи (первая версия) дописаны после остальных — возвращаем хронологию
+    return pd.concat(parts, ignore_index=True) \
+        .sort_values('open_time', kind='stable', na_position='last').reset_index(drop=True)
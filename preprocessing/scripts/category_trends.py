@@ -0,0 +1,43 @@
+import pandas as pd
+
+from preprocessing.scripts.exact_units import MILLI, KOPECKS
+
+# Метрики трендов: колонка -> (точная целая колонка, делитель, подпись)
+TREND_METRICS = {
+    'final_sum': ('final_sum_kop', KOPECKS, 'Сумма продаж'),
+    'quantity': ('quantity_milli', MILLI, 'Количество'),
+    'profit': ('profit_kop', KOPECKS, 'Прибыль'),
+}
+
+# Категории бокалов на графиках 2×2 (страницы 05, 06)
+TREND_CATEGORIES = ['белые_вина', 'дижестивы_оранжи', 'игристые', 'красные_вина']
+
+
+def category_month_trends(daily: pd.DataFrame, glass: str = 'бокал',
+                          category_col: str = 'only_glass_cat') -> pd.DataFrame:
+    """
+    Агрегаты категория × год-месяц сразу по всем метрикам TREND_METRICS.
+
+    На входе — дневной агрегат (venue_aggregates.aggregate_daily_sales).
+    Месяцы разных лет не склеиваются; у каждой категории полная ось месяцев
+    от первого до последнего, пропуски = 0. Суммы считаются в целых.
+    """
+    rows = daily.loc[(daily['glass'] == glass) & daily['open_time'].notna()]
+    exact = [spec[0] for spec in TREND_METRICS.values()]
+    grouped = rows.assign(month=rows['open_time'].dt.to_period('M')) \
+        .groupby([category_col, 'month'], observed=True)[exact].sum()
+
+    if grouped.empty:
+        return pd.DataFrame(columns=['category', 'month', *TREND_METRICS])
+
+    categories = grouped.index.get_level_values(0).unique()
+    months = grouped.index.get_level_values(1)
+    full = pd.MultiIndex.from_product(
+        [categories, pd.period_range(months.min(), months.max(), freq='M')],
+        names=['category', 'month'],
+    )
+    grouped.index = grouped.index.set_names(['category', 'month'])
+    trends = grouped.reindex(full, fill_value=0).reset_index()
+    for metric, (exact_col, scale, _) in TREND_METRICS.items():
+        trends[metric] = trends.pop(exact_col) / scale
+    return trends
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+# Количество храним в целых тысячных долях (милли-единицах):
+# 1 бутылка = 1000, бокал 150 мл = 0.2 бутылки = 200.
+MILLI = 1000
+GLASS_MILLI = 200
+GLASSES_PER_BOTTLE = MILLI // GLASS_MILLI
+
+# Деньги храним в целых копейках
+KOPECKS = 100
+
+
+def _to_int_units(values, scale: int) -> pd.Series:
+    numbers = pd.to_numeric(values, errors='coerce').fillna(0)
+    return pd.Series(np.rint(numbers.to_numpy(dtype='float64') * scale).astype('int64'), index=numbers.index)
+
+
+def to_milli(values) -> pd.Series:
+    """Количество -> целые милли-единицы (0.6 -> 600)."""
+    return _to_int_units(values, MILLI)
+
+
+def to_kopecks(values) -> pd.Series:
+    """Рубли -> целые копейки (1234.5 -> 123450)."""
+    return _to_int_units(values, KOPECKS)
+
+
+def div_round(numerator, denominator: int):
+    """Целочисленное деление с округлением к ближайшему."""
+    return (np.asarray(numerator, dtype='int64') + denominator // 2) // denominator
+
+
+def milli_times_kopecks(quantity_milli, price_kop):
+    """Сумма в копейках за количество в милли-единицах по цене за единицу в копейках."""
+    return div_round(np.asarray(quantity_milli, dtype='int64') * np.asarray(price_kop, dtype='int64'), MILLI)
@@ -0,0 +1,159 @@
+import io
+import os
+import re
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+# Форматы выгрузки: расширение файла и MIME для download_button
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.zip', 'application/zip'),
+    'parquet': ('.zip', 'application/zip'),
+    'html': ('.html', 'text/html'),
+}
+
+# Строк за одну порцию при потоковой записи листа
+WRITE_CHUNK_ROWS = 50_000
+
+# Excel: имя листа ≤ 31 символа и без []:*?/\
+_SHEET_NAME_BAD = re.compile(r'[\[\]:*?/\\]')
+
+
+def sheet_name(name: str, used: set) -> str:
+    """Допустимое и уникальное имя листа (Excel) или файла внутри архива."""
+    base = _SHEET_NAME_BAD.sub('_', str(name)).strip() or 'sheet'
+    base = base[:31]
+    candidate, n = base, 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f'~{n}'
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def _plain_column(series: pd.Series) -> pd.Series:
+    """Периоды, списки и прочие объекты — в строки; числа и даты остаются как есть."""
+    if isinstance(series.dtype, pd.PeriodDtype):
+        return series.astype(str)
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_localize(None)
+    if series.dtype == object:
+        return series.map(lambda v: v if v is None or isinstance(v, (str, int, float)) else str(v))
+    return series
+
+
+def plain_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Таблица из простых типов (для xlsx/csv/parquet без object-колонок со списками)."""
+    return pd.DataFrame({col: _plain_column(df[col]) for col in df.columns})
+
+
+def _cell(value):
+    """Значение ячейки xlsx: пропуски (None, NaT, NA, NaN) — пустая ячейка, а не #NUM!."""
+    if value is None or value is pd.NaT or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+def _write_xlsx(sheets: dict, path: str):
+    """
+    Все листы — в одну книгу за один проход. xlsxwriter в режиме constant_memory
+    сбрасывает каждую строку на диск сразу после записи, поэтому память не растёт
+    с размером книги (строки пишутся строго по порядку).
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True,
+                                          'default_date_format': 'yyyy-mm-dd'})
+    used = set()
+    try:
+        for name, df in sheets.items():
+            ws = workbook.add_worksheet(sheet_name(name, used))
+            ws.write_row(0, 0, [str(c) for c in df.columns])
+            row = 1
+            for start in range(0, len(df), WRITE_CHUNK_ROWS):
+                chunk = plain_frame(df.iloc[start:start + WRITE_CHUNK_ROWS])
+                for values in chunk.itertuples(index=False, name=None):
+                    ws.write_row(row, 0, [_cell(v) for v in values])
+                    row += 1
+    finally:
+        workbook.close()
+
+
+def _write_csv_zip(sheets: dict, path: str):
+    """Один CSV на лист в zip; каждый CSV пишется порциями прямо в архив."""
+    used = set()
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, df in sheets.items():
+            with zf.open(f'{sheet_name(name, used)}.csv', 'w') as raw, \
+                    io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as out:
+                for start in range(0, max(len(df), 1), WRITE_CHUNK_ROWS):
+                    chunk = plain_frame(df.iloc[start:start + WRITE_CHUNK_ROWS])
+                    chunk.to_csv(out, index=False, header=start == 0)
+
+
+def _write_parquet_zip(sheets: dict, path: str, tmp_dir: str):
+    """Один Parquet на лист в zip; каждый лист — через временный файл, не через память."""
+    used = set()
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for name, df in sheets.items():
+            fd, tmp = tempfile.mkstemp(suffix='.parquet', dir=tmp_dir)
+            os.close(fd)
+            try:
+                plain_frame(df).to_parquet(tmp, index=False)
+                zf.write(tmp, f'{sheet_name(name, used)}.parquet')
+            finally:
+                os.remove(tmp)
+
+
+def write_report_bundle(sheets: dict, path, fmt: str = 'xlsx') -> str:
+    """
+    Пишет набор таблиц {имя листа: DataFrame} в один файл на диске.
+
+    fmt: 'xlsx' — одна книга, по листу на таблицу;
+         'csv' / 'parquet' — zip, по файлу на таблицу;
+         'html' — автономная страница для телефона (html_bundle.py).
+    Файл сначала пишется во временный рядом и затем атомарно переименовывается,
+    поэтому недописанная выгрузка не появляется под итоговым именем.
+    Возвращает путь к файлу.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"fmt должен быть одним из: {', '.join(EXPORT_FORMATS)}")
+
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix='.part', dir=directory)
+    os.close(fd)
+    try:
+        if fmt == 'xlsx':
+            _write_xlsx(sheets, tmp)
+        elif fmt == 'csv':
+            _write_csv_zip(sheets, tmp)
+        elif fmt == 'html':
+            from preprocessing.scripts.html_bundle import write_html_bundle
+            write_html_bundle(sheets, tmp, os.path.splitext(os.path.basename(path))[0])
+        else:
+            _write_parquet_zip(sheets, tmp, directory)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def export_file_name(stem: str, fmt: str) -> str:
+    """Имя файла выгрузки с правильным расширением."""
+    return f'{stem}{EXPORT_FORMATS[fmt][0]}'
+
+
+def wide_month_table(products, periods, values: np.ndarray, product_label: str = 'Товар') -> pd.DataFrame:
+    """Матрица товар × месяц в виде широкой таблицы: товар, итог, по колонке на месяц."""
+    table = pd.DataFrame(values, columns=[p.strftime('%Y-%m') for p in periods])
+    table.insert(0, 'Сумма за период', values.sum(axis=1))
+    table.insert(0, product_label, list(products))
+    return table.sort_values('Сумма за период', ascending=False, kind='stable').reset_index(drop=True)
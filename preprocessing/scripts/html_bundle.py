@@ -0,0 +1,231 @@
+import base64
+import gzip
+import html
+import json
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+from preprocessing.scripts.export_bundle import plain_frame
+
+# Колонки-месяцы широкой таблицы «По месяцам» (wide_month_table): из них рисуются графики
+MONTH_COLUMN = re.compile(r'^\d{4}-\d{2}$')
+
+# Знаков после запятой у чисел во встроенных данных
+ROUND_DIGITS = 2
+
+# Строк таблицы, которые браузер рисует за раз (дальше — кнопка «Показать ещё»)
+PAGE_ROWS = 100
+
+
+def _numbers(series: pd.Series) -> list:
+    values = series.astype('float64').round(ROUND_DIGITS)
+    values = values.where(np.isfinite(values))
+    return [None if v != v else int(v) if v.is_integer() else v for v in values.tolist()]
+
+
+def _texts(series: pd.Series) -> list:
+    if is_datetime64_any_dtype(series):
+        series = series.dt.strftime('%Y-%m-%d')
+    return [None if pd.isna(v) else str(v) for v in series.tolist()]
+
+
+def compact_table(name: str, df: pd.DataFrame) -> dict:
+    """
+    Таблица для встраивания в HTML: по колонкам (columns, kinds 'num' / 'text', data —
+    список значений на колонку), числа округлены до ROUND_DIGITS, NaN/inf — null.
+    months — колонки-месяцы, если это широкая таблица по месяцам.
+    """
+    df = plain_frame(df)
+    kinds, data = [], []
+    for col in df.columns:
+        series = df[col]
+        if is_numeric_dtype(series) and not is_bool_dtype(series):
+            kinds.append('num')
+            data.append(_numbers(series))
+        else:
+            kinds.append('text')
+            data.append(_texts(series))
+    columns = [str(c) for c in df.columns]
+    return {'name': str(name), 'columns': columns, 'kinds': kinds, 'data': data,
+            'months': [c for c in columns if MONTH_COLUMN.match(c)]}
+
+
+def pack_tables(sheets: dict) -> str:
+    """Все таблицы одним JSON, сжатым gzip, в base64 — для вставки в страницу."""
+    payload = {'tables': [compact_table(name, df) for name, df in sheets.items()]}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    return base64.b64encode(gzip.compress(raw, compresslevel=9, mtime=0)).decode('ascii')
+
+
+def write_html_bundle(sheets: dict, path, title: str = 'Отчёт') -> None:
+    """
+    Автономная HTML-страница с таблицами {имя: DataFrame}: данные встроены сжатыми,
+    выбор таблицы, поиск, сортировка по колонке и графики по месяцам — в браузере,
+    без сервера и внешних скриптов (распаковка — DecompressionStream браузера).
+    """
+    page = (_TEMPLATE
+            .replace('__TITLE__', html.escape(title))
+            .replace('__GENERATED__', datetime.now().strftime('%Y-%m-%d %H:%M'))
+            .replace('__PAGE_ROWS__', str(PAGE_ROWS))
+            .replace('__DATA__', pack_tables(sheets)))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+
+_TEMPLATE = '''<!doctype html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+<style>
+body{font:14px/1.4 system-ui,sans-serif;margin:0;color:#222}
+header{position:sticky;top:0;background:#fff;padding:8px;border-bottom:1px solid #ddd;display:flex;flex-wrap:wrap;gap:6px}
+h1{font-size:16px;margin:0;width:100%}
+select,input{font-size:16px;padding:4px;flex:1;min-width:140px}
+main{padding:8px;overflow-x:auto}
+table{border-collapse:collapse;width:100%}
+th,td{padding:4px 6px;border-bottom:1px solid #eee;white-space:nowrap}
+th{cursor:pointer;text-align:left;background:#f6f6f6}
+td.num{text-align:right;font-variant-numeric:tabular-nums}
+svg rect{fill:#8b1e3f}
+#chart svg{width:100%;height:auto}
+button{font-size:16px;margin:8px 0;padding:6px 12px}
+small{color:#777}
+</style>
+</head>
+<body>
+<header>
+<h1>__TITLE__ <small>сформировано __GENERATED__</small></h1>
+<select id="sheet"></select>
+<input id="query" type="search" placeholder="Поиск">
+</header>
+<main>
+<div id="chart"></div>
+<p id="info"></p>
+<table id="table"><thead></thead><tbody></tbody></table>
+<button id="more" hidden>Показать ещё</button>
+</main>
+<script id="data" type="application/octet-stream">__DATA__</script>
+<script>
+(async () => {
+  const PAGE = __PAGE_ROWS__;
+  const $ = id => document.getElementById(id);
+  const number = new Intl.NumberFormat('ru-RU', {maximumFractionDigits: 2});
+  const bytes = Uint8Array.from(atob($('data').textContent.trim()), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+  const report = JSON.parse(await new Response(stream).text());
+
+  let table, visible, rows, shown, sortCol = null, sortDir = 1;
+
+  function bars(values, labels, w, h) {
+    const max = Math.max(...values.map(v => Math.abs(v || 0)), 1e-9);
+    const bw = w / Math.max(values.length, 1);
+    const rects = values.map((v, i) => {
+      const bh = Math.abs(v || 0) / max * h;
+      const tip = labels ? `<title>${labels[i]}: ${number.format(v || 0)}</title>` : '';
+      return `<rect x="${(i * bw).toFixed(1)}" y="${(h - bh).toFixed(1)}" width="${Math.max(bw - 1, 1).toFixed(1)}" height="${bh.toFixed(1)}">${tip}</rect>`;
+    });
+    return `<svg viewBox="0 0 ${w} ${h}" width="${w}" height="${h}">${rects.join('')}</svg>`;
+  }
+
+  function format(c, v) {
+    if (v === null) return '';
+    return table.kinds[c] === 'num' ? number.format(v) : v;
+  }
+
+  function drawChart() {
+    const months = table.months.map(m => table.columns.indexOf(m));
+    if (!months.length) { $('chart').innerHTML = ''; return; }
+    const totals = months.map(c => table.data[c].reduce((s, v) => s + (v || 0), 0));
+    $('chart').innerHTML = `<p>Сумма по месяцам, ${table.months[0]} — ${table.months[table.months.length - 1]}</p>`
+      + bars(totals, table.months, 600, 160);
+  }
+
+  function drawHead() {
+    const tr = document.createElement('tr');
+    for (const c of visible) {
+      const th = document.createElement('th');
+      th.textContent = table.columns[c] + (sortCol === c ? (sortDir > 0 ? ' ▲' : ' ▼') : '');
+      th.onclick = () => {
+        if (sortCol === c) sortDir = -sortDir;
+        else { sortCol = c; sortDir = table.kinds[c] === 'num' ? -1 : 1; }
+        refresh();
+      };
+      tr.append(th);
+    }
+    if (table.months.length) tr.append(Object.assign(document.createElement('th'), {textContent: 'Тренд'}));
+    $('table').tHead.replaceChildren(tr);
+  }
+
+  function more() {
+    const months = table.months.map(m => table.columns.indexOf(m));
+    const frag = document.createDocumentFragment();
+    for (const r of rows.slice(shown, shown + PAGE)) {
+      const tr = document.createElement('tr');
+      for (const c of visible) {
+        const td = document.createElement('td');
+        td.textContent = format(c, table.data[c][r]);
+        if (table.kinds[c] === 'num') td.className = 'num';
+        tr.append(td);
+      }
+      if (months.length) {
+        const td = document.createElement('td');
+        td.innerHTML = bars(months.map(c => table.data[c][r]), null, 120, 24);
+        tr.append(td);
+      }
+      frag.append(tr);
+    }
+    $('table').tBodies[0].append(frag);
+    shown += PAGE;
+    $('more').hidden = shown >= rows.length;
+  }
+
+  function refresh() {
+    const query = $('query').value.trim().toLowerCase();
+    const n = table.data.length ? table.data[0].length : 0;
+    rows = Array.from({length: n}, (_, r) => r);
+    if (query) {
+      const text = visible.filter(c => table.kinds[c] === 'text');
+      rows = rows.filter(r => text.some(c => (table.data[c][r] || '').toLowerCase().includes(query)));
+    }
+    if (sortCol !== null) {
+      const col = table.data[sortCol], num = table.kinds[sortCol] === 'num';
+      rows.sort((a, b) => {
+        const x = col[a], y = col[b];
+        if (x === null) return y === null ? 0 : 1;
+        if (y === null) return -1;
+        return sortDir * (num ? x - y : x.localeCompare(y, 'ru'));
+      });
+    }
+    $('info').textContent = `Строк: ${number.format(rows.length)}`;
+    $('table').tBodies[0].replaceChildren();
+    shown = 0;
+    drawHead();
+    more();
+  }
+
+  function select(i) {
+    table = report.tables[i];
+    // колонки-месяцы не показываем по отдельности — они в столбиках «Тренд»
+    visible = table.columns.map((_, c) => c).filter(c => !table.months.includes(table.columns[c]));
+    sortCol = null;
+    $('query').value = '';
+    drawChart();
+    refresh();
+  }
+
+  report.tables.forEach((t, i) => $('sheet').add(new Option(t.name, i)));
+  $('sheet').onchange = e => select(+e.target.value);
+  $('query').oninput = refresh;
+  $('more').onclick = more;
+  if (report.tables.length) select(0);
+})();
+</script>
+</body>
+</html>
+'''
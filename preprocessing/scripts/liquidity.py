@@ -0,0 +1,178 @@
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.order_metrics import GLASS_SECTION
+
+# Пороги ABC / XYZ по умолчанию
+ABC_A = 0.80
+ABC_B = 0.95
+XYZ_X = 0.35
+XYZ_Y = 0.80
+
+# Колонки итоговой таблицы по категории
+LIQUIDITY_COLUMNS = [
+    "name", "total_revenue", "profit", "margin_pct",
+    "weeks_sold", "coverage", "last_sold",
+    "cv", "ABC", "XYZ", "rev_share", "cum_share"
+]
+
+
+def _no_step(progress: float, message: str) -> None:
+    pass
+
+
+def abc_buckets(cum_share, a=ABC_A, b=ABC_B):
+    """A до a, B до b накопленной доли, иначе C."""
+    cum_share = np.asarray(cum_share, dtype="float64")
+    return np.select([cum_share <= a, cum_share <= b], ["A", "B"], default="C")
+
+
+def xyz_buckets(cv, x_thr=XYZ_X, y_thr=XYZ_Y):
+    """X при CV ≤ x_thr, Y при CV ≤ y_thr, иначе (и для NaN/inf) Z."""
+    cv = np.asarray(cv, dtype="float64")
+    finite = np.isfinite(cv)
+    return np.select([finite & (cv <= x_thr), finite & (cv <= y_thr)], ["X", "Y"], default="Z")
+
+
+def liquidity_rows(sales: pd.DataFrame, after, kind: str | None = None, time_col: str = "open_time",
+                   glass_category: str = GLASS_SECTION) -> pd.DataFrame:
+    """
+    Строки для отчётов ликвидности — один фильтр для страниц 07/08, выгрузки и API.
+
+    after — дата: остаются продажи с начала этого дня (>=, поэтому в дневном агрегате,
+    где open_time — сам день, день отсечения не пропадает). kind: 'бокал' — раздел
+    каталога вин по бокалам (article_category == glass_category, как на странице 08),
+    'бутылка' — остальные позиции, None — все.
+    """
+    mask = pd.to_datetime(sales[time_col], errors="coerce") >= pd.Timestamp(after)
+    if kind is not None:
+        glass = sales["article_category"] == glass_category
+        mask &= glass if kind == "бокал" else ~glass
+    return sales.loc[mask]
+
+
+def prepare_liquidity_input(sales: pd.DataFrame, category_col: str = "only_glass_cat") -> pd.DataFrame:
+    """
+    Приводит продажи (строки после process_wine_sales или дневные агрегаты)
+    к входу liquidity_report: open_time, week, name, category, total_revenue, profit.
+    Выручка и прибыль — как на страницах 07/08: total_revenue = Σ(glass_price × quantity),
+    profit = Σ(glass_profit × quantity); в дневном агрегате эти суммы уже посчитаны
+    точно — колонки revenue и cost (Σ glass_profit × quantity).
+    """
+    df = pd.DataFrame({
+        "open_time": pd.to_datetime(sales["open_time"], errors="coerce"),
+        "name": sales["article_name"].astype(str),
+        "category": sales[category_col].astype(str),
+    })
+    if "revenue" in sales.columns:
+        df["total_revenue"] = sales["revenue"].to_numpy()
+        df["profit"] = sales["cost"].to_numpy()
+    else:
+        qty = pd.to_numeric(sales["quantity"], errors="coerce").fillna(0.0)
+        df["total_revenue"] = pd.to_numeric(sales["glass_price"], errors="coerce").fillna(0.0) * qty
+        df["profit"] = pd.to_numeric(sales["glass_profit"], errors="coerce").fillna(0.0) * qty
+    df = df.dropna(subset=["open_time"])
+    df["week"] = df["open_time"].dt.to_period("W")
+    return df
+
+
+def liquidity_report(df: pd.DataFrame, abc_a=ABC_A, abc_b=ABC_B, xyz_x=XYZ_X, xyz_y=XYZ_Y,
+                     category_col: str = "category", main_category_col: str = "main_category",
+                     period_col: str = "week", step: Callable[[float, str], None] = _no_step) -> pd.DataFrame:
+    """
+    Отчёт по ликвидности: недельные суммы по позиции, CV и coverage, ABC по выручке,
+    XYZ по недельному CV. Сортировка: ABC (A→B→C), затем XYZ (X→Y→Z), затем по выручке.
+
+    df — колонки name, <period_col>, <category_col>, total_revenue, profit.
+    step(доля, что_дальше) вызывается перед каждым тяжёлым шагом (прогресс и отмена
+    фонового расчёта, см. utils/background.py).
+    """
+    step(0.0, "недельные суммы")
+    # недельные суммы по позиции (name)
+    weekly = df.groupby(["name", period_col], as_index=False)[["total_revenue", "profit"]].sum()
+
+    # Базовые метрики по позиции (на основе недельных сумм)
+    stats = weekly.groupby("name").agg(
+        total_revenue=("total_revenue", "sum"),
+        profit=("profit", "sum"),
+        mean_rev=("total_revenue", "mean"),
+        std_rev=("total_revenue", "std"),
+        weeks_sold=(period_col, "count"),
+        last_sold=(period_col, "max"),
+    ).reset_index()
+
+    step(0.4, "основная категория позиции")
+    # Недельный CV и coverage
+    stats["cv"] = stats["std_rev"] / stats["mean_rev"]
+    stats.loc[~np.isfinite(stats["cv"]), "cv"] = np.nan
+    total_weeks = weekly[period_col].nunique()
+    stats["coverage"] = stats["weeks_sold"] / (total_weeks if total_weeks else 1)
+
+    # Маржа, %
+    stats["margin_pct"] = np.where(
+        stats["total_revenue"] > 0,
+        stats["profit"] / stats["total_revenue"] * 100,
+        np.nan
+    )
+
+    # Основная категория позиции (категория с максимальной выручкой у этой позиции)
+    cat_map = (
+        df.groupby(["name", category_col], as_index=False)["total_revenue"].sum()
+          .sort_values(["name", "total_revenue"], ascending=[True, False])
+          .drop_duplicates("name")[["name", category_col]]
+          .rename(columns={category_col: main_category_col})
+    )
+    stats = stats.merge(cat_map, on="name", how="left")
+
+    step(0.6, "ABC и XYZ")
+
+    # ABC (по total_revenue, по всем позициям входа)
+    by_item = stats[["name", "total_revenue"]].sort_values("total_revenue", ascending=False).reset_index(drop=True)
+    sum_revenue = by_item["total_revenue"].sum()
+    by_item["rev_share"] = np.where(sum_revenue > 0, by_item["total_revenue"] / sum_revenue, 0.0)
+    by_item["cum_share"] = by_item["rev_share"].cumsum()
+    by_item["ABC"] = abc_buckets(by_item["cum_share"], abc_a, abc_b)
+
+    # XYZ (метка по недельному CV; numeric cv в отчёте — stats["cv"])
+    stats["XYZ"] = xyz_buckets(stats["std_rev"] / stats["mean_rev"], xyz_x, xyz_y)
+
+    report = stats.merge(by_item[["name", "rev_share", "cum_share", "ABC"]], on="name", how="left")
+
+    # Сортировка: ABC (A→B→C), затем XYZ (X→Y→Z), затем по выручке
+    order_abc = {"A": 0, "B": 1, "C": 2}
+    order_xyz = {"X": 0, "Y": 1, "Z": 2}
+    report["abc_ord"] = report["ABC"].map(order_abc).fillna(9)
+    report["xyz_ord"] = report["XYZ"].map(order_xyz).fillna(9)
+    return report.sort_values(["abc_ord", "xyz_ord", "total_revenue"], ascending=[True, True, False]).reset_index(drop=True)
+
+
+def categories_by_revenue(df: pd.DataFrame, category_col: str = "category") -> list:
+    """Категории, отсортированные по сумме выручки."""
+    return (
+        df.groupby(category_col, as_index=False)["total_revenue"].sum()
+          .sort_values("total_revenue", ascending=False)[category_col]
+          .tolist()
+    )
+
+
+def category_tables(report: pd.DataFrame, df: pd.DataFrame, category_col: str = "category",
+                    columns=None) -> dict:
+    """Одна таблица на категорию: позиции, которые продавались в этой категории."""
+    columns = LIQUIDITY_COLUMNS if columns is None else columns
+    names_by_cat = df.groupby(category_col)["name"].unique()
+    return {
+        cat: report.loc[report["name"].isin(names_by_cat[cat]), columns].reset_index(drop=True)
+        for cat in categories_by_revenue(df, category_col)
+    }
+
+
+def liquidity_tables(df: pd.DataFrame, abc_a=ABC_A, abc_b=ABC_B, xyz_x=XYZ_X, xyz_y=XYZ_Y,
+                     category_col: str = "category", main_category_col: str = "main_category",
+                     period_col: str = "week", step: Callable[[float, str], None] = _no_step) -> dict:
+    """liquidity_report и category_tables одним расчётом — для фонового запуска со страницы."""
+    report = liquidity_report(df, abc_a, abc_b, xyz_x, xyz_y, category_col=category_col,
+                              main_category_col=main_category_col, period_col=period_col, step=step)
+    step(0.8, "таблицы по категориям")
+    return category_tables(report, df, category_col=category_col)
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from preprocessing.scripts.exact_units import to_milli, to_kopecks
+
 def load_and_prepare_dish(filepath: str) -> pd.DataFrame:
     """
     Загружает Excel-файл с отчетом по блюдам,
@@ -39,8 +41,9 @@ def load_and_prepare_dish(filepath: str) -> pd.DataFrame:
     # Оставляем только колонки, которые есть в col_map
     df = df[[v for v in col_map.values() if v in df.columns]]
 
-    # Удаляем пропущенные строки
-    df = df.dropna()
+    # Удаляем пропущенные строки; строки без кода блюда оставляем —
+    # их сопоставит с каталогом по названию article_matching
+    df = df.dropna(subset=[c for c in df.columns if c != 'article'])
 
     df = df.map(lambda x: x.lower() if isinstance(x, str) else x)
 
@@ -48,4 +51,11 @@ def load_and_prepare_dish(filepath: str) -> pd.DataFrame:
     if 'open_time' in df.columns:
         df['open_time'] = pd.to_datetime(df['open_time'], format='%d.%m.%Y %H:%M')
 
+    # Точные целые: количество в тысячных бутылки (0.2 -> 200), суммы в копейках
+    if 'quantity' in df.columns:
+        df['quantity_milli'] = to_milli(df['quantity'])
+    for col in ('price', 'final_sum'):
+        if col in df.columns:
+            df[f'{col}_kop'] = to_kopecks(df[col])
+
     return df
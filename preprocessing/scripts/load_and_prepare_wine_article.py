@@ -1,12 +1,34 @@
 import pandas as pd
 import numpy as np
 
-def load_and_prepare_wine_articles(filepath: str) -> pd.DataFrame:
+from preprocessing.scripts.exact_units import to_kopecks
+
+# Категории вина в каталоге по умолчанию (у другого заведения каталог может быть свой)
+WINE_CATEGORIES = ['Белые вина', 'Белые вина России', 'Вина вне карты', 'ВИНА ПО БОКАЛАМ 150 МЛ',
+   'Дижестивы/Сладкие вина', 'Игристые вина Россия', 'Игристые Вина со всего Мира',
+   'Красные вина', 'Красные вина России', 'Оранжевые и розовые вина', 'Пино де Шарант',
+   'Шампань Франция']
+
+# Раздел каталога с винами по бокалам и его подкатегории
+GLASS_CATEGORY = 'ВИНА ПО БОКАЛАМ 150 МЛ'
+GLASS_SUBCATEGORIES = ['Белые 150 мл', 'Дижестивы и розовые 75-150 мл',
+                       'Игристые 150 мл', 'Красные 150 мл']
+
+
+def load_and_prepare_wine_articles(filepath: str,
+                                   wine_categories: list[str] | None = None,
+                                   glass_category: str = GLASS_CATEGORY,
+                                   glass_subcategories: list[str] | None = None) -> pd.DataFrame:
     """
     Загружает Excel с артикулами, оставляет только категории вина,
     создаёт отдельный столбец для вин по бокалам,
     очищает лишние колонки и возвращает DataFrame.
+
+    wine_categories, glass_category, glass_subcategories — разделы каталога
+    конкретного заведения (по умолчанию — константы выше).
     """
+    wine_categories = WINE_CATEGORIES if wine_categories is None else wine_categories
+    glass_subcategories = GLASS_SUBCATEGORIES if glass_subcategories is None else glass_subcategories
 
     # Колонки, которые берём из Excel
     columns_to_keep = [
@@ -22,12 +44,6 @@ def load_and_prepare_wine_articles(filepath: str) -> pd.DataFrame:
         if col in df.columns:
             df[col] = df[col].ffill()
 
-    # Категории вина
-    wine_categories = ['Белые вина', 'Белые вина России', 'Вина вне карты', 'ВИНА ПО БОКАЛАМ 150 МЛ',
-       'Дижестивы/Сладкие вина', 'Игристые вина Россия', 'Игристые Вина со всего Мира',
-       'Красные вина', 'Красные вина России', 'Оранжевые и розовые вина', 'Пино де Шарант',
-       'Шампань Франция']
-
     # Оставляем только нужные колонки
     df = df[columns_to_keep]
 
@@ -35,13 +51,11 @@ def load_and_prepare_wine_articles(filepath: str) -> pd.DataFrame:
     df_wine = df[df['Unnamed: 3'].isin(wine_categories)].copy()
 
     # Протягиваем названия для вин по бокалам
-    mask_glass = df_wine['Unnamed: 3'] == 'ВИНА ПО БОКАЛАМ 150 МЛ'
+    mask_glass = df_wine['Unnamed: 3'] == glass_category
     df_wine.loc[mask_glass, 'Unnamed: 4'] = df_wine.loc[mask_glass, 'Unnamed: 4'].ffill()
 
     # Новый столбец с категориями бокалов
-    categories = ['Белые 150 мл', 'Дижестивы и розовые 75-150 мл',
-                  'Игристые 150 мл', 'Красные 150 мл']
-    df_wine['only_glass_cat'] = np.where(df_wine['Unnamed: 4'].isin(categories),
+    df_wine['only_glass_cat'] = np.where(df_wine['Unnamed: 4'].isin(glass_subcategories),
                                          df_wine['Unnamed: 4'], 'другое')
 
     # ✅ Создаём article_name из Unnamed: 4 и заполняем пропуски значениями из Unnamed: 5
@@ -84,8 +98,20 @@ def load_and_prepare_wine_articles(filepath: str) -> pd.DataFrame:
 
     df_wine = df_wine.map(lambda x: x.lower() if isinstance(x, str) else x)
 
+    # Цена и себестоимость в целых копейках
+    df_wine['article_price_kop'] = to_kopecks(df_wine['article_price'])
+    df_wine['article_profit_kop'] = to_kopecks(df_wine['article_profit'])
+
     return df_wine
 
+def load_article_codes(filepath: str) -> pd.Series:
+    """
+    Все артикулы каталога, включая не винные разделы (кухня, бар): код из этого
+    списка — известная позиция, его строки продаж не нужно сопоставлять с винами по названию.
+    """
+    codes = pd.read_excel(filepath, skiprows=1, header=0, usecols=['Артикул'])['Артикул'].dropna()
+    return codes.map(lambda x: x.lower() if isinstance(x, str) else x).drop_duplicates()
+
 def change_article_category(data: pd.DataFrame) -> pd.DataFrame:
     article = data.copy()
 
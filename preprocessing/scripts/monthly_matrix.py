@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class ProductMonthMatrix:
+    """
+    Плотная матрица товар × месяц (numpy) с полной осью периодов.
+
+    products — товары (строки), periods — все месяцы периода (колонки),
+    values — суммы, отсутствующие продажи = 0.
+    """
+    products: pd.Index
+    periods: pd.PeriodIndex
+    values: np.ndarray
+
+    def totals(self) -> np.ndarray:
+        """Сумма за период по каждому товару."""
+        return self.values.sum(axis=1)
+
+    def means(self) -> np.ndarray:
+        """Среднее в месяц по каждому товару (по всем месяцам периода, включая нулевые)."""
+        return self.values.mean(axis=1)
+
+    def monthly_totals(self) -> pd.Series:
+        """Сумма по всем товарам за каждый месяц."""
+        return pd.Series(self.values.sum(axis=0), index=self.periods)
+
+
+def build_product_month_matrix(df: pd.DataFrame, start, end, value_col: str = 'final_sum',
+                               product_col: str = 'article_name', month_col: str = 'month') -> ProductMonthMatrix:
+    """
+    Строит матрицу товар × месяц за период [start, end] одним np.bincount,
+    без unstack и без дозаполнения месяцев в цикле.
+
+    df[month_col] — Period('M'), start/end — Period('M').
+    """
+    periods = pd.period_range(start=start, end=end, freq='M')
+    codes, products = pd.factorize(df[product_col], sort=True)
+
+    # номер месяца внутри периода: ординалы Period('M') идут подряд
+    month_idx = pd.PeriodIndex(df[month_col], freq='M').asi8 - periods[0].ordinal
+    values = pd.to_numeric(df[value_col], errors='coerce').fillna(0).to_numpy(dtype='float64')
+
+    n_products, n_periods = len(products), len(periods)
+    inside = (codes >= 0) & (month_idx >= 0) & (month_idx < n_periods)
+    flat = codes[inside] * n_periods + month_idx[inside]
+    matrix = np.bincount(flat, weights=values[inside], minlength=n_products * n_periods)
+
+    return ProductMonthMatrix(
+        products=pd.Index(products, name=product_col),
+        periods=periods,
+        values=matrix.reshape(n_products, n_periods),
+    )
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.exact_units import GLASSES_PER_BOTTLE, KOPECKS, MILLI
+
+# Заказ = смена × номер заказа (номера заказов в iiko начинаются заново каждую смену)
+ORDER_KEYS = ['session_id', 'order_id']
+
+# Раздел каталога, где каждая позиция — бокал
+GLASS_SECTION = 'вина_по_бокалам_150_мл'
+
+ORDER_COLUMNS = ['order', 'open_time', 'table_no', 'guests', 'total_kop', 'wine_kop',
+                 'glasses_milli', 'bottles_milli']
+
+WEEKDAYS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+# Разрезы метрик заказов: колонка -> подпись
+ORDER_BREAKDOWNS = {
+    'weekday': 'День недели',
+    'hour': 'Час',
+    'category': 'Категория вина',
+}
+
+
+def _segment_starts(keys) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Порядок строк, сортирующий их по ключам, и начала отрезков одинаковых ключей
+    в этом порядке (для np.<ufunc>.reduceat).
+    """
+    codes = [pd.factorize(np.asarray(k), sort=False)[0] for k in keys]
+    order = np.lexsort(codes[::-1])
+    change = np.zeros(len(order), dtype=bool)
+    if len(order):
+        change[0] = True
+    for code in codes:
+        ordered = code[order]
+        change[1:] |= ordered[1:] != ordered[:-1]
+    return order, np.flatnonzero(change)
+
+
+def build_orders(dish: pd.DataFrame, catalog: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Заказы из строк выгрузки продаж (все блюда, не только вино).
+
+    Строки сортируются по ключу заказа один раз, дальше все суммы по заказу —
+    сегментные свёртки np.add/np.maximum/np.minimum.reduceat по отрезкам
+    одинакового ключа, без groupby на миллионах строк.
+
+    Возвращает:
+      orders — по строке на заказ: order (номер), open_time (начало заказа), table_no,
+               guests, total_kop, wine_kop, glasses_milli, bottles_milli;
+      order_categories — заказ × категория вина: order, category, wine_kop.
+    Вино — строки, чей артикул есть в каталоге; бокал — раздел GLASS_SECTION
+    или дробное количество бутылки (как в add_glass_column).
+    """
+    lines = dish.dropna(subset=[*ORDER_KEYS, 'open_time'])
+    latest = catalog.drop_duplicates('article', keep='last').set_index('article')
+    section = lines['article'].map(latest['article_category'])
+    glass_cat = lines['article'].map(latest['only_glass_cat'])
+
+    quantity = lines['quantity_milli'].to_numpy(dtype='int64')
+    final_kop = lines['final_sum_kop'].to_numpy(dtype='int64')
+    wine = section.notna().to_numpy()
+    fractional = quantity % MILLI != 0
+    glass = wine & ((section == GLASS_SECTION).to_numpy() | fractional)
+    glasses_milli = np.where(glass, np.where(fractional, quantity * GLASSES_PER_BOTTLE, quantity), 0)
+    bottles_milli = np.where(wine & ~glass, quantity, 0)
+    wine_kop = np.where(wine, final_kop, 0)
+    guest_no = pd.to_numeric(lines['guest_no'], errors='coerce').fillna(1).to_numpy(dtype='int64') \
+        if 'guest_no' in lines.columns else np.ones(len(lines), dtype='int64')
+    times = lines['open_time'].to_numpy(dtype='datetime64[ns]').view('int64')
+
+    order, starts = _segment_starts([lines[k].to_numpy() for k in ORDER_KEYS])
+    if not len(starts):
+        return (pd.DataFrame(columns=ORDER_COLUMNS),
+                pd.DataFrame(columns=['order', 'category', 'wine_kop']))
+    orders = pd.DataFrame({
+        'order': np.arange(len(starts)),
+        'open_time': np.minimum.reduceat(times[order], starts).view('datetime64[ns]'),
+        'table_no': lines['table_no'].to_numpy()[order][starts] if 'table_no' in lines.columns else np.nan,
+        'guests': np.maximum(np.maximum.reduceat(guest_no[order], starts), 1),
+        'total_kop': np.add.reduceat(final_kop[order], starts),
+        'wine_kop': np.add.reduceat(wine_kop[order], starts),
+        'glasses_milli': np.add.reduceat(glasses_milli[order], starts),
+        'bottles_milli': np.add.reduceat(bottles_milli[order], starts),
+    })
+
+    # заказ × категория: категория бокала (only_glass_cat), иначе раздел каталога
+    segment_start = np.zeros(len(order), dtype='int64')
+    segment_start[starts] = 1
+    line_order = np.empty(len(order), dtype='int64')
+    line_order[order] = np.cumsum(segment_start) - 1
+    category = glass_cat.where(glass_cat.notna() & (glass_cat != 'другое'), section).to_numpy()
+    cat_codes, cat_labels = pd.factorize(category[wine])
+    pair = line_order[wine] * max(len(cat_labels), 1) + cat_codes
+    pairs, inverse = np.unique(pair, return_inverse=True)
+    order_categories = pd.DataFrame({
+        'order': pairs // max(len(cat_labels), 1),
+        'category': np.asarray(cat_labels, dtype=object)[pairs % max(len(cat_labels), 1)],
+        'wine_kop': np.bincount(inverse, weights=wine_kop[wine], minlength=len(pairs)).astype('int64'),
+    })
+    return orders, order_categories
+
+
+def orders_in_period(orders: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Заказы, начатые в дни [start, end] включительно."""
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    return orders.loc[(orders['open_time'] >= start) & (orders['open_time'] < end)]
+
+
+def _finish(grouped: pd.DataFrame, total_orders) -> pd.DataFrame:
+    """Средний чек, доля заказов с вином, бокалы на гостя и состав винных заказов."""
+    wine_orders = grouped['wine_orders'].replace(0, np.nan)
+    return grouped.assign(
+        avg_check=grouped['total_kop'] / grouped['orders'] / KOPECKS,
+        attach_rate=grouped['wine_orders'] / total_orders,
+        avg_wine_check=grouped['wine_kop'] / wine_orders / KOPECKS,
+        glasses_per_guest=grouped['glasses_milli'] / MILLI / grouped['guests'],
+        glass_only_share=grouped['glass_only'] / wine_orders,
+        bottle_only_share=grouped['bottle_only'] / wine_orders,
+        both_share=grouped['both'] / wine_orders,
+    ).drop(columns=['total_kop', 'wine_kop', 'glasses_milli', 'glass_only', 'bottle_only', 'both'])
+
+
+def order_metrics(orders: pd.DataFrame, by: str | None = None) -> pd.DataFrame:
+    """
+    Метрики заказов в целом (by=None) или по дню недели / часу начала заказа.
+    Колонки: orders, wine_orders, guests, avg_check, attach_rate, avg_wine_check,
+    glasses_per_guest и доли винных заказов «только бокалы / только бутылки / и то и другое».
+    """
+    has_glass = orders['glasses_milli'] > 0
+    has_bottle = orders['bottles_milli'] > 0
+    df = orders.assign(
+        wine_orders=has_glass | has_bottle,
+        glass_only=has_glass & ~has_bottle,
+        bottle_only=has_bottle & ~has_glass,
+        both=has_glass & has_bottle,
+    )
+    sums = ['total_kop', 'wine_kop', 'glasses_milli', 'guests', 'wine_orders', 'glass_only', 'bottle_only', 'both']
+    if by is None:
+        grouped = df[sums].sum().to_frame().T.assign(orders=len(df))
+    else:
+        key = df['open_time'].dt.weekday if by == 'weekday' else df['open_time'].dt.hour
+        grouped = df.groupby(key.rename(by))[sums].sum().assign(orders=df.groupby(key.rename(by)).size())
+        grouped = grouped.reset_index()
+        if by == 'weekday':
+            grouped['weekday'] = pd.Categorical.from_codes(grouped['weekday'], WEEKDAYS)
+    grouped = grouped.astype({col: 'int64' for col in sums})
+    return _finish(grouped, grouped['orders'])
+
+
+def category_metrics(orders: pd.DataFrame, order_categories: pd.DataFrame) -> pd.DataFrame:
+    """
+    Метрики по категориям вина: в какой доле заказов была категория (attach_rate),
+    сколько вина этой категории в таком заказе (avg_wine_check) и средний чек таких заказов.
+    """
+    keys = [c for c in ('venue', 'order') if c in orders.columns]
+    lines = order_categories.merge(orders, on=keys, how='inner', suffixes=('_cat', ''))
+    grouped = lines.groupby('category', observed=True).agg(
+        orders=('order', 'size'),
+        total_kop=('total_kop', 'sum'),
+        wine_kop=('wine_kop_cat', 'sum'),
+    ).reset_index()
+    return grouped.assign(
+        attach_rate=grouped['orders'] / max(len(orders), 1),
+        avg_check=grouped['total_kop'] / grouped['orders'] / KOPECKS,
+        avg_wine_check=grouped['wine_kop'] / grouped['orders'] / KOPECKS,
+    ).drop(columns=['total_kop', 'wine_kop']).sort_values('orders', ascending=False, kind='stable')
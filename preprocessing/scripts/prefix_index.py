@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class PrefixSumIndex:
+    """
+    Накопленные суммы по матрице товар × день.
+
+    cumulative[i, d] — сумма товара i за дни days[0] … days[d-1] (cumulative[:, 0] = 0),
+    поэтому сумма за любой период [start, end] по всем товарам — одна разность
+    двух столбцов, без фильтрации исходной таблицы.
+    """
+    products: pd.Index
+    days: pd.DatetimeIndex
+    cumulative: np.ndarray
+
+    @property
+    def first_day(self) -> pd.Timestamp:
+        return self.days[0]
+
+    @property
+    def last_day(self) -> pd.Timestamp:
+        return self.days[-1]
+
+    def _position(self, day) -> int:
+        """Номер столбца cumulative, соответствующего началу дня day (с обрезкой по оси)."""
+        offset = (pd.Timestamp(day).normalize() - self.days[0]).days
+        return int(np.clip(offset, 0, len(self.days)))
+
+    def range_sum(self, start, end) -> np.ndarray:
+        """Суммы всех товаров за дни [start, end] включительно."""
+        lo, hi = self._position(start), self._position(pd.Timestamp(end) + pd.Timedelta(days=1))
+        return self.cumulative[:, hi] - self.cumulative[:, min(lo, hi)]
+
+    def boundary_sums(self, boundaries) -> np.ndarray:
+        """Суммы между соседними датами boundaries (для рядов по месяцам/неделям): товары × (len-1)."""
+        positions = [self._position(b) for b in boundaries]
+        return np.diff(self.cumulative[:, positions], axis=1)
+
+    def compare(self, current: tuple, base: tuple) -> pd.DataFrame:
+        """
+        Сравнение двух периодов для всех товаров: current и base — (start, end) включительно.
+        diff_pct — NaN, если в базовом периоде продаж не было.
+        """
+        cur = self.range_sum(*current)
+        prev = self.range_sum(*base)
+        diff = cur - prev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(prev != 0, diff / prev * 100, np.nan)
+        return pd.DataFrame({
+            self.products.name or 'product': self.products,
+            'current': cur,
+            'base': prev,
+            'diff_abs': diff,
+            'diff_pct': pct,
+        })
+
+
+def build_prefix_index(df: pd.DataFrame, value_col: str = 'final_sum', product_col: str = 'article_name',
+                       time_col: str = 'open_time') -> PrefixSumIndex:
+    """Строит PrefixSumIndex одним np.bincount по товару × дню и cumsum по дням."""
+    times = pd.to_datetime(df[time_col], errors='coerce')
+    valid = times.notna().to_numpy()
+    day = times[valid].dt.normalize()
+    if day.empty:
+        return PrefixSumIndex(pd.Index([], name=product_col), pd.DatetimeIndex([]), np.zeros((0, 1)))
+
+    days = pd.date_range(day.min(), day.max(), freq='D')
+    codes, products = pd.factorize(df.loc[valid, product_col], sort=True)
+    day_idx = (day - days[0]).dt.days.to_numpy()
+    values = pd.to_numeric(df.loc[valid, value_col], errors='coerce').fillna(0).to_numpy(dtype='float64')
+
+    n_products, n_days = len(products), len(days)
+    inside = codes >= 0
+    flat = codes[inside] * n_days + day_idx[inside]
+    matrix = np.bincount(flat, weights=values[inside], minlength=n_products * n_days).reshape(n_products, n_days)
+
+    cumulative = np.zeros((n_products, n_days + 1))
+    np.cumsum(matrix, axis=1, out=cumulative[:, 1:])
+    return PrefixSumIndex(pd.Index(products, name=product_col), days, cumulative)
+
+
+def month_bounds(month: pd.Period) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """Первый и последний день месяца."""
+    return month.start_time.normalize(), month.end_time.normalize()
+
+
+def period_presets(last_day) -> dict[str, tuple[tuple, tuple]]:
+    """Типовые сравнения от последнего дня данных: {подпись: (текущий период, базовый период)}."""
+    last_day = pd.Timestamp(last_day).normalize()
+    month = last_day.to_period('M')
+    week_start = last_day - pd.Timedelta(days=last_day.weekday())
+    return {
+        'Последний месяц vs предыдущий': (month_bounds(month), month_bounds(month - 1)),
+        'Последний месяц vs тот же месяц год назад': (month_bounds(month), month_bounds(month - 12)),
+        'Последняя неделя vs предыдущая': (
+            (week_start, week_start + pd.Timedelta(days=6)),
+            (week_start - pd.Timedelta(days=7), week_start - pd.Timedelta(days=1)),
+        ),
+        'Последние 30 дней vs предыдущие 30': (
+            (last_day - pd.Timedelta(days=29), last_day),
+            (last_day - pd.Timedelta(days=59), last_day - pd.Timedelta(days=30)),
+        ),
+    }
@@ -1,49 +1,100 @@
 import pandas as pd
 import numpy as np
 
+from preprocessing.scripts.article_versions import asof_join
+from preprocessing.scripts.exact_units import (
+    MILLI, GLASSES_PER_BOTTLE, KOPECKS, to_milli, to_kopecks, div_round,
+)
+from preprocessing.scripts.order_metrics import ORDER_KEYS
+
+# Целочисленные колонки: количество в милли-единицах, деньги в копейках
+EXACT_COLUMNS = ['quantity_milli', 'price_kop', 'final_sum_kop', 'article_price_kop', 'article_profit_kop']
+
+
+def _ensure_exact_columns(df, sources):
+    """Досчитывает целочисленные колонки, если на вход пришли данные без них."""
+    for exact, (source, convert) in sources.items():
+        if exact not in df.columns and source in df.columns:
+            df = df.assign(**{exact: convert(df[source])})
+    return df
+
+
 def merge_and_select(dish_df, article_df):
-    """Объединяет данные и оставляет нужные колонки."""
-    result = pd.merge(dish_df, article_df, on='article', how='right')
+    """
+    Объединяет данные и оставляет нужные колонки.
+
+    article_df — текущий каталог или версии каталога (article_versions):
+    тогда каждая продажа получает цену версии, действовавшей на open_time.
+    """
+    dish_df = _ensure_exact_columns(dish_df, {
+        'quantity_milli': ('quantity', to_milli),
+        'price_kop': ('price', to_kopecks),
+        'final_sum_kop': ('final_sum', to_kopecks),
+    })
+    article_df = _ensure_exact_columns(article_df, {
+        'article_price_kop': ('article_price', to_kopecks),
+        'article_profit_kop': ('article_profit', to_kopecks),
+    })
+    if 'valid_from' in article_df.columns:
+        # версионный каталог: цена и себестоимость — действовавшие на момент продажи
+        result = asof_join(dish_df, article_df)
+    else:
+        result = pd.merge(dish_df, article_df, on='article', how='right')
+    # номер заказа (если есть в выгрузке) — для числа заказов в дневном агрегате
+    order_keys = [c for c in ORDER_KEYS if c in result.columns]
     result = result[['open_time', 'article_name', 'price', 'quantity', 'final_sum', 
-                     'article_category', 'only_glass_cat', 'article_price', 'article_profit']]
+                     'article_category', 'only_glass_cat', 'article_price', 'article_profit'] + EXACT_COLUMNS + order_keys]
     result['open_time'] = pd.to_datetime(result['open_time'], errors='coerce')
 
     cols = ['article_name', 'price', 'quantity', 'final_sum', 
         'article_category', 'only_glass_cat', 'article_price', 'article_profit']
     
     result[cols] = result[cols].fillna(0)
+    # после right-merge целые колонки становятся float из-за NaN — возвращаем int64
+    result[EXACT_COLUMNS] = result[EXACT_COLUMNS].fillna(0).astype('int64')
     return result #.fillna(0)
 
 def add_glass_column(df):
-    """Добавляет признак 'glass' (бокал или бутылка)."""
+    """Добавляет признак 'glass' (бокал или бутылка): дробное количество бутылки = бокал."""
+    quantity_milli = df['quantity_milli'].to_numpy()
     df['glass'] = np.where(
         (df['article_category'] == 'вина_по_бокалам_150_мл') |
-        ((df['quantity'] % 1 != 0) & (df['quantity'] != 0)),
+        ((quantity_milli % MILLI != 0) & (quantity_milli != 0)),
         'бокал', 'бутылка'
     )
     return df
 
 def normalize_quantity(df):
-    """Переводит количество в формат 'кол-во бокалов'."""
-    df['quantity'] = np.where(
-        df['quantity'] % 1 != 0,
-        df['quantity'] / 0.2,
-        df['quantity']
+    """
+    Переводит количество в формат 'кол-во бокалов'.
+
+    quantity_milli после этого шага — число проданных единиц (бокалов или бутылок) × 1000:
+    0.6 бутылки = 600 -> 3 бокала = 3000. quantity = quantity_milli / 1000.
+    """
+    quantity_milli = df['quantity_milli'].to_numpy()
+    df['quantity_milli'] = np.where(
+        quantity_milli % MILLI != 0,
+        quantity_milli * GLASSES_PER_BOTTLE,
+        quantity_milli
     )
+    df['quantity'] = df['quantity_milli'] / MILLI
     return df
 
 def add_glass_prices(df):
-    """Рассчитывает цену и себестоимость одного бокала."""
-    df['glass_price'] = np.where(
-        (df['glass'] == 'бокал') & (df['article_category'] != 'вина_по_бокалам_150_мл'),
-        df['article_price'] / 5,
-        df['article_price']
+    """Рассчитывает цену и себестоимость одного бокала (в копейках и в рублях)."""
+    by_bottle = ((df['glass'] == 'бокал') & (df['article_category'] != 'вина_по_бокалам_150_мл')).to_numpy()
+    df['glass_price_kop'] = np.where(
+        by_bottle,
+        div_round(df['article_price_kop'], GLASSES_PER_BOTTLE),
+        df['article_price_kop']
     )
-    df['glass_profit'] = np.where(
-        (df['glass'] == 'бокал') & (df['article_category'] != 'вина_по_бокалам_150_мл'),
-        df['article_profit'] / 5,
-        df['article_profit']
+    df['glass_profit_kop'] = np.where(
+        by_bottle,
+        div_round(df['article_profit_kop'], GLASSES_PER_BOTTLE),
+        df['article_profit_kop']
     )
+    df['glass_price'] = df['glass_price_kop'] / KOPECKS
+    df['glass_profit'] = df['glass_profit_kop'] / KOPECKS
     return df
 
 # def group_glass_sales(df):
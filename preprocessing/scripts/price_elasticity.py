@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.exact_units import MILLI, KOPECKS
+
+# Позиция (SKU) = название × бокал/бутылка: у бокала и бутылки одного вина свои цены
+SKU_KEYS = ['article_name', 'glass']
+
+# Изменение цены меньше этого (доля) считаем шумом
+MIN_PRICE_CHANGE = 0.03
+# Окно до/после изменения цены, дней
+WINDOW_DAYS = 28
+
+# Ключ «позиция × день» одним int64: номер позиции * DAY_SPAN + номер дня с 1970-01-01
+DAY_SPAN = 1_000_000
+
+
+def daily_price_panel(sales: pd.DataFrame, keys=SKU_KEYS) -> pd.DataFrame:
+    """
+    Панель позиция × день: продано единиц (units_milli) и цена дня (медиана
+    цены строк в копейках). Дни без продаж в панель не попадают.
+    Результат отсортирован по позиции и дню; sku — номер позиции.
+    """
+    keys = list(keys)
+    rows = sales.loc[sales['open_time'].notna() & (sales['quantity_milli'] > 0) & (sales['price_kop'] > 0)]
+    rows = rows.assign(day=rows['open_time'].dt.normalize())
+    panel = rows.groupby(keys + ['day'], as_index=False, observed=True).agg(
+        units_milli=('quantity_milli', 'sum'),
+        price_kop=('price_kop', 'median'),
+    )
+    panel['sku'] = panel.groupby(keys, observed=True).ngroup().to_numpy()
+    panel['day_no'] = (panel['day'] - pd.Timestamp('1970-01-01')).dt.days.to_numpy(dtype='int64')
+    return panel
+
+
+def _window_units(key: np.ndarray, cum_units: np.ndarray, sku: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Сумма units_milli позиции sku за дни [lo, hi) — двоичным поиском по ключу позиция × день."""
+    start = np.searchsorted(key, sku * DAY_SPAN + lo, side='left')
+    stop = np.searchsorted(key, sku * DAY_SPAN + hi, side='left')
+    return cum_units[stop] - cum_units[start]
+
+
+def price_change_events(panel: pd.DataFrame, keys=SKU_KEYS, window_days: int = WINDOW_DAYS,
+                        min_change: float = MIN_PRICE_CHANGE) -> pd.DataFrame:
+    """
+    События изменения цены по всем позициям сразу и дуговая эластичность по окнам до/после.
+
+    Событие — день, когда цена позиции отличается от цены предыдущего дня продаж
+    больше чем на min_change. Спрос до/после — средние продажи в день за окно
+    window_days (окна обрезаются первым/последним днём продаж позиции).
+    elasticity = ln(спрос после / спрос до) / ln(цена после / цена до).
+    """
+    keys = list(keys)
+    sku = panel['sku'].to_numpy()
+    day_no = panel['day_no'].to_numpy()
+    price = panel['price_kop'].to_numpy(dtype='float64')
+
+    first_row = np.r_[True, sku[1:] != sku[:-1]]
+    prev_price = np.r_[np.nan, price[:-1]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_step = np.log(price / prev_price)
+    is_event = ~first_row & (np.abs(log_step) >= np.log1p(min_change))
+    idx = np.flatnonzero(is_event)
+
+    # первый и последний день продаж каждой позиции (панель отсортирована по позиции и дню)
+    starts = np.flatnonzero(first_row)
+    first_day = day_no[starts]
+    last_day = day_no[np.r_[starts[1:] - 1, len(sku) - 1]] if len(sku) else day_no[:0]
+
+    key = sku.astype('int64') * DAY_SPAN + day_no
+    cum_units = np.r_[0, np.cumsum(panel['units_milli'].to_numpy(dtype='int64'))]
+
+    e_sku, e_day = sku[idx], day_no[idx]
+    before_lo = np.maximum(e_day - window_days, first_day[e_sku])
+    after_hi = np.minimum(e_day + window_days, last_day[e_sku] + 1)
+    units_before = _window_units(key, cum_units, e_sku, before_lo, e_day)
+    units_after = _window_units(key, cum_units, e_sku, e_day, after_hi)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate_before = units_before / MILLI / (e_day - before_lo)
+        rate_after = units_after / MILLI / (after_hi - e_day)
+        elasticity = np.log(rate_after / rate_before) / log_step[idx]
+    elasticity[~np.isfinite(elasticity)] = np.nan
+
+    events = panel.iloc[idx][keys + ['day']].reset_index(drop=True)
+    events['price_before'] = prev_price[idx] / KOPECKS
+    events['price_after'] = price[idx] / KOPECKS
+    events['price_change_pct'] = (np.exp(log_step[idx]) - 1) * 100
+    events['days_before'] = e_day - before_lo
+    events['days_after'] = after_hi - e_day
+    events['per_day_before'] = rate_before
+    events['per_day_after'] = rate_after
+    events['elasticity'] = elasticity
+    return events
+
+
+def log_log_elasticity(panel: pd.DataFrame, keys=SKU_KEYS) -> pd.DataFrame:
+    """
+    Регрессия ln(продажи в день) = a + b·ln(цена) по каждой позиции сразу:
+    b — эластичность, считается из сгруппированных сумм (без цикла по позициям).
+    Позиции без колебаний цены получают NaN.
+    """
+    keys = list(keys)
+    x = np.log(panel['price_kop'].to_numpy(dtype='float64') / KOPECKS)
+    y = np.log(panel['units_milli'].to_numpy(dtype='float64') / MILLI)
+    sums = panel[keys].assign(n=1, x=x, y=y, xx=x * x, xy=x * y, yy=y * y) \
+        .groupby(keys, as_index=False, observed=True).sum()
+
+    n = sums['n'].to_numpy(dtype='float64')
+    sxx = sums['xx'] - sums['x'] ** 2 / n
+    syy = sums['yy'] - sums['y'] ** 2 / n
+    sxy = sums['xy'] - sums['x'] * sums['y'] / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 1e-12, sxy / sxx, np.nan)
+        r2 = np.where((sxx > 1e-12) & (syy > 1e-12), sxy ** 2 / (sxx * syy), np.nan)
+        resid = np.clip(syy - slope * sxy, 0.0, None)
+        stderr = np.where((n > 2) & (sxx > 1e-12), np.sqrt(resid / (n - 2) / sxx), np.nan)
+
+    return sums[keys].assign(days=n.astype('int64'), regression_elasticity=slope, r2=r2, regression_stderr=stderr)
+
+
+def elasticity_by_sku(sales: pd.DataFrame, keys=SKU_KEYS, window_days: int = WINDOW_DAYS,
+                      min_change: float = MIN_PRICE_CHANGE) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Эластичность спроса по цене для всех позиций: (сводка по позициям, события изменения цены).
+
+    Сводка: дни продаж, число уровней цены и изменений, медианная эластичность
+    по событиям (до/после) и эластичность из log-log регрессии.
+    """
+    keys = list(keys)
+    panel = daily_price_panel(sales, keys)
+    events = price_change_events(panel, keys, window_days, min_change)
+
+    summary = log_log_elasticity(panel, keys)
+    levels = panel.groupby(keys, as_index=False, observed=True).agg(
+        price_levels=('price_kop', 'nunique'),
+        price_min=('price_kop', 'min'),
+        price_max=('price_kop', 'max'),
+        units=('units_milli', 'sum'),
+    )
+    per_event = events.groupby(keys, as_index=False, observed=True).agg(
+        price_changes=('elasticity', 'size'),
+        event_elasticity=('elasticity', 'median'),
+    )
+    summary = summary.merge(levels, on=keys, how='left').merge(per_event, on=keys, how='left')
+    summary['price_changes'] = summary['price_changes'].fillna(0).astype('int64')
+    summary['price_min'] = summary['price_min'] / KOPECKS
+    summary['price_max'] = summary['price_max'] / KOPECKS
+    summary['units'] = summary['units'] / MILLI
+    columns = keys + ['units', 'days', 'price_levels', 'price_min', 'price_max', 'price_changes',
+                      'event_elasticity', 'regression_elasticity', 'regression_stderr', 'r2']
+    return summary[columns], events
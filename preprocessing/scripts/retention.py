@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.order_metrics import ORDER_KEYS
+from preprocessing.scripts.venue_aggregates import DAILY_KEYS, DAILY_SUMS, aggregate_daily_sales, daily_lines, \
+    merge_daily_aggregates
+
+# Цены за единицу (в свёрнутом слое — первые за день): по ним aggregate_abc показывает действующую цену
+ROLLUP_PRICES = ['glass_price_kop', 'glass_profit_kop', 'article_price_kop', 'article_profit_kop']
+
+ROLLUP_COLUMNS = DAILY_KEYS + DAILY_SUMS + ROLLUP_PRICES
+
+
+def raw_cutoff(open_time: pd.Series, months: int) -> pd.Timestamp | None:
+    """
+    Начало самого раннего месяца, который хранится строками: последние months
+    календарных месяцев, считая месяц последней продажи. None — строками хранится всё.
+    """
+    last = open_time.max()
+    if months <= 0 or pd.isna(last):
+        return None
+    return (pd.Timestamp(last).to_period('M') - (months - 1)).to_timestamp()
+
+
+def old_tier(dish: pd.DataFrame, cutoff: pd.Timestamp | None) -> np.ndarray:
+    """
+    Маска строк выгрузки, уходящих в свёрнутый слой: заказ начат раньше cutoff.
+    Заказ не делится между слоями (заказ через полночь на границе месяца — целиком в старом);
+    строки без номера заказа — по своему времени, строки без времени остаются строками.
+    """
+    if cutoff is None:
+        return np.zeros(len(dish), dtype=bool)
+    start = dish['open_time']
+    if all(k in dish.columns for k in ORDER_KEYS):
+        start = dish.groupby(ORDER_KEYS, dropna=True)['open_time'].transform('min').fillna(start)
+    return (start < cutoff).to_numpy()
+
+
+def rollup_sales(sales: pd.DataFrame) -> pd.DataFrame:
+    """
+    Свёрнутый слой: продажи (после process_wine_sales) до уровня день × позиция ×
+    категория × бокал/бутылка — суммы дневного агрегата (количество, выручка,
+    себестоимость, прибыль, заказы) и цены за единицу (первые за день) для ABC.
+    """
+    if sales.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    agg = {col: 'sum' for col in DAILY_SUMS} | {col: 'first' for col in ROLLUP_PRICES}
+    return daily_lines(sales).groupby(DAILY_KEYS, as_index=False, observed=True).agg(agg)[ROLLUP_COLUMNS]
+
+
+def daily_from_tiers(rollup: pd.DataFrame, sales: pd.DataFrame) -> pd.DataFrame:
+    """Дневной агрегат по обоим слоям: свёрнутые дни как есть плюс дни из строк продаж."""
+    recent = aggregate_daily_sales(sales)
+    if rollup.empty:
+        return recent
+    # день на границе слоёв может быть в обоих (заказы через полночь) — суммируется
+    return merge_daily_aggregates([rollup[DAILY_KEYS + DAILY_SUMS], recent[DAILY_KEYS + DAILY_SUMS]])
+
+
+def abc_input(rollup: pd.DataFrame, sales: pd.DataFrame) -> pd.DataFrame:
+    """
+    Вход aggregate_abc по обоим слоям: строка свёрнутого слоя — как одна продажа
+    с готовыми суммами за день (revenue_kop, cost_kop). Действующую цену позиции
+    aggregate_abc выбирает по open_time, так что порядок слоёв не важен.
+    """
+    if rollup.empty:
+        return sales
+    return pd.concat([rollup, sales], ignore_index=True)
@@ -0,0 +1,118 @@
+import bisect
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.article_matching import normalize_names
+
+# Разделитель значений в общей строке: в запросе его не бывает, поэтому
+# совпадение не может пересечь границу двух названий
+SEPARATOR = '\x00'
+
+
+@dataclass
+class SearchIndex:
+    """
+    Поиск подстроки по нормализованным значениям (регистр и ё/е не важны).
+
+    Уникальные значения склеены в одну строку text; suffixes — позиции её
+    суффиксов, отсортированные лексикографически (суффиксный массив). Все
+    значения, содержащие запрос, — один непрерывный диапазон суффиксов,
+    который находится двумя двоичными поисками. Строки таблицы разложены
+    по значениям заранее (row_order / row_bounds), поэтому запрос не
+    просматривает саму таблицу.
+    """
+    names: list
+    text: str
+    starts: np.ndarray
+    suffixes: np.ndarray
+    row_order: np.ndarray
+    row_bounds: np.ndarray
+
+    def _key(self, length: int):
+        return lambda pos: self.text[pos:pos + length]
+
+    def matching_names(self, query: str) -> np.ndarray:
+        """Номера значений, содержащих query (query уже нормализован; длина — любая)."""
+        key = self._key(len(query))
+        lo = bisect.bisect_left(self.suffixes, query, key=key)
+        hi = bisect.bisect_right(self.suffixes, query, lo=lo, key=key)
+        return np.unique(np.searchsorted(self.starts, self.suffixes[lo:hi], side='right') - 1)
+
+    def search(self, query: str) -> np.ndarray:
+        """Позиции строк таблицы (по возрастанию), где есть query; пустой запрос — все строки."""
+        query = normalize_names(pd.Series([query])).iloc[0]
+        if not query:
+            return np.sort(self.row_order)
+        ids = self.matching_names(query)
+        if not len(ids):
+            return np.array([], dtype='int64')
+        rows = [self.row_order[self.row_bounds[i]:self.row_bounds[i + 1]] for i in ids]
+        return np.sort(np.concatenate(rows))
+
+
+def suffix_array(text: str) -> np.ndarray:
+    """
+    Позиции всех суффиксов text в лексикографическом порядке (как сравнение строк Python).
+
+    Удвоение префиксов на numpy. Начальный ранг — первые k символов суффикса, упакованные
+    в одно int64 (k — сколько символов алфавита text в него помещается); дальше ранг по
+    первым 2k символам — пара рангов (по первым k и по k символам со сдвига k), тоже одно
+    int64, отсортированное np.argsort. Раундов — около log2(длина самого длинного повтора / k),
+    в каждом нет цикла Python по символам.
+    """
+    n = len(text)
+    if n == 0:
+        return np.array([], dtype='int64')
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    # плотные коды символов 1..sigma; 0 — «за концом строки»: более короткий суффикс меньше, как у строк
+    alphabet, dense = np.unique(codes, return_inverse=True)
+    base = len(alphabet) + 1
+    k = max(1, int(62 // np.log2(base)))
+    packed = np.zeros(n, dtype='int64')
+    for j in range(min(k, n)):
+        packed *= base
+        packed[:n - j] += dense[j:] + 1
+    rank = _dense_ranks(packed)
+    while rank.max() < n - 1 and k < n:
+        second = np.zeros(n, dtype='int64')
+        second[:n - k] = rank[k:] + 1
+        rank = _dense_ranks(rank * (n + 1) + second)
+        k *= 2
+    order = np.empty(n, dtype='int64')
+    order[rank] = np.arange(n)
+    return order
+
+
+def _dense_ranks(keys: np.ndarray) -> np.ndarray:
+    """Ранг каждого ключа среди различных ключей (0 — наименьший)."""
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    rank = np.empty(len(keys), dtype='int64')
+    rank[order] = np.cumsum(np.concatenate(([0], sorted_keys[1:] != sorted_keys[:-1])))
+    return rank
+
+
+def build_search_index(columns) -> SearchIndex:
+    """
+    Индекс по строкам таблицы: значение строки — её колонки columns (Series одной длины),
+    нормализованные и склеенные через SEPARATOR. Строится один раз на версию данных.
+    """
+    columns = list(columns)
+    row_values = normalize_names(columns[0])
+    for col in columns[1:]:
+        row_values = row_values + SEPARATOR + normalize_names(col)
+    codes, names = pd.factorize(row_values.to_numpy(), sort=False)
+    names = list(names)
+
+    text = SEPARATOR.join(names) + SEPARATOR
+    starts = np.cumsum([0] + [len(n) + 1 for n in names[:-1]]).astype('int64') if names \
+        else np.array([], dtype='int64')
+    # суффиксы, начинающиеся на разделителе, запросу не соответствуют — не индексируем
+    suffixes = suffix_array(text)
+    suffixes = suffixes[np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)[suffixes] != ord(SEPARATOR)]
+
+    row_order = np.argsort(codes, kind='stable')
+    row_bounds = np.searchsorted(codes[row_order], np.arange(len(names) + 1), side='left')
+    return SearchIndex(names, text, starts, suffixes, row_order, row_bounds)
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Доля строк в выборке и минимум строк на слой (маленькие слои берутся целиком)
+SAMPLE_FRACTION = 0.05
+SAMPLE_MIN_ROWS = 30
+
+# Служебные колонки выборки
+SAMPLE_COLUMNS = ['stratum', 'stratum_rows', 'stratum_sample', 'weight']
+
+
+def stratified_sample(df: pd.DataFrame, strata, fraction: float = SAMPLE_FRACTION,
+                      min_rows: int = SAMPLE_MIN_ROWS, seed: int = 0) -> pd.DataFrame:
+    """
+    Стратифицированная выборка: из каждого слоя (например, месяц × категория)
+    берётся доля fraction строк, но не меньше min_rows (или весь слой, если он меньше).
+
+    В выборку добавляются колонки:
+      stratum        — номер слоя;
+      stratum_rows   — строк в слое (N_h);
+      stratum_sample — строк слоя в выборке (n_h);
+      weight         — N_h / n_h, множитель для оценки сумм.
+    """
+    strata = list(strata)
+    stratum = df.groupby(strata, sort=True, observed=True, dropna=False).ngroup().to_numpy()
+    rows = np.bincount(stratum) if len(stratum) else np.zeros(0, dtype='int64')
+    take = np.minimum(rows, np.maximum(min_rows, np.ceil(rows * fraction).astype('int64')))
+
+    # случайный ранг строки внутри своего слоя; берём первые take[слой]
+    key = np.random.default_rng(seed).random(len(df))
+    order = np.lexsort((key, stratum))
+    starts = np.concatenate([[0], np.cumsum(rows)[:-1]]).astype('int64')
+    rank = np.empty(len(df), dtype='int64')
+    rank[order] = np.arange(len(df)) - starts[stratum[order]]
+    keep = rank < take[stratum]
+
+    sample = df.iloc[np.flatnonzero(keep)].reset_index(drop=True)
+    kept = stratum[keep]
+    sample['stratum'] = kept
+    sample['stratum_rows'] = rows[kept]
+    sample['stratum_sample'] = take[kept]
+    sample['weight'] = rows[kept] / take[kept]
+    return sample
+
+
+def estimate_totals(sample: pd.DataFrame, value_col: str, by=None, strata=('stratum',)) -> pd.DataFrame:
+    """
+    Оценка сумм value_col по группам by (или одной общей суммы, если by пуст)
+    по стратифицированной выборке.
+
+    estimate — сумма value_col × weight; stderr — стандартная ошибка оценки
+    (стратифицированная выборка без возвращения, группа как подмножество слоя);
+    rel_error — stderr / |estimate|. Слои, взятые целиком, ошибки не дают.
+    strata — колонки, однозначно задающие слой (для сети — заведение и номер слоя).
+    """
+    by = list(by or [])
+    strata = list(strata)
+    y = pd.to_numeric(sample[value_col], errors='coerce').fillna(0.0).astype('float64')
+    parts = sample[by + strata + ['stratum_rows', 'stratum_sample']].assign(
+        _y=y, _y2=y * y, _wy=y * sample['weight'])
+
+    # суммы по группе внутри каждого слоя
+    cells = parts.groupby(by + strata, observed=True, dropna=False).agg(
+        s1=('_y', 'sum'), s2=('_y2', 'sum'), estimate=('_wy', 'sum'),
+        N=('stratum_rows', 'first'), n=('stratum_sample', 'first'),
+    ).reset_index()
+
+    # дисперсия оценки суммы группы в слое: N² (1 − n/N) · s²(y·1[группа]) / n
+    n = cells['n'].to_numpy(dtype='float64')
+    N = cells['N'].to_numpy(dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s2_z = (cells['s2'] - cells['s1'] ** 2 / n) / (n - 1)
+        var = np.where(n > 1, N ** 2 * (1 - n / N) * s2_z / n, 0.0)
+    cells['var'] = np.clip(var, 0.0, None)
+
+    if by:
+        totals = cells.groupby(by, observed=True, dropna=False)[['estimate', 'var']].sum().reset_index()
+    else:
+        totals = pd.DataFrame({'estimate': [cells['estimate'].sum()], 'var': [cells['var'].sum()]})
+    totals['stderr'] = np.sqrt(totals.pop('var'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        totals['rel_error'] = np.where(totals['estimate'] != 0, totals['stderr'] / totals['estimate'].abs(), 0.0)
+    return totals
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.scripts.abc_analys import aggregate_abc, perform_abc_analysis
+from preprocessing.scripts.abc_incremental import IncrementalABC
+
+NAMES = [f'вино {i:02d}' for i in range(30)]
+
+
+def sales_batch(rng, day, rows=200, price_bump=0):
+    """Продажи одного дня: бокалы и бутылки, цены — по позиции (с возможной сменой цены)."""
+    names = rng.choice(NAMES, size=rows)
+    number = np.array([int(n.split()[-1]) for n in names])
+    price = 30_000 + number * 1_000 + price_bump
+    glass = np.where(number % 3 == 0, 'бутылка', 'бокал')
+    return pd.DataFrame({
+        'open_time': pd.Timestamp(day) + pd.to_timedelta(rng.integers(0, 86_400, size=rows), unit='s'),
+        'article_name': names,
+        'article_category': 'красные_вина',
+        'only_glass_cat': 'красные_вина',
+        'glass': glass,
+        'quantity_milli': rng.choice([1000, 2000, 3000], size=rows).astype('int64'),
+        'glass_price_kop': (price // 5).astype('int64'),
+        'glass_profit_kop': (price // 12).astype('int64'),
+        'article_price_kop': price.astype('int64'),
+        'article_profit_kop': (price // 3).astype('int64'),
+    })
+
+
+@pytest.mark.parametrize('mode', ['бокал', 'бутылка'])
+@pytest.mark.parametrize('value_column', ['revenue', 'profit'])
+def test_deltas_match_full_recompute(mode, value_column):
+    rng = np.random.default_rng(7)
+    days = [sales_batch(rng, f'2025-05-{d:02d}', price_bump=500 * (d > 3)) for d in range(1, 7)]
+
+    abc = IncrementalABC.from_aggregate(aggregate_abc(days[0], mode), mode, value_column)
+    for day in days[1:]:
+        abc.apply_sales(day)
+
+    history = pd.concat(days, ignore_index=True)
+    expected = perform_abc_analysis(history, mode, value_column)
+    pd.testing.assert_frame_equal(abc.result(), expected)
+    pd.testing.assert_frame_equal(abc.aggregate(), aggregate_abc(history, mode))
+
+
+def test_apply_sales_reports_class_changes():
+    rng = np.random.default_rng(1)
+    abc = IncrementalABC.from_sales(sales_batch(rng, '2025-05-01'), 'бокал')
+    before = abc.result().set_index('article_name')['ABC_category']
+
+    # позиция класса C резко выросла: она и вытесненные ею сменили класс
+    target = before.index[before == 'C'][-1]
+    boom = sales_batch(rng, '2025-05-02', rows=300).assign(article_name=target, glass='бокал')
+    changes = abc.apply_sales(boom).set_index('article_name')
+    after = abc.result().set_index('article_name')['ABC_category']
+
+    moved = after.index[after != before.reindex(after.index)]
+    assert set(changes.index) == set(moved)
+    assert changes.loc[target, 'old_class'] == 'C'
+    assert changes.loc[target, 'new_class'] == 'A'
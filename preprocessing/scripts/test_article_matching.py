@@ -0,0 +1,15 @@
+import pandas as pd
+
+from preprocessing.scripts.article_matching import match_unmatched, normalize_names
+
+
+def test_normalize_names_keeps_cyrillic():
+    names = pd.Series(['Шато  Марго, 2015!', 'Кьянти_Классико', 'Ёлка', None])
+    assert normalize_names(names).tolist() == ['шато марго 2015', 'кьянти классико', 'елка', '']
+
+
+def test_match_unmatched_finds_uncoded_line_by_name():
+    catalog = pd.DataFrame({'article': [101, 102], 'article_name': ['шато марго', 'соаве классико']})
+    dish = pd.DataFrame({'article': [101, None], 'dish': ['шато марго', 'Шато Марго'], 'final_sum': [9000.0, 9000.0]})
+    mapping = match_unmatched(dish, catalog)
+    assert mapping[['dish', 'article', 'status']].values.tolist() == [['шато марго', 101, 'auto']]
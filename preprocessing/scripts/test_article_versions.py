@@ -0,0 +1,55 @@
+import pandas as pd
+
+from preprocessing.scripts.abc_analys import aggregate_abc
+from preprocessing.scripts.article_versions import asof_join, build_article_versions
+from preprocessing.scripts.exact_units import to_kopecks
+from preprocessing.scripts.prepare_for_abc_analys_merge import process_wine_sales
+
+
+def catalog(price, profit):
+    df = pd.DataFrame({
+        'article_category': ['красные_вина'], 'only_glass_cat': ['красные_вина'],
+        'article_name': ['вино'], 'article': [101],
+        'article_price': [float(price)], 'article_profit': [float(profit)],
+    })
+    return df.assign(article_price_kop=to_kopecks(df['article_price']),
+                     article_profit_kop=to_kopecks(df['article_profit']))
+
+
+def versions():
+    return build_article_versions([
+        (pd.Timestamp('2025-01-01'), catalog(1000, 400), 'v1'),
+        (pd.Timestamp('2025-03-01'), catalog(1200, 450), 'v2'),
+    ])
+
+
+def dish(times):
+    return pd.DataFrame({
+        'open_time': pd.to_datetime(times),
+        'article': [101] * len(times),
+        'price': [0.0] * len(times), 'quantity': [1.0] * len(times), 'final_sum': [0.0] * len(times),
+    })
+
+
+def test_asof_join_keeps_sales_in_time_order():
+    joined = asof_join(dish(['2025-03-10', '2024-12-15', None, '2025-02-10']), versions())
+    assert joined['open_time'].iloc[:3].tolist() == list(pd.to_datetime(['2024-12-15', '2025-02-10', '2025-03-10']))
+    assert joined['open_time'].iloc[3:].isna().all()
+    # ранняя продажа — первая версия, без времени — действующая
+    assert joined['article_price_kop'].tolist() == [100000, 100000, 120000, 120000]
+
+
+def test_aggregate_abc_prices_each_line_and_shows_current_price():
+    sales = process_wine_sales(dish(['2025-03-10', '2024-12-15', '2025-02-10']), versions())
+    abc = aggregate_abc(sales, 'бутылка').set_index('article_name')
+    assert abc.loc['вино', 'price_kop'] == 120000
+    assert abc.loc['вино', 'cost_kop'] == 45000
+    assert abc.loc['вино', 'units_milli'] == 3000
+    assert abc.loc['вино', 'revenue_kop'] == 100000 + 100000 + 120000
+    assert abc.loc['вино', 'profit_kop'] == (100000 - 40000) * 2 + (120000 - 45000)
+
+
+def test_aggregate_abc_does_not_depend_on_row_order():
+    sales = process_wine_sales(dish(['2025-03-10', '2024-12-15', '2025-02-10']), versions())
+    shuffled = sales.iloc[::-1].reset_index(drop=True)
+    pd.testing.assert_frame_equal(aggregate_abc(sales, 'бутылка'), aggregate_abc(shuffled, 'бутылка'))
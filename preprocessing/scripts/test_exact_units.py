@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.exact_units import GLASS_MILLI, div_round, milli_times_kopecks, to_kopecks, to_milli
+
+
+def test_quantities_and_money_become_integers():
+    assert to_milli(pd.Series([1, 0.2, 0.6, 'x', None])).tolist() == [1000, 200, 600, 0, 0]
+    assert to_kopecks(pd.Series([1234.5, 0.1, 0.29])).tolist() == [123450, 10, 29]
+    assert to_milli(pd.Series([0.2])).dtype == 'int64'
+
+
+def test_div_round_rounds_to_nearest():
+    assert div_round([1499, 1500, 2499, 0], 1000).tolist() == [1, 2, 2, 0]
+
+
+def test_glass_totals_are_exact():
+    # 0.1 + 0.2 в float даёт 0.30000000000000004; в милли-единицах — ровно 300
+    assert to_milli(pd.Series([0.1, 0.2])).sum() == 300
+    # тысяча бокалов по 0.2 бутылки — ровно 200 бутылок
+    quantity = np.full(1000, GLASS_MILLI)
+    assert quantity.sum() == 200 * 1000
+    # сумма за 0.2 бутылки по 4999.99 р. — 999.998 р. -> 100000 коп.
+    assert milli_times_kopecks([GLASS_MILLI], to_kopecks(pd.Series([4999.99]))).tolist() == [100000]
+    lines = milli_times_kopecks(np.full(1000, GLASS_MILLI), np.full(1000, 90000))
+    assert lines.sum() == 1000 * 18000
@@ -0,0 +1,67 @@
+import base64
+import gzip
+import io
+import json
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.scripts.export_bundle import export_file_name, write_report_bundle
+
+
+def sheets():
+    table = pd.DataFrame({
+        'name': ['вино', 'игристое', None],
+        'revenue': [1200.5, np.nan, 300.0],
+        'month': pd.PeriodIndex(['2025-06', '2025-07', '2025-07'], freq='M'),
+        'tags': [['A', 'X'], [], ['C']],
+    })
+    return {'ABC бокалы': table, 'XYZ бок. красные/белые': table.iloc[:0]}
+
+
+def read_xlsx(path):
+    return pd.read_excel(path, sheet_name=None)
+
+
+def read_csv_zip(path):
+    with zipfile.ZipFile(path) as zf:
+        return {n[:-len('.csv')]: pd.read_csv(zf.open(n), encoding='utf-8-sig') for n in zf.namelist()}
+
+
+def read_parquet_zip(path):
+    with zipfile.ZipFile(path) as zf:
+        return {n[:-len('.parquet')]: pd.read_parquet(io.BytesIO(zf.read(n))) for n in zf.namelist()}
+
+
+def read_html(path):
+    text = open(path, encoding='utf-8').read()
+    packed = re.search(r'<script id="data" type="application/octet-stream">(.*?)</script>', text, re.S).group(1)
+    tables = json.loads(gzip.decompress(base64.b64decode(packed)))['tables']
+    return {t['name']: pd.DataFrame(dict(zip(t['columns'], t['data'])), columns=t['columns']) for t in tables}
+
+
+READERS = {'xlsx': read_xlsx, 'csv': read_csv_zip, 'parquet': read_parquet_zip, 'html': read_html}
+
+
+@pytest.mark.parametrize('fmt', list(READERS))
+def test_round_trip_keeps_missing_periods_and_lists(tmp_path, fmt):
+    path = write_report_bundle(sheets(), tmp_path / export_file_name('report', fmt), fmt)
+    back = READERS[fmt](path)
+
+    # имена листов/файлов без недопустимых для Excel символов
+    expected_names = ['ABC бокалы', 'XYZ бок. красные/белые' if fmt == 'html' else 'XYZ бок. красные_белые']
+    assert list(back) == expected_names
+
+    table = back['ABC бокалы']
+    assert list(table.columns) == ['name', 'revenue', 'month', 'tags']
+    assert table['name'].iloc[:2].tolist() == ['вино', 'игристое']
+    assert pd.isna(table['name'].iloc[2])
+    assert table['revenue'].iloc[0] == 1200.5 and pd.isna(table['revenue'].iloc[1])
+    assert table['month'].tolist() == ['2025-06', '2025-07', '2025-07']
+    assert table['tags'].tolist() == ["['A', 'X']", '[]', "['C']"]
+
+    empty = back[expected_names[1]]
+    assert len(empty) == 0 and list(empty.columns) == ['name', 'revenue', 'month', 'tags']
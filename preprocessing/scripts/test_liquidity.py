@@ -0,0 +1,24 @@
+import pandas as pd
+
+from preprocessing.scripts.liquidity import liquidity_rows
+from preprocessing.scripts.order_metrics import GLASS_SECTION
+
+
+def sales():
+    return pd.DataFrame({
+        'open_time': pd.to_datetime(['2025-06-22 23:00', '2025-06-23 00:00', '2025-06-23 18:30', '2025-06-24 12:00']),
+        'article_category': [GLASS_SECTION, GLASS_SECTION, 'красные_вина', 'красные_вина'],
+    })
+
+
+def test_cutoff_day_is_kept_for_lines_and_daily_rows():
+    assert liquidity_rows(sales(), pd.Timestamp('2025-06-23').date()).index.tolist() == [1, 2, 3]
+    daily = sales().assign(open_time=lambda d: d['open_time'].dt.normalize())
+    assert liquidity_rows(daily, pd.Timestamp('2025-06-23').date()).index.tolist() == [1, 2, 3]
+
+
+def test_glass_rows_follow_the_catalog_section():
+    after = pd.Timestamp('2025-06-01').date()
+    assert liquidity_rows(sales(), after, 'бокал').index.tolist() == [0, 1]
+    assert liquidity_rows(sales(), after, 'бутылка').index.tolist() == [2, 3]
+    assert liquidity_rows(sales(), after, 'бокал', glass_category='красные_вина').index.tolist() == [2, 3]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.prefix_index import build_prefix_index, period_presets
+
+
+def sales():
+    rng = np.random.default_rng(0)
+    times = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24, 500), unit='h')
+    return pd.DataFrame({
+        'open_time': times,
+        'article_name': rng.choice(['кьянти', 'соаве', 'шато марго'], 500),
+        'final_sum': rng.integers(1, 10_000, 500).astype('float64'),
+    })
+
+
+def direct_sums(df, start, end):
+    day = df['open_time'].dt.normalize()
+    mask = (day >= pd.Timestamp(start)) & (day <= pd.Timestamp(end))
+    return df[mask].groupby('article_name')['final_sum'].sum()
+
+
+def test_range_sum_matches_groupby():
+    df = sales()
+    index = build_prefix_index(df)
+    for start, end in [('2025-01-01', '2025-03-31'), ('2025-02-10', '2025-02-10'), ('2024-12-01', '2025-01-15'),
+                       ('2025-03-20', '2025-06-01')]:
+        expected = direct_sums(df, start, end).reindex(index.products, fill_value=0)
+        np.testing.assert_allclose(index.range_sum(start, end), expected.to_numpy())
+
+
+def test_boundary_sums_and_compare():
+    df = sales()
+    index = build_prefix_index(df)
+    months = pd.period_range('2025-01', '2025-03', freq='M')
+    by_month = index.boundary_sums([m.start_time for m in months] + [pd.Timestamp('2025-04-01')])
+    expected = df.pivot_table(index='article_name', columns=df['open_time'].dt.to_period('M'),
+                              values='final_sum', aggfunc='sum', fill_value=0)
+    np.testing.assert_allclose(by_month, expected.to_numpy())
+
+    current, base = period_presets(index.last_day)['Последний месяц vs предыдущий']
+    table = index.compare(current, base)
+    np.testing.assert_allclose(table['diff_abs'], table['current'] - table['base'])
+    assert list(table['article_name']) == list(index.products)
+
+
+def test_empty_sales():
+    df = sales().assign(open_time=pd.NaT)
+    index = build_prefix_index(df)
+    assert len(index.products) == 0
+    assert index.cumulative.shape == (0, 1)
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.search_index import build_search_index, suffix_array
+
+
+def test_suffix_array_matches_python_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        text = ''.join(rng.choice(list('аб\x00'), size=rng.integers(0, 40)))
+        assert suffix_array(text).tolist() == sorted(range(len(text)), key=lambda p: text[p:])
+
+
+def test_long_query_and_no_match_across_values():
+    long_name = 'шато ' + 'очень длинное название вина ' * 3 + 'резерва'
+    names = pd.Series([long_name, 'кьянти', 'шато марго', long_name.replace('резерва', 'гран крю')])
+    index = build_search_index([names])
+
+    assert index.search(long_name[2:]).tolist() == [0]
+    assert index.search(long_name[:60]).tolist() == [0, 3]
+    assert index.search('Шато').tolist() == [0, 2, 3]
+    # запрос не склеивает соседние значения
+    assert index.search('кьянтишато').tolist() == []
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.stratified_sample import estimate_totals, stratified_sample
+
+
+def sales(rows=20_000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        'month': rng.choice(pd.period_range('2025-01', '2025-06', freq='M'), rows),
+        'category': rng.choice(['красные', 'белые', 'игристые', 'редкие'], rows, p=[0.5, 0.3, 0.199, 0.001]),
+        'revenue': rng.gamma(2.0, 3000.0, rows),
+    })
+
+
+def test_sample_sizes_and_weights():
+    df = sales()
+    sample = stratified_sample(df, ['month', 'category'], fraction=0.05, min_rows=30)
+    sizes = df.groupby(['month', 'category'], observed=True).size()
+    taken = sample.groupby(['month', 'category'], observed=True).size()
+    expected = np.minimum(sizes, np.maximum(30, np.ceil(sizes * 0.05).astype('int64')))
+    pd.testing.assert_series_equal(taken, expected)
+    # вес восстанавливает число строк каждого слоя
+    assert np.isclose(sample['weight'].sum(), len(df))
+    # маленькие слои берутся целиком
+    assert (sample.loc[sample['category'] == 'редкие', 'weight'] == 1).all()
+
+
+def test_estimates_cover_full_totals():
+    df = sales()
+    sample = stratified_sample(df, ['month', 'category'], seed=3)
+    total = estimate_totals(sample, 'revenue')
+    assert abs(total['estimate'].iloc[0] - df['revenue'].sum()) <= 3 * total['stderr'].iloc[0]
+    assert total['rel_error'].iloc[0] < 0.05
+
+    by_category = estimate_totals(sample, 'revenue', by=['category']).set_index('category')
+    actual = df.groupby('category')['revenue'].sum()
+    errors = (by_category['estimate'] - actual).abs()
+    assert (errors <= 4 * by_category['stderr'] + 1e-6).all()
+    # слой, взятый целиком, оценивается точно
+    assert np.isclose(by_category.loc['редкие', 'estimate'], actual['редкие'])
+    assert by_category.loc['редкие', 'stderr'] == 0
+
+
+def test_full_sample_is_exact():
+    df = sales(500)
+    sample = stratified_sample(df, ['month'], fraction=1.0)
+    total = estimate_totals(sample, 'revenue', by=['month'])
+    expected = df.groupby('month')['revenue'].sum().to_numpy()
+    np.testing.assert_allclose(total['estimate'], expected)
+    assert (total['stderr'] == 0).all()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from preprocessing.scripts.exact_units import MILLI, KOPECKS, milli_times_kopecks
+from preprocessing.scripts.order_metrics import ORDER_KEYS
+
+# Ключи дневного агрегата и аддитивные метрики (точные целые);
+# orders — число заказов с позицией за день
+DAILY_KEYS = ['open_time', 'article_name', 'article_category', 'only_glass_cat', 'glass']
+DAILY_SUMS = ['quantity_milli', 'final_sum_kop', 'revenue_kop', 'cost_kop', 'profit_kop', 'orders']
+
+
+def _add_float_columns(daily: pd.DataFrame) -> pd.DataFrame:
+    """Штуки и рубли для отчётов — из точных целых сумм."""
+    daily['quantity'] = daily['quantity_milli'] / MILLI
+    for col in ('final_sum', 'revenue', 'cost', 'profit'):
+        daily[col] = daily[f'{col}_kop'] / KOPECKS
+    return daily
+
+
+def _order_starts(lines: pd.DataFrame) -> np.ndarray:
+    """1 у первой строки каждого заказа в ключе дневного агрегата; строка без номера заказа — свой заказ."""
+    if not all(k in lines.columns for k in ORDER_KEYS):
+        return np.ones(len(lines), dtype='int64')
+    first = ~lines.duplicated(DAILY_KEYS + ORDER_KEYS)
+    return (first | lines[ORDER_KEYS].isna().any(axis=1)).to_numpy(dtype='int64')
+
+
+def daily_lines(df: pd.DataFrame) -> pd.DataFrame:
+    """Строки продаж до группировки по дню: день, точные выручка/себестоимость/прибыль, счётчик заказов."""
+    df = df.dropna(subset=['open_time'])
+    lines = df.assign(
+        open_time=df['open_time'].dt.normalize(),
+        revenue_kop=milli_times_kopecks(df['quantity_milli'], df['glass_price_kop']),
+        cost_kop=milli_times_kopecks(df['quantity_milli'], df['glass_profit_kop']),
+    )
+    lines['profit_kop'] = lines['revenue_kop'] - lines['cost_kop']
+    lines['orders'] = _order_starts(lines)
+    return lines
+
+
+def aggregate_daily_sales(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сворачивает строки продаж (после process_wine_sales) до уровня
+    день × позиция × категория × бокал/бутылка.
+
+    open_time в результате — начало дня. Все метрики аддитивны и суммируются
+    в целых (милли-единицы, копейки), поэтому агрегаты разных заведений
+    объединяются обычной суммой (merge_daily_aggregates) без накопления ошибок.
+    """
+    daily = daily_lines(df).groupby(DAILY_KEYS, as_index=False, observed=True)[DAILY_SUMS].sum()
+    return _add_float_columns(daily)
+
+
+def merge_daily_aggregates(parts) -> pd.DataFrame:
+    """Объединяет дневные агрегаты нескольких заведений в сетевой."""
+    parts = list(parts)
+    if not parts:
+        return _add_float_columns(pd.DataFrame(columns=DAILY_KEYS + DAILY_SUMS))
+    combined = pd.concat(parts, ignore_index=True)
+    combined = combined.groupby(DAILY_KEYS, as_index=False, observed=True)[DAILY_SUMS].sum()
+    return _add_float_columns(combined)
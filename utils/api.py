@@ -0,0 +1,220 @@
+"""
+Локальный HTTP API только для чтения: готовые агрегаты для внешних клиентов
+(таблица закупок, экран на кассе) — те же цифры, что показывают страницы.
+
+    GET /api/version                          — версии данных заведений
+    GET /api/abc?mode=бокал&value=revenue     — ABC-анализ (страницы 01, 02)
+    GET /api/liquidity?after=2025-06-23&glass=бокал — ликвидность ABC/XYZ по неделям (страницы 07, 08),
+                                              бокалы или бутылки (по умолчанию бокалы)
+    GET /api/monthly                          — товар × месяц за весь период (выгрузка «По месяцам»)
+
+Общие параметры: venue=<заведение> (можно несколько раз, по умолчанию — вся сеть),
+format=json|arrow (или заголовок Accept: application/vnd.apache.arrow.stream).
+
+Каждый ответ помечается ETag — хэшем версии данных заведений (store.data_version:
+дайджесты исходников и версия кода) и запроса. Клиент присылает его обратно
+в If-None-Match; пока данные те же, сервер отвечает 304 без тела и без пересчёта.
+Новая выгрузка в data/ меняет версию, и следующий запрос получает свежие цифры.
+
+Запуск (http.server из стандартной библиотеки, без внешней инфраструктуры):
+    python -m utils.api [--host 127.0.0.1] [--port 8765]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from preprocessing.scripts.abc_analys import ABC_COLUMNS
+from preprocessing.scripts.export_bundle import plain_frame
+from preprocessing.scripts.liquidity import liquidity_report, liquidity_rows, prepare_liquidity_input
+from utils import data, store
+from utils.single_flight import SingleFlight
+from utils.export import LIQUIDITY_KINDS, monthly_sheet
+from utils.venues import venue_names
+
+JSON_MIME = "application/json; charset=utf-8"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# Сколько готовых тел ответов держать в памяти (по ключу запроса)
+BODY_CACHE_ENTRIES = 64
+
+
+def abc_table(venues: tuple[str, ...], params: dict) -> pd.DataFrame:
+    mode = params.get("mode", "бокал")
+    value = params.get("value", "revenue")
+    if mode not in ABC_COLUMNS:
+        raise ValueError(f"mode: одно из {list(ABC_COLUMNS)}")
+    if value not in ("revenue", "profit"):
+        raise ValueError("value: revenue или profit")
+    return data.load_abc(mode, value, venues)
+
+
+def liquidity_table(venues: tuple[str, ...], params: dict) -> pd.DataFrame:
+    after = date.fromisoformat(params["after"]) if "after" in params else data.LIQUIDITY_AFTER
+    glass = params.get("glass", "бокал")
+    if glass not in LIQUIDITY_KINDS:
+        raise ValueError(f"glass: одно из {list(LIQUIDITY_KINDS)}")
+    # бокалы и бутылки не смешиваются, день after входит — тот же фильтр, что в выгрузке и на страницах
+    daily = liquidity_rows(data.load_daily_sales(venues), after, glass)
+    df = prepare_liquidity_input(daily, "only_glass_cat")
+    if df.empty:
+        return pd.DataFrame()
+    return liquidity_report(df, category_col="category", main_category_col="main_category")
+
+
+def monthly_table(venues: tuple[str, ...], params: dict) -> pd.DataFrame:
+    return monthly_sheet(data.load_daily_sales(venues))
+
+
+# /api/<имя> -> (таблица по заведениям, параметры запроса, влияющие на результат)
+ENDPOINTS: dict[str, tuple[Callable[[tuple[str, ...], dict], pd.DataFrame], tuple[str, ...]]] = {
+    "abc": (abc_table, ("mode", "value")),
+    "liquidity": (liquidity_table, ("after", "glass")),
+    "monthly": (monthly_table, ()),
+}
+
+
+def to_json(df: pd.DataFrame) -> bytes:
+    return plain_frame(df).to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+
+
+def to_arrow(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(plain_frame(df), preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def make_etag(version: str, endpoint: str, venues: tuple[str, ...], params: dict, fmt: str) -> str:
+    payload = json.dumps([version, endpoint, sorted(venues), sorted(params.items()), fmt], ensure_ascii=False)
+    return '"' + hashlib.sha256(payload.encode()).hexdigest()[:24] + '"'
+
+
+class ApiState:
+    """Готовые тела ответов по ETag и последняя увиденная версия данных заведений."""
+
+    def __init__(self, max_entries: int = BODY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._bodies: OrderedDict[str, bytes] = OrderedDict()
+        self._versions: dict[tuple[str, ...], str] = {}
+        self._lock = threading.Lock()
+        self._building = SingleFlight()
+
+    def version(self, venues: tuple[str, ...]) -> str:
+        """Версия данных; если она сменилась, st.cache_data загрузчиков в этом процессе сбрасывается."""
+        version = store.data_version(venues)
+        with self._lock:
+            if self._versions.get(venues, version) != version:
+                for loader in data.VENUE_LOADERS:
+                    loader.clear()
+            self._versions[venues] = version
+        return version
+
+    def body(self, etag: str, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            if etag in self._bodies:
+                self._bodies.move_to_end(etag)
+                return self._bodies[etag]
+        # одинаковые одновременные запросы ждут одну сборку тела
+        body = self._building.do(etag, build)
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return body
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    state: ApiState = ApiState()
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "api":
+            return self._error(HTTPStatus.NOT_FOUND, "неизвестный путь")
+        try:
+            venues = tuple(query.get("venue") or venue_names())
+            if not venues:
+                raise ValueError("нет заведений: укажите venue или положите выгрузки в data/")
+            if parts[1] == "version":
+                return self._send(json.dumps({v: store.data_version((v,)) for v in venues}).encode(), JSON_MIME)
+            if parts[1] not in ENDPOINTS:
+                return self._error(HTTPStatus.NOT_FOUND, "неизвестный путь")
+            self._table(parts[1], venues, query)
+        except KeyError as err:
+            self._error(HTTPStatus.NOT_FOUND, str(err))
+        except ValueError as err:
+            self._error(HTTPStatus.BAD_REQUEST, str(err))
+        except Exception as err:  # ответ клиенту — JSON, а не оборванное соединение
+            self.log_error("%s", traceback.format_exc())
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(err).__name__}: {err}")
+
+    def _table(self, endpoint: str, venues: tuple[str, ...], query: dict) -> None:
+        build, names = ENDPOINTS[endpoint]
+        params = {name: query[name][-1] for name in names if name in query}
+        fmt = query.get("format", [""])[-1] or ("arrow" if ARROW_MIME in self.headers.get("Accept", "") else "json")
+        if fmt not in ("json", "arrow"):
+            raise ValueError("format: json или arrow")
+
+        version = self.state.version(venues)
+        etag = make_etag(version, endpoint, venues, params, fmt)
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(b"", None, HTTPStatus.NOT_MODIFIED, etag, version)
+
+        encode = to_arrow if fmt == "arrow" else to_json
+        body = self.state.body(etag, lambda: encode(build(venues, params)))
+        self._send(body, ARROW_MIME if fmt == "arrow" else JSON_MIME, HTTPStatus.OK, etag, version)
+
+    def _send(self, body: bytes, content_type: str | None, status: HTTPStatus = HTTPStatus.OK,
+              etag: str | None = None, version: str | None = None) -> None:
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if version:
+            self.send_header("X-Data-Version", version)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._send(json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"), JSON_MIME, status)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Локальный API готовых агрегатов (JSON / Arrow)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), ApiHandler)
+    print(f"API: http://{args.host}:{args.port}/api/abc  (Ctrl+C — остановить)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Фоновые задачи для страниц Streamlit.
+
+Страница запускает тяжёлый расчёт через submit(key, fn, ...) и не ждёт его:
+задача выполняется в общем пуле потоков процесса (st.cache_resource), а
+повторные перезапуски страницы с тем же key получают ту же задачу, а не новую.
+Когда задача готова (future.done()), страница берёт результат — обычно просто
+вызывая тот же кэшированный загрузчик ещё раз, который теперь отвечает из кэша.
+
+Тяжёлые расчёты страниц (ABC/XYZ, матрица по месяцам) идут через
+latest_result(slot, key, fn, ...): расчёт под текущие входные данные key
+запускается в том же пуле, а пока он идёт, страница показывает последний
+готовый результат этого слота и полосу прогресса. Если входные данные
+сменились раньше, чем расчёт закончился, старая задача отменяется: ещё не
+начатая — сразу, начатая — на ближайшей проверке Task.check() / Task.report()
+между шагами расчёта. Поэтому быстрые движения слайдера не копят очередь
+полных пересчётов.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+import streamlit as st
+
+# Прогрев загрузчиков и расчёты страниц всех сессий делят один пул
+MAX_WORKERS = 4
+
+# Как часто перерисовывать прогресс, пока ждём первый результат, и как часто
+# перезапускать страницу, пока на ней показан прошлый результат, секунды
+POLL_INTERVAL = 0.1
+RERUN_INTERVAL = 0.5
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self.pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="background")
+        self.jobs: dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _registry() -> _Registry:
+    return _Registry()
+
+
+def submit(key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Запускает fn(*args, **kwargs) в фоне, если задача key ещё не запускалась
+    (или упала — тогда запускается заново). Возвращает Future задачи.
+    Готовая задача не перезапускается, поэтому key должен включать версию данных
+    (store.data_version): иначе после сброса кэшей задача останется «готовой».
+    """
+    registry = _registry()
+    with registry.lock:
+        job = registry.jobs.get(key)
+        if job is None or (job.done() and job.exception() is not None):
+            job = registry.pool.submit(fn, *args, **kwargs)
+            registry.jobs[key] = job
+        return job
+
+
+
+class Cancelled(Exception):
+    """Расчёт отменён: входные данные страницы сменились."""
+
+
+class Task:
+    """
+    Расчёт для latest_result: флаг отмены и прогресс. Функция расчёта получает
+    задачу первым аргументом и между шагами вызывает task.report(доля, что_делаем)
+    (или task.check()) — там отменённая задача прерывается исключением Cancelled.
+    Из потока пула нельзя вызывать Streamlit: прогресс рисует страница.
+    """
+
+    def __init__(self, key: Hashable) -> None:
+        self.key = key
+        self.progress = 0.0
+        self.message = ""
+        self.future: Future | None = None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check(self) -> None:
+        if self._cancelled.is_set():
+            raise Cancelled(self.key)
+
+    def report(self, progress: float, message: str = "") -> None:
+        self.check()
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        self.message = message
+
+
+def _run(task: Task, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    task.check()
+    return fn(task, *args, **kwargs)
+
+
+def _slot(slot: str) -> dict:
+    return st.session_state.setdefault(f"_background_{slot}", {})
+
+
+def latest_result(slot: str, key: Hashable, fn: Callable, *args, **kwargs) -> tuple[Any, bool]:
+    """
+    Результат fn(task, *args, **kwargs) для входных данных key, посчитанный в фоне.
+
+    slot — место на странице (своё у каждой сессии), key — всё, от чего зависит
+    результат: версия источника (readers.source_digest, store.data_version), даты, пороги. Расчёт с новым key отменяет
+    прежний расчёт слота. Возвращает (результат, актуален): пока расчёт под
+    текущий key идёт, возвращается прошлый готовый результат слота с False
+    (под полосой прогресса) — страница в конце вызывает rerun_while(not актуален).
+    Первый результат слота ждём здесь же, показывая прогресс. Ошибка расчёта
+    поднимается на странице, а следующий перезапуск страницы пробует снова.
+    """
+    state = _slot(slot)
+    task = state.get("task")
+    if task is None or task.key != key:
+        if task is not None:
+            task.cancel()
+        task = Task(key)
+        task.future = _registry().pool.submit(_run, task, fn, args, kwargs)
+        state["task"] = task
+
+    if "result" not in state:
+        bar = st.progress(0.0, text="Считаю…")
+        while not task.future.done():
+            bar.progress(task.progress, text=task.message or "Считаю…")
+            time.sleep(POLL_INTERVAL)
+        bar.empty()
+
+    if task.future.done():
+        if task.future.exception() is not None:
+            state.pop("task")
+            raise task.future.exception()
+        state["result"] = task.future.result()
+        return state["result"], True
+
+    st.progress(task.progress, text=f"Пересчитываю ({task.message or 'в очереди'}); ниже — прошлый результат")
+    return state["result"], False
+
+
+def rerun_while(pending: bool) -> None:
+    """Вызывать в конце страницы: пока идёт фоновый пересчёт, перезапускает страницу."""
+    if pending:
+        time.sleep(RERUN_INTERVAL)
+        st.rerun()
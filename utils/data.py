@@ -0,0 +1,216 @@
+"""
+Единая загрузка данных для страниц Streamlit.
+
+Все тяжёлые шаги (чтение Excel, сборка продаж вина, ABC-анализ) кэшируются
+(st.cache_data; большие таблицы продаж — st.cache_resource, одна копия на процесс
+для всех сессий, см. utils/shared.py), поэтому страницы и фоновый прогрев (utils/warmup.py)
+попадают в один и тот же кэш: если функцию вызвали с теми же аргументами,
+второй раз Excel уже не читается.
+
+Продажи вина берутся из хранилища processed/ (utils/store.py), разбитого
+по заведениям; сетевые отчёты объединяют готовые агрегаты заведений.
+Excel-файлы, которые читаются напрямую, лежат под дисковым кэшем
+(utils/disk_cache.py) и после перезапуска читаются из Parquet.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from preprocessing.scripts.abc_analys import classify_abc, merge_abc_aggregates
+from preprocessing.scripts.category_trends import category_month_trends
+from preprocessing.scripts.prefix_index import PrefixSumIndex, build_prefix_index
+from preprocessing.scripts.order_metrics import category_metrics, order_metrics, orders_in_period
+from preprocessing.scripts.price_elasticity import MIN_PRICE_CHANGE, SKU_KEYS, WINDOW_DAYS, elasticity_by_sku
+from preprocessing.scripts.venue_aggregates import merge_daily_aggregates
+from utils import store
+from utils.disk_cache import disk_cached, file_digest
+from utils.shared import SHARED_ENTRIES, freeze
+from utils.venues import DATA_DIR
+
+# Уже обработанные продажи одним файлом (страница 03)
+ALL_SALES_PATH = DATA_DIR / 'all_sales.xlsx'
+
+# «Тихие» файлы по умолчанию для отчётов по ликвидности (страницы 07, 08)
+ALL_POSITIONS_PATH = DATA_DIR.parent / 'all.xlsx'
+REPORT_DISH_PATH = DATA_DIR.parent / 'report_dish_new_menu.xlsx'
+
+# Отчёты по ликвидности: дата отсечения по умолчанию и читаемые колонки
+LIQUIDITY_AFTER = date(2025, 6, 23)
+ALL_POSITIONS_COLUMNS = ('open_time', 'article_name', 'only_glass_cat', 'glass_price', 'glass_profit', 'quantity')
+GLASS_REPORT_COLUMNS = ('open_time', 'article_name', 'article_category', 'only_glass_cat',
+                        'glass_price', 'glass_profit', 'quantity')
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def load_wine_sales(venue: str) -> pd.DataFrame:
+    """
+    Строки продаж вина одного заведения (после process_wine_sales) за последние store.RAW_MONTHS
+    месяцев — более ранние хранятся свёрнутыми. Общая таблица — только чтение.
+    """
+    return freeze(store.read_sales(venue))
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def load_daily_sales(venues: tuple[str, ...]) -> pd.DataFrame:
+    """
+    Дневные агрегаты продаж: одно заведение или сеть (сумма готовых агрегатов заведений).
+    Колонки: open_time (день), article_name, article_category, only_glass_cat, glass,
+    quantity, final_sum, revenue, cost, profit, orders, month
+    (+ точные целые quantity_milli и *_kop). Вся история: свёрнутые месяцы и свежие строки.
+    Одна таблица на процесс для всех сессий (utils/shared.py) — только чтение.
+    """
+    store.ensure_venues(venues)
+    if len(venues) == 1:
+        # агрегат одного заведения уже готов — берём отображённый в память файл как есть
+        df = store.read_daily(venues[0])
+    else:
+        df = merge_daily_aggregates(store.read_daily(v) for v in venues)
+    df['open_time'] = pd.to_datetime(df['open_time'])
+    df['month'] = df['open_time'].dt.to_period('M')
+    return freeze(df)
+
+
+# Колонки, однозначно задающие слой выборки предпросмотра (номера слоёв — свои у каждого заведения)
+PREVIEW_STRATA = ('venue', 'stratum')
+
+
+@st.cache_data(show_spinner=False)
+def load_daily_preview(venues: tuple[str, ...]) -> pd.DataFrame:
+    """
+    Стратифицированная выборка дневных продаж (месяц × категория) для быстрого предпросмотра.
+    Колонки как у load_daily_sales плюс venue и служебные колонки выборки
+    (weight, stratum_rows, stratum_sample, stratum) — см. preprocessing/scripts/stratified_sample.py.
+    """
+    df = pd.concat([store.read_sample(v).assign(venue=v) for v in venues], ignore_index=True)
+    df['open_time'] = pd.to_datetime(df['open_time'])
+    df['month'] = df['open_time'].dt.to_period('M')
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def load_category_trends(venues: tuple[str, ...]) -> pd.DataFrame:
+    """Категория × год-месяц по бокалам: final_sum, quantity, profit (страницы 05, 06)."""
+    return category_month_trends(load_daily_sales(venues))
+
+
+@st.cache_data(show_spinner=False)
+def load_abc(mode: str = 'бокал', value_column: str = 'revenue', venues: tuple[str, ...] = ()) -> pd.DataFrame:
+    """ABC-анализ (страницы 01, 02): по одному заведению или по сети из агрегатов заведений."""
+    store.ensure_venues(venues)
+    parts = [store.read_abc_aggregate(v, mode) for v in venues]
+    grouped = parts[0] if len(parts) == 1 else merge_abc_aggregates(parts, mode)
+    return classify_abc(grouped, value_column)
+
+
+@st.cache_data(show_spinner=False)
+def load_price_elasticity(venues: tuple[str, ...], window_days: int = WINDOW_DAYS,
+                          min_change: float = MIN_PRICE_CHANGE) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Эластичность спроса по цене (страница 09): (сводка по позициям, события изменения цены).
+    В сети позиция = заведение × название × бокал/бутылка: цены у заведений свои.
+    Нужны цены отдельных продаж, поэтому считается по строкам — последние store.RAW_MONTHS месяцев.
+    """
+    store.ensure_venues(venues)
+    columns = ['open_time', 'quantity_milli', 'price_kop', *SKU_KEYS]
+    sales = pd.concat([store.read_sales(v, columns).assign(venue=v) for v in venues], ignore_index=True)
+    keys = SKU_KEYS if len(venues) == 1 else ['venue', *SKU_KEYS]
+    return elasticity_by_sku(sales, keys, window_days, min_change)
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def load_orders(venues: tuple[str, ...]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Заказы и заказ × категория вина по заведениям (колонка venue). Общие таблицы — только чтение."""
+    store.ensure_venues(venues)
+    parts = [store.read_orders(v) for v in venues]
+    orders = pd.concat([o.assign(venue=v) for v, (o, _) in zip(venues, parts)], ignore_index=True)
+    categories = pd.concat([c.assign(venue=v) for v, (_, c) in zip(venues, parts)], ignore_index=True)
+    return freeze(orders), freeze(categories)
+
+
+@st.cache_data(show_spinner=False)
+def load_order_metrics(venues: tuple[str, ...], start: date, end: date, by: str | None = None) -> pd.DataFrame:
+    """
+    Метрики заказов за период [start, end] (страница 10): в целом, по дню недели,
+    часу или категории вина. Кэш — на каждый период и разрез.
+    """
+    orders, categories = load_orders(venues)
+    period = orders_in_period(orders, start, end)
+    if by == 'category':
+        return category_metrics(period, categories)
+    return order_metrics(period, by)
+
+
+def load_all_sales(path: str = str(ALL_SALES_PATH)) -> pd.DataFrame:
+    """
+    Читает all_sales.xlsx и нормализует его:
+    имена колонок в нижнем регистре, open_time -> datetime, month -> Period('M').
+    Общая таблица — только чтение.
+    """
+    return _load_all_sales(path, file_digest(path))
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def _load_all_sales(path: str, digest: str) -> pd.DataFrame:
+    # digest — ключ по содержимому: заменённый на месте файл читается заново
+    df = _read_all_sales(path)
+    # Месяц из даты (Period в Parquet не храним — считаем после чтения)
+    df["month"] = df["open_time"].dt.to_period("M")
+    return freeze(df)
+
+
+def load_sales_index(path: str = str(ALL_SALES_PATH)) -> PrefixSumIndex:
+    """Накопленные суммы товар × день по all_sales.xlsx (страница 03): сравнение любых периодов."""
+    return _load_sales_index(path, file_digest(path))
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def _load_sales_index(path: str, digest: str) -> PrefixSumIndex:
+    index = build_prefix_index(_load_all_sales(path, digest), value_col="final_sum")
+    # индекс общий для всех сессий — запрещаем запись в матрицу
+    index.cumulative.setflags(write=False)
+    return index
+
+
+@disk_cached(files=lambda path: [path])
+def _read_all_sales(path: str) -> pd.DataFrame:
+    df = pd.read_excel(path)
+    # Приведём имена колонок к нижнему регистру — так надёжнее
+    df.columns = [str(c).strip().lower() for c in df.columns]
+
+    need = {"open_time", "article_name", "final_sum"}
+    missing = need - set(df.columns)
+    if missing:
+        raise ValueError(f"В файле отсутствуют колонки: {sorted(missing)}")
+
+    # Типы
+    df["open_time"] = pd.to_datetime(df["open_time"], errors="coerce")
+    df = df.dropna(subset=["open_time"]).copy()
+    df["final_sum"] = pd.to_numeric(df["final_sum"], errors="coerce").fillna(0)
+    return df
+
+
+def load_excel(path: str) -> pd.DataFrame:
+    """Кэшированное чтение произвольного Excel-файла с диска (кэш — по содержимому файла)."""
+    return _load_excel(path, file_digest(path))
+
+
+@st.cache_data(show_spinner=False)
+def _load_excel(path: str, digest: str) -> pd.DataFrame:
+    return _read_excel(path)
+
+
+@disk_cached(files=lambda path: [path])
+def _read_excel(path: str) -> pd.DataFrame:
+    return pd.read_excel(path)
+
+
+# Загрузчики файлов по пути (ключ — путь и дайджест): слежение очищает их при смене файлов,
+# чтобы не держать в памяти таблицы прежних версий
+PATH_LOADERS = (_load_all_sales, _load_sales_index, _load_excel)
+
+# Загрузчики, зависящие от данных заведений: очищаются, когда processed/ пересобрано
+VENUE_LOADERS = (load_wine_sales, load_daily_sales, load_daily_preview, load_abc,
+                 load_category_trends, load_price_elasticity, load_orders, load_order_metrics)
@@ -0,0 +1,263 @@
+"""
+Дисковый кэш результатов (переживает перезапуск Streamlit).
+
+st.cache_data живёт только в памяти одного процесса. Здесь результаты
+(DataFrame) сохраняются в processed/cache/ как Parquet-файлы, а индекс
+(ключ, размер, время последнего обращения, файлы-источники) лежит в SQLite,
+поэтому кэш общий для перезапусков и для нескольких процессов.
+
+Ключ = хэш(имя функции + дайджесты входных файлов + параметры + версия кода).
+Размер кэша ограничен: при превышении удаляются давно не читанные записи (LRU).
+
+Использование:
+    @st.cache_data(show_spinner=False)
+    @disk_cached(files=lambda path: [path])
+    def load_something(path: str) -> pd.DataFrame: ...
+
+Просмотр и очистка из консоли:
+    python -m utils.disk_cache stats
+    python -m utils.disk_cache list
+    python -m utils.disk_cache purge [--name load_abc] [--all]
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from utils.single_flight import SingleFlight
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CACHE_DIR = Path(os.environ.get("VINOLOGIA_CACHE_DIR", ROOT / "processed" / "cache"))
+MAX_BYTES = int(os.environ.get("VINOLOGIA_CACHE_MAX_MB", 2048)) * 1024 * 1024
+
+# Исходники, от которых зависят результаты: поменяли код — старые записи не подходят
+CODE_GLOBS = ("preprocessing/scripts/*.py", "utils/*.py")
+
+_digest_memo: dict[tuple[str, int, int], str] = {}
+
+# Одинаковые промахи из разных сессий считаются один раз
+_misses = SingleFlight()
+
+
+def file_digest(path: str | os.PathLike) -> str:
+    """sha256 содержимого файла; пересчитывается только при смене размера/mtime."""
+    p = Path(path)
+    if not p.exists():
+        return "missing"
+    st_ = p.stat()
+    memo_key = (str(p.resolve()), st_.st_size, st_.st_mtime_ns)
+    if memo_key not in _digest_memo:
+        h = hashlib.sha256()
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _digest_memo[memo_key] = h.hexdigest()
+    return _digest_memo[memo_key]
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Хэш исходников пайплайна и загрузчиков."""
+    h = hashlib.sha256()
+    for pattern in CODE_GLOBS:
+        for p in sorted(ROOT.glob(pattern)):
+            h.update(p.name.encode())
+            h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def make_key(name: str, files: Iterable[str | os.PathLike] = (), params: object = None) -> str:
+    """Ключ записи: имя + дайджесты файлов + параметры + версия кода."""
+    payload = {
+        "name": name,
+        "files": {str(f): file_digest(f) for f in files},
+        "params": repr(params),
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class DiskCache:
+    """Parquet-блобы + SQLite-индекс с LRU-вытеснением по суммарному размеру."""
+
+    def __init__(self, root: str | os.PathLike = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, name TEXT, size INTEGER,"
+                " created REAL, last_access REAL, files TEXT)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.root / "index.sqlite", timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def _blob(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._blob(key)
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            # битый или недописанный файл — считаем промахом
+            self.delete(key)
+            return None
+        with self._connect() as con:
+            con.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return df
+
+    def put(self, key: str, df: pd.DataFrame, name: str = "", files: Iterable[str | os.PathLike] = ()) -> bool:
+        """Сохраняет DataFrame. Если pyarrow не смог его сериализовать — просто не кэшируем."""
+        path = self._blob(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            df.to_parquet(tmp, index=True)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            return False
+        os.replace(tmp, path)  # атомарно: другой процесс не увидит половину файла
+        now = time.time()
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (key, name, path.stat().st_size, now, now, json.dumps([str(f) for f in files])),
+            )
+        self.evict()
+        return True
+
+    def delete(self, key: str) -> None:
+        self._blob(key).unlink(missing_ok=True)
+        with self._connect() as con:
+            con.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Удаляет самые давно читанные записи, пока кэш больше лимита. Возвращает число удалённых."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._connect() as con:
+            rows = con.execute("SELECT key, size FROM entries ORDER BY last_access DESC").fetchall()
+        total, removed = 0, 0
+        for key, size in rows:
+            total += size or 0
+            if total > limit:
+                self.delete(key)
+                removed += 1
+        return removed
+
+    def entries(self) -> pd.DataFrame:
+        with self._connect() as con:
+            return pd.read_sql_query(
+                "SELECT key, name, size, created, last_access, files FROM entries ORDER BY last_access DESC", con
+            )
+
+    def invalidate_files(self, paths: Iterable[str | os.PathLike]) -> int:
+        """Удаляет записи, посчитанные из любого из файлов paths. Возвращает число удалённых."""
+        targets = {str(Path(p).resolve()) for p in paths}
+        removed = 0
+        for key, files in self.entries()[["key", "files"]].itertuples(index=False):
+            sources = {str(Path(f).resolve()) for f in json.loads(files or "[]")}
+            if sources & targets:
+                self.delete(key)
+                removed += 1
+        return removed
+
+    def purge(self, name: str | None = None) -> int:
+        """Удаляет все записи (или только записи функции name)."""
+        entries = self.entries()
+        if name is not None:
+            entries = entries[entries["name"] == name]
+        for key in entries["key"]:
+            self.delete(key)
+        return len(entries)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(root: str = str(CACHE_DIR)) -> DiskCache:
+    return DiskCache(root)
+
+
+def disk_cached(files: Iterable[str | os.PathLike] | Callable[..., Iterable[str | os.PathLike]] = (),
+                name: str | None = None):
+    """
+    Декоратор: результат функции (DataFrame) читается с диска, если там уже есть
+    запись с тем же ключом; иначе считается и сохраняется.
+
+    files — входные файлы: список путей или функция от тех же аргументов,
+    что и у декорируемой функции. Одновременные вызовы с тем же ключом
+    ждут один расчёт (utils/single_flight.py).
+    """
+    def decorator(func: Callable[..., pd.DataFrame]) -> Callable[..., pd.DataFrame]:
+        entry_name = name or func.__name__
+
+        def compute(key: str, deps: list, args: tuple, kwargs: dict) -> pd.DataFrame:
+            cache = get_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            cache.put(key, result, entry_name, deps)
+            return result
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            deps = list(files(*args, **kwargs) if callable(files) else files)
+            key = make_key(entry_name, deps, (args, sorted(kwargs.items())))
+            return _misses.do(key, compute, key, deps, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Дисковый кэш отчётов")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="сводка по кэшу")
+    sub.add_parser("list", help="список записей")
+    purge = sub.add_parser("purge", help="удалить записи")
+    purge.add_argument("--name", help="только записи этой функции")
+    purge.add_argument("--all", action="store_true", help="удалить всё")
+    purge.add_argument("--max-mb", type=int, help="ужать кэш до указанного размера (LRU)")
+    args = parser.parse_args(argv)
+
+    cache = get_cache()
+    if args.command == "stats":
+        entries = cache.entries()
+        print(f"Каталог: {cache.root}")
+        print(f"Записей: {len(entries)}, размер: {entries['size'].sum() / 2**20:.1f} МБ "
+              f"(лимит {cache.max_bytes / 2**20:.0f} МБ)")
+        if len(entries):
+            print(entries.groupby("name")["size"].agg(["count", "sum"]).to_string())
+    elif args.command == "list":
+        entries = cache.entries()
+        for col in ("created", "last_access"):
+            entries[col] = pd.to_datetime(entries[col], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        entries["key"] = entries["key"].str[:12]
+        print(entries.to_string(index=False))
+    elif args.command == "purge":
+        if args.max_mb is not None:
+            print(f"Удалено записей: {cache.evict(args.max_mb * 1024 * 1024)}")
+        elif args.all or args.name:
+            print(f"Удалено записей: {cache.purge(None if args.all else args.name)}")
+        else:
+            parser.error("укажите --all, --name или --max-mb")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Выгрузка отчётов одним файлом: ABC по бокалам, ABC по бутылкам,
+ликвидность по категориям и сравнение по месяцам.
+
+Таблицы собираются из тех же кэшированных загрузчиков, что и страницы
+(utils/data.py), и пишутся на диск за один проход
+(preprocessing/scripts/export_bundle.py): xlsx — в режиме constant_memory,
+csv/parquet — zip по файлу на таблицу, html — одна автономная страница
+(данные встроены сжатыми, поиск/сортировка/графики в браузере) для телефонов
+менеджеров: открывается без Streamlit и без расчётов на сервере. Страница отдаёт готовый файл
+в st.download_button открытым файлом, не собирая его в памяти ещё раз.
+
+Из консоли:
+    python -m utils.export [--venue NAME ...] [--format xlsx|csv|parquet|html] [--out PATH]
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+from preprocessing.scripts.export_bundle import EXPORT_FORMATS, export_file_name, wide_month_table, write_report_bundle
+from preprocessing.scripts.liquidity import liquidity_rows, liquidity_tables, prepare_liquidity_input
+from preprocessing.scripts.monthly_matrix import build_product_month_matrix
+from utils import store
+from utils.data import LIQUIDITY_AFTER, load_abc, load_daily_sales
+from utils.venues import NETWORK, venue_names
+
+EXPORT_DIR = store.PROCESSED_DIR / "exports"
+
+# Листы ликвидности — отдельно по бокалам (раздел каталога, как на странице 08) и по бутылкам
+LIQUIDITY_KINDS = {"бокал": "XYZ бок.", "бутылка": "XYZ бут."}
+
+
+def liquidity_sheets(daily: pd.DataFrame, after: date = LIQUIDITY_AFTER) -> dict[str, pd.DataFrame]:
+    """
+    Ликвидность (ABC/XYZ по неделям) после даты after — тот же расчёт, что на страницах 07/08
+    (liquidity_tables). Бокалы и бутылки считаются отдельно: по листу на вид × подкатегорию only_glass_cat.
+    """
+    sheets = {}
+    for kind, label in LIQUIDITY_KINDS.items():
+        df = prepare_liquidity_input(liquidity_rows(daily, after, kind), "only_glass_cat")
+        if df.empty:
+            continue
+        tables = liquidity_tables(df, category_col="category", main_category_col="main_category")
+        sheets.update({f"{label} {cat}": table for cat, table in tables.items()})
+    return sheets
+
+
+def monthly_sheet(daily: pd.DataFrame) -> pd.DataFrame:
+    """Сравнение по месяцам за весь период данных: товар × месяц (final_sum)."""
+    months = daily["month"].dropna()
+    if months.empty:
+        return pd.DataFrame(columns=["Товар", "Сумма за период"])
+    pm = build_product_month_matrix(daily, months.min(), months.max(), value_col="final_sum")
+    return wide_month_table(pm.products, pm.periods, pm.values)
+
+
+def build_report_sheets(venues: tuple[str, ...]) -> dict[str, pd.DataFrame]:
+    """Все листы выгрузки по заведению или сети, в порядке листов книги."""
+    daily = load_daily_sales(venues)
+    sheets = {
+        "ABC бокалы": load_abc("бокал", "revenue", venues),
+        "ABC бутылки": load_abc("бутылка", "revenue", venues),
+    }
+    sheets.update(liquidity_sheets(daily))
+    sheets["По месяцам"] = monthly_sheet(daily)
+    return sheets
+
+
+def bundle_stem(venues: tuple[str, ...]) -> str:
+    label = venues[0] if len(venues) == 1 else NETWORK
+    return f"report_{label}_{date.today():%Y-%m-%d}".replace(" ", "_")
+
+
+def export_report(venues: tuple[str, ...], fmt: str = "xlsx", path: str | Path | None = None) -> Path:
+    """Пишет полный отчёт в файл (по умолчанию — в processed/exports/) и возвращает путь."""
+    if path is None:
+        path = EXPORT_DIR / export_file_name(bundle_stem(venues), fmt)
+    return Path(write_report_bundle(build_report_sheets(venues), path, fmt))
+
+
+def export_table(df: pd.DataFrame, sheet: str, stem: str, fmt: str = "xlsx") -> Path:
+    """Одна таблица страницы — в файл processed/exports/<stem>.<ext>."""
+    return Path(write_report_bundle({sheet: df}, EXPORT_DIR / export_file_name(stem, fmt), fmt))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка отчётов одним файлом")
+    parser.add_argument("--venue", action="append", help="заведение (можно несколько раз; по умолчанию — вся сеть)")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="xlsx")
+    parser.add_argument("--out", help="путь к файлу (по умолчанию processed/exports/)")
+    args = parser.parse_args(argv)
+
+    venues = tuple(args.venue or venue_names())
+    path = export_report(venues, args.format, args.out)
+    print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
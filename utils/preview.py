@@ -0,0 +1,73 @@
+"""
+Быстрый предпросмотр для исследовательских страниц (04, 05, 06).
+
+Если на странице включён «Быстрый предпросмотр», первый показ строится
+по стратифицированной выборке дневных продаж (utils.data.load_daily_preview):
+суммы масштабируются весами слоёв, рядом показывается оценка погрешности.
+Точные дневные продажи тем временем считаются в фоне (utils/background.py);
+когда они готовы, страница перезапускается и показывает точный результат.
+"""
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from preprocessing.scripts.stratified_sample import estimate_totals
+from utils import background, store
+from utils.data import PREVIEW_STRATA, load_daily_preview, load_daily_sales
+
+
+def _warm_daily_sales(venues: tuple[str, ...]) -> None:
+    # результат остаётся в кэше load_daily_sales, в Future его не держим
+    load_daily_sales(venues)
+
+
+def use_preview(venues: tuple[str, ...], key: str) -> bool:
+    """
+    Переключатель «Быстрый предпросмотр». True — показывать выборку:
+    предпросмотр включён, а точные дневные продажи ещё считаются в фоне.
+    """
+    preview = st.checkbox("⚡ Быстрый предпросмотр", key=f"{key}_preview",
+                          help="Сначала показать оценку по выборке, точный расчёт подставится сам, когда будет готов")
+    if not preview:
+        return False
+    # с версией данных: после новой выгрузки слежение сбрасывает кэш загрузчика — прогрев запускается заново
+    job = background.submit(("daily_sales", venues, store.data_version(venues)), _warm_daily_sales, venues)
+    return not job.done()
+
+
+def daily_sales_or_preview(venues: tuple[str, ...], key: str) -> tuple[pd.DataFrame, bool]:
+    """
+    Переключатель предпросмотра и загрузка данных.
+    Возвращает (дневные продажи, это_выборка). Выборка — с колонкой weight.
+    """
+    if use_preview(venues, key):
+        return load_daily_preview(venues), True
+    return load_daily_sales(venues), False
+
+
+def weighted(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Копия выборки, где колонки-суммы умножены на веса слоёв (оценки сумм генеральной совокупности)."""
+    return df.assign(**{col: df[col] * df["weight"] for col in columns})
+
+
+def estimate(df: pd.DataFrame, value_col: str, by=None) -> pd.DataFrame:
+    """Оценка сумм value_col по группам by с ошибкой (см. estimate_totals)."""
+    return estimate_totals(df, value_col, by=by, strata=PREVIEW_STRATA)
+
+
+def preview_notice(sample: pd.DataFrame, value_col: str) -> None:
+    """Плашка «это предпросмотр» с погрешностью общей суммы (±2σ)."""
+    total = estimate(sample, value_col)
+    rel = float(total["rel_error"].iloc[0]) if len(total) else 0.0
+    st.info(f"Предпросмотр по выборке ({len(sample):,} строк): общая сумма ≈ ±{2 * rel:.1%}. "
+            "Точный результат считается в фоне и появится автоматически.".replace(",", " "))
+
+
+def refresh_until_exact(is_preview: bool) -> None:
+    """Вызывать в конце страницы: пока показан предпросмотр, перезапускает страницу раз в секунду."""
+    if is_preview:
+        time.sleep(1)
+        st.rerun()
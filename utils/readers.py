@@ -0,0 +1,187 @@
+"""
+Чтение файлов с продажами для отчётов по ликвидности (страницы 07, 08).
+
+Поддерживаются Excel (xlsx/xls), CSV, CSV в gzip (.csv.gz) и Parquet.
+CSV читается кусками, Parquet — батчами: фильтр по дате и отбор колонок
+применяются прямо во время чтения, поэтому строки до даты отсечения
+в памяти не накапливаются.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+import pandas as pd
+import streamlit as st
+
+from utils.disk_cache import disk_cached, file_digest
+from utils.shared import SHARED_ENTRIES, freeze
+
+# Расширения для st.file_uploader (".csv.gz" Streamlit проверяет по последнему суффиксу)
+UPLOAD_TYPES = ["xlsx", "xls", "csv", "gz", "parquet"]
+
+CHUNK_ROWS = 200_000
+
+# Форматы даты продажи по очереди: выгрузки iiko (как load_and_prepare_dish), ISO (csv/parquet
+# из pandas), iiko без времени. Без явного формата pandas читает 01.07.2025 как 7 января.
+DATETIME_FORMATS = ("%d.%m.%Y %H:%M", "ISO8601", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y")
+
+# Дайджесты загруженных файлов: загрузка (file_id) → sha256, чтобы не хэшировать файл на каждом перезапуске
+_upload_digests: dict[tuple, str] = {}
+_upload_lock = threading.Lock()
+
+
+def detect_format(name: str) -> str:
+    name = name.lower()
+    if name.endswith((".xlsx", ".xls")):
+        return "excel"
+    if name.endswith((".csv", ".csv.gz", ".gz")):
+        return "csv"
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    raise ValueError(f"Неподдерживаемый формат файла: {name}")
+
+
+def _pick(columns: Iterable[str], options: Iterable[str]) -> str | None:
+    columns = set(columns)
+    for c in options:
+        if c in columns:
+            return c
+    return None
+
+
+def parse_datetimes(values: pd.Series) -> pd.Series:
+    """Дата продажи из текста или Excel: день первым (DATETIME_FORMATS); не разобранное — NaT."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, format=DATETIME_FORMATS[0], errors="coerce")
+    for fmt in DATETIME_FORMATS[1:]:
+        rest = parsed.isna() & values.notna()
+        if not rest.any():
+            break
+        parsed[rest] = pd.to_datetime(values[rest], format=fmt, errors="coerce")
+    return parsed
+
+
+def _filter_after(df: pd.DataFrame, dt_col: str | None, after: datetime | None) -> pd.DataFrame:
+    if dt_col is None or dt_col not in df.columns:
+        return df
+    df[dt_col] = parse_datetimes(df[dt_col])
+    if after is None:
+        return df.dropna(subset=[dt_col])
+    # с начала дня after — как liquidity_rows на страницах, в выгрузке и API
+    return df.loc[df[dt_col] >= after]
+
+
+def _read_csv(source, name: str, usecols, datetime_options, after) -> pd.DataFrame:
+    compression = "gzip" if name.lower().endswith(".gz") else None
+    parts, dt_col = [], None
+    for chunk in pd.read_csv(source, chunksize=CHUNK_ROWS, usecols=usecols, compression=compression):
+        if dt_col is None:
+            dt_col = _pick(chunk.columns, datetime_options)
+        parts.append(_filter_after(chunk, dt_col, after))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+
+def _read_parquet(source, usecols, datetime_options, after) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(source)
+    names = pf.schema_arrow.names
+    columns = [c for c in names if usecols is None or usecols(c)]
+    dt_col = _pick(columns, datetime_options)
+    parts = [
+        _filter_after(batch.to_pandas(), dt_col, after)
+        for batch in pf.iter_batches(batch_size=CHUNK_ROWS, columns=columns)
+    ]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True)
+
+
+def read_sales_file(source: str | os.PathLike | BinaryIO,
+                    name: str | None = None,
+                    columns: Iterable[str] | None = None,
+                    datetime_options: Iterable[str] = ("open_time",),
+                    after: datetime | None = None) -> pd.DataFrame:
+    """
+    Читает файл продаж любого поддерживаемого формата.
+
+    source — путь или файловый объект (например, из st.file_uploader);
+    name — имя файла для определения формата (по умолчанию берётся из source);
+    columns — какие колонки оставить (None — все);
+    datetime_options — варианты названия колонки даты, берётся первая найденная;
+    after — оставить только строки с этого момента (начала дня) и позже.
+    """
+    name = name or getattr(source, "name", None) or str(source)
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    datetime_options = list(datetime_options)
+
+    fmt = detect_format(name)
+    if fmt == "csv":
+        return _read_csv(source, name, usecols, datetime_options, after)
+    if fmt == "parquet":
+        return _read_parquet(source, usecols, datetime_options, after)
+
+    df = pd.read_excel(source, usecols=usecols)
+    return _filter_after(df, _pick(df.columns, datetime_options), after).reset_index(drop=True)
+
+
+def source_digest(uploaded=None, path: str | os.PathLike | None = None) -> str:
+    """
+    Версия источника продаж для ключей расчётов страниц (background.latest_result):
+    sha256 содержимого загруженного файла или файла на диске. Тот же файл с новыми
+    данными (то же имя и размер) даёт новый ключ.
+    """
+    if uploaded is None:
+        return file_digest(path)
+    key = (getattr(uploaded, "file_id", None), uploaded.name, uploaded.size)
+    with _upload_lock:
+        digest = _upload_digests.get(key) if key[0] is not None else None
+    if digest is None:
+        digest = hashlib.sha256(uploaded.getvalue()).hexdigest()
+        if key[0] is not None:
+            with _upload_lock:
+                _upload_digests[key] = digest
+    return digest
+
+
+@st.cache_data(show_spinner=False)
+def load_uploaded_sales(uploaded, columns: tuple[str, ...] | None, datetime_options: tuple[str, ...],
+                        after: datetime | None) -> pd.DataFrame:
+    """read_sales_file для файла из st.file_uploader (кэш по содержимому файла)."""
+    uploaded.seek(0)
+    return read_sales_file(uploaded, uploaded.name, columns, datetime_options, after)
+
+
+def load_sales_path(path: str, columns: tuple[str, ...] | None, datetime_options: tuple[str, ...],
+                    after: datetime | None) -> pd.DataFrame:
+    """
+    read_sales_file для файла на диске: одна таблица на процесс для всех сессий
+    (utils/shared.py) — только чтение; на диске кэш переживает перезапуск.
+    Кэш — по содержимому файла: заменённый на месте файл читается заново.
+    """
+    return _load_sales_path(path, file_digest(path), columns, datetime_options, after)
+
+
+@st.cache_resource(show_spinner=False, max_entries=SHARED_ENTRIES)
+def _load_sales_path(path: str, digest: str, columns: tuple[str, ...] | None, datetime_options: tuple[str, ...],
+                     after: datetime | None) -> pd.DataFrame:
+    return freeze(_read_sales_path(path, columns, datetime_options, after))
+
+
+# Для слежения: очищается при смене файлов, чтобы не держать в памяти прежние версии
+PATH_LOADERS = (_load_sales_path,)
+
+
+@disk_cached(files=lambda path, *args, **kwargs: [path])
+def _read_sales_path(path: str, columns: tuple[str, ...] | None, datetime_options: tuple[str, ...],
+                     after: datetime | None) -> pd.DataFrame:
+    return read_sales_file(Path(path), Path(path).name, columns, datetime_options, after)
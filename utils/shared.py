@@ -0,0 +1,33 @@
+"""
+Общие для всех сессий таблицы: одна копия данных на процесс Streamlit.
+
+st.cache_data при каждом обращении отдаёт новую копию результата (распаковывает
+его из кэша), поэтому десять менеджеров на одной странице держали десять копий
+продаж. Большие таблицы (дневные продажи, строки продаж, файлы отчётов 03, 07, 08)
+поэтому кэшируются через st.cache_resource: объект один на процесс, сессии его
+только читают.
+
+Чтобы общий объект нельзя было испортить со страницы:
+  • строковые колонки переводятся в Arrow (string[pyarrow]): неизменяемые
+    буферы, к тому же заметно компактнее object-строк;
+  • страницы не пишут в саму общую таблицу: новые колонки — через
+    df.assign(...), фильтры — df.loc[...], а перед присваиванием колонок
+    берётся своя копия df.copy().
+Глобальные настройки pandas (mode.copy_on_write) модуль не меняет.
+"""
+from __future__ import annotations
+
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+# Сколько разных общих таблиц одного загрузчика держать (заведения/сеть, файлы, даты отсечения)
+SHARED_ENTRIES = 8
+
+STRING_DTYPE = "string[pyarrow]"
+
+
+def freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """Таблица для общего доступа: object-колонки со строками — в Arrow-строки."""
+    strings = {col: STRING_DTYPE for col in df.columns
+               if df[col].dtype == object and infer_dtype(df[col], skipna=True) == "string"}
+    return df.astype(strings) if strings else df
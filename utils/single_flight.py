@@ -0,0 +1,58 @@
+"""
+Один расчёт на одинаковые одновременные запросы (single flight).
+
+Когда приходит новая выгрузка, несколько менеджеров открывают тот же отчёт
+почти одновременно, и каждая сессия запускала бы ту же сборку заведения
+(process_wine_sales → агрегаты ABC) или то же чтение Excel. Здесь первый
+запрос с данным ключом считает, а остальные, пришедшие пока он считает,
+ждут его Future и получают тот же результат (или ту же ошибку). После
+завершения ключ забывается: результат хранят кэши выше (st.cache_*, дисковый
+кэш, processed/), а не этот модуль.
+
+Ключ — те же входные данные, по которым кэширует слой выше: ключ дискового
+кэша, заведение + дайджесты его исходников, ETag ответа API.
+Работает внутри одного процесса (сессии Streamlit и потоки HTTP API).
+
+Использование:
+    _builds = SingleFlight()
+    _builds.do(key, build_venue, venue)
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+class SingleFlight:
+    """Одновременные вызовы do() с одинаковым ключом выполняют fn один раз."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as err:
+            call.set_exception(err)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Сколько расчётов сейчас идёт."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,684 @@
+"""
+Хранилище обработанных данных (processed/), разбитое по заведениям.
+
+    processed/<заведение>/
+      sales.parquet        — строки продаж после process_wine_sales за последние RAW_MONTHS месяцев
+      rollup.parquet       — более ранние продажи, свёрнутые до дня × позиции (retention.rollup_sales)
+      daily.parquet        — дневной агрегат (день × позиция × категория × бокал/бутылка), оба слоя
+      abc_glass.parquet    — агрегат для ABC по бокалам (aggregate_abc)
+      abc_bottle.parquet   — агрегат для ABC по бутылкам
+      sample.parquet       — стратифицированная выборка дневного агрегата (месяц × категория),
+                             для быстрого предпросмотра
+      dish.parquet         — выгрузки продаж без повторов (колонки для соединения с каталогом),
+                             последние RAW_MONTHS месяцев
+      catalog_versions.parquet — версии каталога: цены и себестоимость с датой начала действия
+      article_mapping.parquet — продажи без кода в каталоге, сопоставленные по названию
+      mapped/<версия>/     — sales.arrow и daily.arrow (Arrow IPC без сжатия) для чтения
+                             отображением в память; mapped/CURRENT — действующая версия
+      orders.parquet       — заказы (все блюда): чек, гости, вино бокалами/бутылками
+      order_categories.parquet — заказ × категория вина
+      rollup_orders.parquet, rollup_order_categories.parquet — то же для свёрнутых месяцев
+      manifest.json        — дайджесты исходных файлов и версия кода
+
+Сетевые отчёты объединяют готовые агрегаты заведений, а не сырые строки.
+
+Хранение по слоям: строками хранятся только последние RAW_MONTHS месяцев
+(VINOLOGIA_RAW_MONTHS, 0 — хранить всё строками), более ранние месяцы —
+дневными агрегатами по позиции. Дневной агрегат, ABC и заказы собираются
+по обоим слоям, поэтому отчёты видят всю историю, а объём строк и время
+загрузки не растут с годами. Свёрнутый слой пересчитывается только при
+полной сборке из выгрузок data/.
+
+Новая выгрузка продаж (очередной день) не требует полной сборки: её строки
+дописываются к продажам и дневному агрегату, а ABC обновляется IncrementalABC
+(preprocessing/scripts/abc_incremental.py) — только по затронутым позициям.
+
+Пересборка из консоли (заведения считаются параллельно в отдельных процессах):
+    python -m utils.store build [--venue NAME] [--workers N] [--force]
+    python -m utils.store status
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from preprocessing.scripts.order_metrics import ORDER_KEYS, build_orders
+from preprocessing.scripts.retention import abc_input, daily_from_tiers, old_tier, raw_cutoff, rollup_sales
+from preprocessing.scripts.load_and_prepare_all_dish import load_and_prepare_dish
+from preprocessing.scripts.load_and_prepare_wine_article import load_and_prepare_wine_articles, change_article_category, \
+    load_article_codes
+from preprocessing.scripts.prepare_for_abc_analys_merge import process_wine_sales
+from preprocessing.scripts.abc_analys import aggregate_abc
+from preprocessing.scripts.abc_incremental import IncrementalABC
+from preprocessing.scripts.article_matching import apply_mapping, match_unmatched
+from preprocessing.scripts.article_versions import add_valid_to, append_catalog_version, build_article_versions, catalog_valid_from
+from preprocessing.scripts.stratified_sample import stratified_sample
+from preprocessing.scripts.venue_aggregates import aggregate_daily_sales, merge_daily_aggregates
+from utils.disk_cache import ROOT, code_version, file_digest
+from utils.single_flight import SingleFlight
+from utils.venues import Venue, discover_venues, get_venue
+
+PROCESSED_DIR = Path(os.environ.get("VINOLOGIA_PROCESSED_DIR", ROOT / "processed"))
+
+SALES_FILE = "sales.parquet"
+ROLLUP_FILE = "rollup.parquet"
+DAILY_FILE = "daily.parquet"
+ABC_FILES = {"бокал": "abc_glass.parquet", "бутылка": "abc_bottle.parquet"}
+SAMPLE_FILE = "sample.parquet"
+DISH_FILE = "dish.parquet"
+CATALOG_FILE = "catalog_versions.parquet"
+MAPPING_FILE = "article_mapping.parquet"
+ORDERS_FILE = "orders.parquet"
+ORDER_CATEGORIES_FILE = "order_categories.parquet"
+ROLLUP_ORDERS_FILE = "rollup_orders.parquet"
+ROLLUP_ORDER_CATEGORIES_FILE = "rollup_order_categories.parquet"
+MANIFEST_FILE = "manifest.json"
+
+# Отображаемые в память копии продаж и дневного агрегата: mapped/<версия>/*.arrow,
+# действующая версия — в mapped/CURRENT; хранится MAPPED_KEEP последних версий
+MAPPED_DIR = "mapped"
+CURRENT_FILE = "CURRENT"
+MAPPED_KEEP = 2
+
+# Колонки выгрузок продаж, нужные для соединения с каталогом (dish.parquet)
+DISH_COLUMNS = ["open_time", "article", "dish", "price", "quantity", "final_sum",
+                "quantity_milli", "price_kop", "final_sum_kop",
+                "session_id", "order_id", "guest_no", "table_no"]
+
+# Сколько последних месяцев продаж хранить строками; более ранние — свёрнутыми по дням
+RAW_MONTHS = int(os.environ.get("VINOLOGIA_RAW_MONTHS", 24))
+
+# Слои выборки для предпросмотра: месяц × категория «по бокалам»
+SAMPLE_STRATA = ["month", "only_glass_cat"]
+
+# Одна сборка заведения на процесс, сколько бы сессий ни открыли его одновременно
+_builds = SingleFlight()
+
+
+def venue_dir(name: str) -> Path:
+    return PROCESSED_DIR / name
+
+
+def sales_path(name: str) -> Path:
+    return venue_dir(name) / SALES_FILE
+
+
+def daily_path(name: str) -> Path:
+    return venue_dir(name) / DAILY_FILE
+
+
+def abc_path(name: str, mode: str) -> Path:
+    return venue_dir(name) / ABC_FILES[mode]
+
+
+def _write_atomic(path: Path, write: Callable[[Path], None]) -> None:
+    """
+    Пишет файл во временный рядом (имя уникально для каждой записи) и атомарно
+    подменяет им path: параллельные записи не портят файлы друг друга.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(Path(tmp))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> None:
+    _write_atomic(path, lambda tmp: df.to_parquet(tmp, index=False))
+
+
+def _write_arrow(df: pd.DataFrame, path: Path) -> None:
+    """Arrow IPC без сжатия: такой файл читается отображением в память, без разбора."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def publish_mapped(name: str, tables: dict[str, pd.DataFrame]) -> str:
+    """
+    Пишет таблицы новой версией mapped/<версия>/<таблица>.arrow и атомарно
+    переключает на неё mapped/CURRENT. Процессы, которые уже отобразили старую
+    версию, дочитывают её (отображение держит файл), новые берут новую.
+    """
+    root = venue_dir(name) / MAPPED_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    target = Path(tempfile.mkdtemp(dir=root, prefix=f"{time.time_ns():x}-"))
+    version = target.name
+    for table, df in tables.items():
+        _write_arrow(df, target / f"{table}.arrow")
+
+    _write_atomic(root / CURRENT_FILE, lambda tmp: tmp.write_text(version, encoding="utf-8"))
+
+    # старые версии: текущую и предыдущую оставляем (её могли только что прочитать из CURRENT)
+    old = sorted((p for p in root.iterdir() if p.is_dir() and p.name != version), key=lambda p: p.stat().st_mtime)
+    for stale in old[:-(MAPPED_KEEP - 1) or None]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return version
+
+
+def mapped_path(name: str, table: str) -> Path | None:
+    """Файл таблицы текущей версии mapped/, если он есть."""
+    root = venue_dir(name) / MAPPED_DIR
+    try:
+        version = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    path = root / version / f"{table}.arrow"
+    return path if path.exists() else None
+
+
+def _arrow_dtype(arrow_type: pa.DataType):
+    # строки остаются в буферах Arrow (string[pyarrow]) — без копирования в object
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def read_mapped(path: str | os.PathLike, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Таблица из Arrow IPC через отображение в память: числа без пропусков и даты
+    становятся представлениями над страницами файла (общими для всех процессов
+    через кэш ОС), строки — Arrow-строками над теми же страницами.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True, types_mapper=_arrow_dtype)
+
+
+def sample_daily(daily: pd.DataFrame) -> pd.DataFrame:
+    """Стратифицированная выборка дневного агрегата (month в файл не пишется — считается при чтении)."""
+    sample = stratified_sample(daily.assign(month=daily["open_time"].dt.to_period("M")), SAMPLE_STRATA)
+    return sample.drop(columns="month")
+
+
+def _manifest(venue: Venue) -> dict:
+    return {
+        "venue": venue.name,
+        "sources": {str(p): file_digest(p) for p in venue.source_files},
+        "code": code_version(),
+        "raw_months": RAW_MONTHS,
+    }
+
+
+def read_manifest(name: str) -> dict | None:
+    path = venue_dir(name) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def is_fresh(venue: Venue) -> bool:
+    """Собранные данные соответствуют текущим исходникам и коду."""
+    manifest = read_manifest(venue.name)
+    if manifest is None:
+        return False
+    current = _manifest(venue)
+    return all(manifest.get(k) == current[k] for k in ("sources", "code", "raw_months"))
+
+
+def data_version(names: tuple[str, ...] | list[str]) -> str:
+    """
+    Версия данных заведений: хэш дайджестов их исходных файлов и версии кода.
+    Меняется ровно тогда, когда меняются готовые агрегаты (см. is_fresh).
+    """
+    sources = {name: _manifest(get_venue(name)) for name in sorted(names)}
+    return hashlib.sha256(json.dumps(sources, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def prepare_venue_dish(venue: Venue) -> pd.DataFrame:
+    """Все выгрузки продаж заведения без повторов — только колонки, нужные для соединения с каталогом."""
+    dish = pd.concat([load_and_prepare_dish(p) for p in venue.dish_files], ignore_index=True)
+    # выгрузки за соседние периоды могут пересекаться
+    dish = dish.drop_duplicates()
+    return dish[[c for c in DISH_COLUMNS if c in dish.columns]]
+
+
+def _catalog_snapshot(venue: Venue, path: Path) -> tuple[pd.Timestamp, pd.DataFrame, str]:
+    article = load_and_prepare_wine_articles(path, **venue.catalog_options)
+    return catalog_valid_from(path), change_article_category(article), file_digest(path)
+
+
+def update_catalog_versions(venue: Venue, versions: pd.DataFrame | None) -> tuple[pd.DataFrame, pd.Timestamp | None]:
+    """
+    Дописывает в версии каталога выгрузки, которых там ещё нет (по дайджесту файла).
+    Возвращает (версии, с какого дня изменились цены продаж — None, если ничего не поменялось).
+    """
+    known = set() if versions is None else set(versions["source"])
+    earliest = None if versions is None or versions.empty else versions["valid_from"].min()
+    changed_from = None
+    for path in venue.article_paths:
+        digest = file_digest(path)
+        if digest in known:
+            continue
+        valid_from, article, _ = _catalog_snapshot(venue, path)
+        versions = append_catalog_version(versions, article, valid_from, digest)
+        if (versions["source"] == digest).any():
+            changed_from = valid_from if changed_from is None else min(changed_from, valid_from)
+    if changed_from is not None and earliest is not None and changed_from < earliest:
+        # каталог старше всех версий: продажи до первой версии тоже меняют цену
+        changed_from = pd.Timestamp.min
+    return add_valid_to(versions), changed_from
+
+
+def read_reviewed_mapping(venue: Venue) -> pd.DataFrame | None:
+    """Проверенные вручную сопоставления data/<заведение>/article_mapping.csv, если файл есть."""
+    path = venue.mapping_review_path
+    if not path.exists():
+        return None
+    # артикул — текст: коды с ведущими нулями не должны превращаться в числа
+    return pd.read_csv(path, usecols=["dish", "article", "status"], dtype={"article": str}, encoding="utf-8-sig")
+
+
+def map_unmatched_dish(venue: Venue, dish: pd.DataFrame, versions: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Строки продаж, чей код блюда не найден в каталоге, сопоставляются по названию
+    (article_matching). Возвращает (продажи с подставленными артикулами, таблица сопоставлений).
+    """
+    known = pd.concat([load_article_codes(p) for p in venue.article_paths], ignore_index=True)
+    mapping = match_unmatched(dish, versions, known)
+    return apply_mapping(dish, mapping, versions["article"], read_reviewed_mapping(venue)), mapping
+
+
+def _same_auto_pairs(old: pd.DataFrame, new: pd.DataFrame) -> bool:
+    def pairs(m: pd.DataFrame) -> set:
+        return set(m.loc[m["status"] == "auto", ["dish", "article"]].itertuples(index=False, name=None))
+    return pairs(old) == pairs(new)
+
+
+def prepare_venue_sales(venue: Venue) -> pd.DataFrame:
+    """Полный пайплайн для одного заведения: выгрузки + версии его каталога -> продажи вина."""
+    versions = build_article_versions([_catalog_snapshot(venue, p) for p in venue.article_paths])
+    dish, _ = map_unmatched_dish(venue, prepare_venue_dish(venue), versions)
+    return process_wine_sales(dish, versions)
+
+
+def _catalog_only_change(venue: Venue) -> bool:
+    """
+    С прошлой сборки добавились только выгрузки каталога: продажи и код те же,
+    прежние каталоги на месте — тогда достаточно дописать версию каталога.
+    """
+    previous = read_manifest(venue.name)
+    if previous is None or previous.get("code") != code_version() or previous.get("raw_months") != RAW_MONTHS:
+        return False
+    out = venue_dir(venue.name)
+    if not all((out / f).exists() for f in (DISH_FILE, CATALOG_FILE, DAILY_FILE, MAPPING_FILE, ROLLUP_FILE)):
+        return False
+    current = _manifest(venue)["sources"]
+    old = previous.get("sources", {})
+    catalogs = {str(p) for p in venue.article_paths}
+    # всё, кроме каталогов (продажи, проверенные сопоставления), должно совпасть
+    same_rest = {k: v for k, v in old.items() if k not in catalogs} == \
+        {k: v for k, v in current.items() if k not in catalogs}
+    return same_rest and all(current.get(k) == v for k, v in old.items() if k in catalogs)
+
+
+def _new_sales_files(venue: Venue) -> list[Path]:
+    """
+    С прошлой сборки только добавились выгрузки продаж: прежние исходники, код и
+    сборка на месте. Возвращает новые выгрузки (пусто — нужна другая сборка).
+    """
+    previous = read_manifest(venue.name)
+    if previous is None or previous.get("code") != code_version() or previous.get("raw_months") != RAW_MONTHS:
+        return []
+    out = venue_dir(venue.name)
+    needed = (DISH_FILE, CATALOG_FILE, SALES_FILE, DAILY_FILE, MAPPING_FILE, *ABC_FILES.values())
+    if not all((out / f).exists() for f in needed):
+        return []
+    # продажи дописываются первыми: если прошлая дозагрузка прервалась, строк больше, чем в манифесте
+    if pq.read_metadata(out / SALES_FILE).num_rows != previous.get("rows"):
+        return []
+    current = _manifest(venue)["sources"]
+    old = previous.get("sources", {})
+    if any(current.get(k) != v for k, v in old.items()):
+        return []
+    added = current.keys() - old.keys()
+    dish_files = {str(p): p for p in venue.dish_files}
+    if not added or not added <= dish_files.keys():
+        return []
+    return [dish_files[k] for k in sorted(added)]
+
+
+def _merge_mappings(previous: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сопоставления после дозагрузки: у уже известных названий rows и final_sum складываются,
+    пример названия остаётся прежний (как 'first' в match_unmatched по всем выгрузкам).
+    """
+    before = previous.set_index("dish")
+    new = new.assign(dish_example=new["dish"].map(before["dish_example"]).fillna(new["dish_example"]),
+                     rows=new["rows"] + new["dish"].map(before["rows"]).fillna(0).astype("int64"),
+                     final_sum=new["final_sum"] + new["dish"].map(before["final_sum"]).fillna(0))
+    merged = pd.concat([new, previous.loc[~previous["dish"].isin(new["dish"])]], ignore_index=True)
+    return merged.sort_values("final_sum", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def append_sales(venue: Venue, new_files: list[Path]) -> dict | None:
+    """
+    Дозагрузка новых выгрузок продаж без полной сборки. Новые строки соединяются
+    с версиями каталога и дописываются к продажам, дневной агрегат — их днями,
+    ABC обновляется IncrementalABC по затронутым позициям (число сменивших класс —
+    в манифесте, abc_changes). Возвращает манифест или None, если дозагрузка
+    невозможна и нужна полная сборка: строки попадают в свёрнутые месяцы или
+    продолжают уже загруженный заказ (число заказов в дневном агрегате сбилось бы).
+    """
+    out = venue_dir(venue.name)
+    previous = read_manifest(venue.name)
+    raw_from = None if previous.get("raw_from") is None else pd.Timestamp(previous["raw_from"])
+
+    dish = pd.read_parquet(out / DISH_FILE)
+    new_dish = pd.concat([load_and_prepare_dish(p) for p in new_files], ignore_index=True).drop_duplicates()
+    if set(new_dish.columns) & set(DISH_COLUMNS) != set(dish.columns):
+        return None
+    try:
+        new_dish = new_dish[list(dish.columns)].astype(dish.dtypes.to_dict())
+    except (TypeError, ValueError):
+        return None
+    # выгрузки за соседние периоды пересекаются: уже загруженные строки второй раз не считаем
+    loaded = new_dish.merge(dish.drop_duplicates(), how="left", indicator=True)["_merge"].eq("both")
+    new_dish = new_dish.loc[~loaded.to_numpy()].reset_index(drop=True)
+    if raw_from is not None and (new_dish["open_time"] < raw_from).any():
+        return None
+    keys = [k for k in ORDER_KEYS if k in dish.columns]
+    if keys and len(keys) == len(ORDER_KEYS) and \
+            len(new_dish[keys].dropna().drop_duplicates().merge(dish[keys].dropna().drop_duplicates())):
+        return None
+
+    rows = previous.get("rows", 0)
+    abc_changes = {mode: 0 for mode in ABC_FILES}
+    if len(new_dish):
+        versions = pd.read_parquet(out / CATALOG_FILE)
+        mapped_dish, new_mapping = map_unmatched_dish(venue, new_dish, versions)
+        mapping = _merge_mappings(pd.read_parquet(out / MAPPING_FILE), new_mapping)
+        new_sales = process_wine_sales(mapped_dish, versions)
+        # asof_join дописывает артикулы каталога без продаж: в sales.parquet они уже есть,
+        # а артикулы, впервые проданные в новых строках, там больше не «без продаж»
+        new_sales = new_sales.loc[new_sales["open_time"].notna() | (new_sales["quantity_milli"] != 0)]
+        sales = pd.read_parquet(out / SALES_FILE)
+        sold = sales["open_time"].isna() & (sales["quantity_milli"] == 0) & \
+            sales["article_name"].isin(new_sales["article_name"])
+        sales = pd.concat([sales.loc[~sold], new_sales], ignore_index=True)
+        _write_parquet(sales, out / SALES_FILE)
+        daily = merge_daily_aggregates([pd.read_parquet(out / DAILY_FILE), aggregate_daily_sales(new_sales)])
+        _write_parquet(daily, out / DAILY_FILE)
+        _write_parquet(sample_daily(daily), out / SAMPLE_FILE)
+        for mode, filename in ABC_FILES.items():
+            abc = IncrementalABC.from_aggregate(pd.read_parquet(out / filename), mode)
+            abc_changes[mode] = len(abc.apply_sales(new_sales))
+            _write_parquet(abc.aggregate() if len(abc) else aggregate_abc(new_sales, mode), out / filename)
+        # заказы — по всем строкам слоя, с теми же сопоставлениями по названию
+        recent = pd.concat([apply_mapping(dish, mapping, versions["article"], read_reviewed_mapping(venue)),
+                            mapped_dish], ignore_index=True)
+        orders, order_categories = build_orders(recent, versions)
+        _write_parquet(orders, out / ORDERS_FILE)
+        _write_parquet(order_categories, out / ORDER_CATEGORIES_FILE)
+        publish_mapped(venue.name, {"sales": sales, "daily": daily})
+        _write_parquet(mapping, out / MAPPING_FILE)
+        _write_parquet(pd.concat([dish, new_dish], ignore_index=True), out / DISH_FILE)
+        rows = len(sales)
+
+    manifest = _manifest(venue) | {"built_at": time.time(), "rows": rows, "raw_from": previous.get("raw_from"),
+                                   "catalog_versions": previous.get("catalog_versions"),
+                                   "abc_changes": abc_changes}
+    text = json.dumps(manifest, ensure_ascii=False, indent=2)
+    _write_atomic(out / MANIFEST_FILE, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+    return manifest
+
+
+def build_venue(venue: Venue) -> dict:
+    """
+    Пересобирает processed/<заведение>/ и возвращает манифест.
+
+    Если добавились только новые выгрузки продаж, они дописываются (append_sales).
+    Если добавилась только новая выгрузка каталога, она дописывается версией
+    в catalog_versions.parquet: продажи заново соединяются с версиями из dish.parquet
+    (без чтения Excel), а дневной агрегат пересчитывается только с даты новой версии —
+    более ранние продажи остаются с ценами, действовавшими на момент продажи.
+
+    При полной сборке заказы, начатые раньше последних RAW_MONTHS месяцев, сворачиваются
+    (rollup*.parquet), строками остаются только свежие. Новая версия каталога
+    задним числом в свёрнутые месяцы (или смена RAW_MONTHS) — повод для полной сборки.
+    """
+    out = venue_dir(venue.name)
+    out.mkdir(parents=True, exist_ok=True)
+
+    new_files = _new_sales_files(venue)
+    if new_files:
+        manifest = append_sales(venue, new_files)
+        if manifest is not None:
+            return manifest
+
+    partial = _catalog_only_change(venue)
+    added = set()
+    if partial:
+        previous_versions = pd.read_parquet(out / CATALOG_FILE)
+        versions, changed_from = update_catalog_versions(venue, previous_versions)
+        # артикулы, которых не было ни в одной прежней версии: asof_join отдаёт их первую
+        # версию и продажам до её даты — эти продажи тоже меняются
+        added = set(versions["article"].astype(str)) - set(previous_versions["article"].astype(str))
+        raw_from = read_manifest(venue.name).get("raw_from")
+        raw_from = None if raw_from is None else pd.Timestamp(raw_from)
+        # свёрнутые месяцы пересчитать нельзя: новая цена в них или новые артикулы
+        # (их ранние продажи могли попасть в свёрнутый слой) — полная сборка
+        partial = changed_from is None or raw_from is None or (changed_from >= raw_from and not added)
+    if partial:
+        dish = pd.read_parquet(out / DISH_FILE)
+        previous_mapping = pd.read_parquet(out / MAPPING_FILE)
+        rollup = pd.read_parquet(out / ROLLUP_FILE)
+        old = None
+    else:
+        dish = prepare_venue_dish(venue)
+        raw_from = raw_cutoff(dish["open_time"], RAW_MONTHS)
+        old = old_tier(dish, raw_from)
+        _write_parquet(dish.loc[~old], out / DISH_FILE)
+        versions = build_article_versions([_catalog_snapshot(venue, p) for p in venue.article_paths])
+        changed_from = pd.Timestamp.min
+        previous_mapping = None
+
+    if changed_from is not None:
+        dish, mapping = map_unmatched_dish(venue, dish, versions)
+        if previous_mapping is not None:
+            # названия только из свёрнутых месяцев в частичной сборке не участвуют — оставляем как были
+            kept_names = previous_mapping.loc[~previous_mapping["dish"].isin(mapping["dish"])]
+            mapping = pd.concat([mapping, kept_names], ignore_index=True)
+            if not _same_auto_pairs(previous_mapping, mapping):
+                # новый каталог сопоставил по названию и старые продажи — пересчитываем всё
+                changed_from = pd.Timestamp.min
+        if added:
+            first_sale = dish.loc[dish["article"].astype(str).isin(added), "open_time"].min()
+            if pd.notna(first_sale) and first_sale < changed_from:
+                changed_from = first_sale.normalize()
+        if old is not None:
+            old_dish = dish.loc[old]
+            rollup = rollup_sales(process_wine_sales(old_dish, versions) if len(old_dish) else old_dish)
+            rollup_orders, rollup_categories = build_orders(old_dish, versions)
+            _write_parquet(rollup, out / ROLLUP_FILE)
+            _write_parquet(rollup_orders, out / ROLLUP_ORDERS_FILE)
+            _write_parquet(rollup_categories, out / ROLLUP_ORDER_CATEGORIES_FILE)
+            dish = dish.loc[~old]
+        sales = process_wine_sales(dish, versions)
+        _write_parquet(sales, out / SALES_FILE)
+        if changed_from == pd.Timestamp.min:
+            daily = daily_from_tiers(rollup, sales)
+        else:
+            kept = pd.read_parquet(out / DAILY_FILE)
+            kept = kept.loc[kept["open_time"] < changed_from]
+            # строки без open_time соединены с действующей версией — их тоже пересчитываем
+            recent = sales.loc[~(sales["open_time"] < changed_from)]
+            daily = pd.concat([kept, aggregate_daily_sales(recent)], ignore_index=True)
+        _write_parquet(daily, out / DAILY_FILE)
+        _write_parquet(sample_daily(daily), out / SAMPLE_FILE)
+        for mode, filename in ABC_FILES.items():
+            _write_parquet(aggregate_abc(abc_input(rollup, sales), mode), out / filename)
+        orders, order_categories = build_orders(dish, versions)
+        _write_parquet(orders, out / ORDERS_FILE)
+        _write_parquet(order_categories, out / ORDER_CATEGORIES_FILE)
+        publish_mapped(venue.name, {"sales": sales, "daily": daily})
+        rows = len(sales)
+    else:
+        rows = read_manifest(venue.name).get("rows", 0)
+    # версии и сопоставления пишутся после производных файлов:
+    # если сборка прервётся, следующая повторит пересчёт
+    if changed_from is not None:
+        _write_parquet(mapping, out / MAPPING_FILE)
+    _write_parquet(versions, out / CATALOG_FILE)
+
+    # манифест пишется последним: пока его нет, сборка считается незавершённой
+    manifest = _manifest(venue) | {"built_at": time.time(), "rows": rows,
+                                   "raw_from": None if raw_from is None else raw_from.isoformat(),
+                                   "catalog_versions": int(versions["valid_from"].nunique())}
+    text = json.dumps(manifest, ensure_ascii=False, indent=2)
+    _write_atomic(out / MANIFEST_FILE, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+    return manifest
+
+
+def _build_if_stale(venue: Venue) -> bool:
+    # пока ждали очереди, сборку мог закончить другой поток
+    if is_fresh(venue):
+        return False
+    build_venue(venue)
+    return True
+
+
+def rebuild_if_stale(venue: Venue) -> bool:
+    """
+    Пересобирает заведение, если его данные устарели; True — сборка была.
+    Одновременные вызовы для тех же исходников (сессии, слежение за data/)
+    ждут одну сборку (utils/single_flight.py).
+    """
+    if is_fresh(venue):
+        return False
+    key = json.dumps(_manifest(venue), sort_keys=True)
+    return _builds.do(key, _build_if_stale, venue)
+
+
+def ensure_venue(name: str) -> Path:
+    """Собирает заведение, если его данные устарели. Возвращает каталог заведения."""
+    rebuild_if_stale(get_venue(name))
+    return venue_dir(name)
+
+
+def ensure_venues(names: tuple[str, ...] | list[str], workers: int | None = None) -> None:
+    """Проверяет/собирает несколько заведений параллельно (потоки внутри процесса Streamlit)."""
+    names = list(names)
+    if len(names) <= 1:
+        for name in names:
+            ensure_venue(name)
+        return
+    with ThreadPoolExecutor(max_workers=workers or len(names)) as pool:
+        list(pool.map(ensure_venue, names))
+
+
+def build_all(names: list[str] | None = None, workers: int | None = None, force: bool = False) -> list[dict]:
+    """Пересборка заведений в отдельных процессах (для пакетного запуска)."""
+    venues = [v for v in discover_venues() if names is None or v.name in names]
+    if not force:
+        venues = [v for v in venues if not is_fresh(v)]
+    if not venues:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(build_venue, venues))
+
+
+def read_sales(name: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Строки продаж — только последние RAW_MONTHS месяцев; всю историю дают read_daily и агрегаты ABC."""
+    directory = ensure_venue(name)
+    path = mapped_path(name, "sales")
+    return read_mapped(path, columns) if path else pd.read_parquet(directory / SALES_FILE, columns=columns)
+
+
+def read_daily(name: str) -> pd.DataFrame:
+    directory = ensure_venue(name)
+    path = mapped_path(name, "daily")
+    return read_mapped(path) if path else pd.read_parquet(directory / DAILY_FILE)
+
+
+def read_sample(name: str) -> pd.DataFrame:
+    """
+    Выборка для предпросмотра. Если заведение уже собиралось, файл читается
+    без проверки свежести: предпросмотр приблизительный, а точный результат
+    всё равно считается отдельно.
+    """
+    path = venue_dir(name) / SAMPLE_FILE
+    if not path.exists():
+        path = ensure_venue(name) / SAMPLE_FILE
+    return pd.read_parquet(path)
+
+
+def read_abc_aggregate(name: str, mode: str) -> pd.DataFrame:
+    return pd.read_parquet(ensure_venue(name) / ABC_FILES[mode])
+
+
+def read_rollup(name: str) -> pd.DataFrame:
+    """Свёрнутый слой: продажи старше RAW_MONTHS месяцев по дням и позициям (retention.rollup_sales)."""
+    return pd.read_parquet(ensure_venue(name) / ROLLUP_FILE)
+
+
+def read_orders(name: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Заказы заведения и заказ × категория вина (order_metrics.build_orders) по обоим слоям:
+    номера свежих заказов идут после свёрнутых.
+    """
+    directory = ensure_venue(name)
+    orders = pd.read_parquet(directory / ORDERS_FILE)
+    categories = pd.read_parquet(directory / ORDER_CATEGORIES_FILE)
+    old_orders = pd.read_parquet(directory / ROLLUP_ORDERS_FILE)
+    if old_orders.empty:
+        return orders, categories
+    old_categories = pd.read_parquet(directory / ROLLUP_ORDER_CATEGORIES_FILE)
+    offset = len(old_orders)
+    return (pd.concat([old_orders, orders.assign(order=orders["order"] + offset)], ignore_index=True),
+            pd.concat([old_categories, categories.assign(order=categories["order"] + offset)], ignore_index=True))
+
+
+def read_mapping(name: str) -> pd.DataFrame:
+    return pd.read_parquet(ensure_venue(name) / MAPPING_FILE)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Хранилище обработанных данных по заведениям")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="пересобрать устаревшие заведения")
+    build.add_argument("--venue", action="append", help="только это заведение (можно несколько раз)")
+    build.add_argument("--workers", type=int, help="число процессов")
+    build.add_argument("--force", action="store_true", help="пересобрать даже свежие")
+    sub.add_parser("status", help="состояние заведений")
+    mapping = sub.add_parser("mapping", help="сопоставления продаж без кода в каталоге — в CSV на проверку")
+    mapping.add_argument("--venue", action="append", help="только это заведение (можно несколько раз)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for manifest in build_all(args.venue, args.workers, args.force):
+            print(f"✅ {manifest['venue']}: {manifest['rows']} строк")
+    elif args.command == "status":
+        for venue in discover_venues():
+            state = "актуально" if is_fresh(venue) else "нужна пересборка"
+            print(f"{venue.name:20} {len(venue.dish_files)} выгрузок  {state}")
+    elif args.command == "mapping":
+        for venue in discover_venues():
+            if args.venue and venue.name not in args.venue:
+                continue
+            table = read_mapping(venue.name)
+            path = venue_dir(venue.name) / venue.mapping_review_path.name
+            table.to_csv(path, index=False, encoding="utf-8-sig")
+            review = int((table["status"] == "review").sum())
+            print(f"{venue.name:20} {len(table)} названий, на проверку: {review} -> {path}")
+        print("Проверенный файл (status: approved / rejected) положите в data/<заведение>/article_mapping.csv")
+
+
+if __name__ == "__main__":
+    main()
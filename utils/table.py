@@ -0,0 +1,144 @@
+"""
+Постраничная таблица для больших отчётов.
+
+Поиск и сортировка выполняются на сервере по уже посчитанному (кэшированному)
+DataFrame, а в браузер через st.dataframe уходит только видимая страница строк.
+Полный отчёт при этом не копируется: считаются позиции строк, и .iloc берёт
+только строки текущей страницы.
+
+Поиск идёт по суффиксному массиву значений (preprocessing/scripts/search_index.py):
+индекс строится один раз на таблицу, а каждый набранный символ — это два
+двоичных поиска, без str.contains по всей таблице. Ключ индекса дешёвый:
+data_key от страницы (версия данных и параметры, от которых зависят строки)
+или, если его нет, сам объект таблицы — пока он жив (например, результат
+latest_result в session_state), индекс берётся готовым.
+"""
+from __future__ import annotations
+
+import threading
+import weakref
+from typing import Hashable, Sequence
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from preprocessing.scripts.search_index import SearchIndex, build_search_index
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+# Индексы таблиц без data_key: id таблицы → {колонки: индекс}; запись удаляется
+# вместе с таблицей, поэтому повторно выданный id не найдёт чужой индекс
+_frame_indexes: dict[int, dict[tuple[str, ...], SearchIndex]] = {}
+_frame_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cached_search_index(key: Hashable, _columns: tuple[pd.Series, ...]) -> SearchIndex:
+    # key — data_key страницы, число строк и колонки поиска
+    return build_search_index(_columns)
+
+
+def _frame_search_index(df: pd.DataFrame, columns: tuple[str, ...]) -> SearchIndex:
+    frame_id = id(df)
+    with _frame_lock:
+        index = _frame_indexes.get(frame_id, {}).get(columns)
+    if index is None:
+        index = build_search_index(tuple(df[c] for c in columns))
+        with _frame_lock:
+            if frame_id not in _frame_indexes:
+                _frame_indexes[frame_id] = {}
+                weakref.finalize(df, _frame_indexes.pop, frame_id, None)
+            _frame_indexes[frame_id][columns] = index
+    return index
+
+
+def _search_positions(df: pd.DataFrame, columns: Sequence[str], query: str,
+                      data_key: Hashable | None = None) -> np.ndarray:
+    """Позиции строк, где хотя бы одна из колонок содержит query (регистр и ё/е не важны)."""
+    if not query.strip() or not columns:
+        return np.arange(len(df))
+    columns = tuple(columns)
+    if data_key is None:
+        index = _frame_search_index(df, columns)
+    else:
+        index = _cached_search_index((data_key, len(df), columns), tuple(df[c] for c in columns))
+    return index.search(query)
+
+
+def _sort_positions(df: pd.DataFrame, positions: np.ndarray, column: str | None, ascending: bool) -> np.ndarray:
+    if column is None or len(positions) == 0:
+        return positions
+    values = df[column].iloc[positions].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return positions[order]
+
+
+def paged_table(df: pd.DataFrame,
+                key: str,
+                search_columns: Sequence[str] | None = None,
+                sort_columns: Sequence[str] | None = None,
+                default_sort: str | None = None,
+                default_ascending: bool = False,
+                page_size: int = 50,
+                column_config: dict | None = None,
+                data_key: Hashable | None = None) -> np.ndarray:
+    """
+    Рисует таблицу с поиском, сортировкой и страницами.
+
+    key — уникальный ключ виджетов на странице;
+    search_columns — по каким колонкам искать (по умолчанию — текстовые);
+    sort_columns — варианты сортировки (по умолчанию — все колонки, кроме списков);
+    default_sort — сортировка по умолчанию (None — исходный порядок отчёта);
+    data_key — ключ содержимого df для индекса поиска: всё, от чего зависят строки
+    (версия данных, период, фильтры). None — индекс живёт, пока жив сам объект df.
+
+    Возвращает позиции строк после поиска и сортировки (df.iloc[...] — например, для экспорта).
+    """
+    if search_columns is None:
+        search_columns = [c for c in df.columns
+                          if pd.api.types.is_string_dtype(df[c]) and not _is_list_column(df[c])]
+    if sort_columns is None:
+        sort_columns = [c for c in df.columns if not _is_list_column(df[c])]
+
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    with c1:
+        query = st.text_input("Поиск", key=f"{key}_query", placeholder="название позиции…")
+    with c2:
+        options = ["(как в отчёте)", *sort_columns]
+        index = options.index(default_sort) if default_sort in options else 0
+        sort_by = st.selectbox("Сортировка", options, index=index, key=f"{key}_sort")
+    with c3:
+        ascending = st.checkbox("По возрастанию", value=default_ascending, key=f"{key}_asc")
+    with c4:
+        size = st.selectbox("Строк", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+                            key=f"{key}_size")
+
+    positions = _search_positions(df, search_columns, query, data_key)
+    sort_column = None if sort_by == options[0] else sort_by
+    positions = _sort_positions(df, positions, sort_column, ascending)
+
+    # при смене поиска/сортировки возвращаемся на первую страницу
+    signature = (query, sort_by, ascending, size, len(df))
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_page"] = 1
+
+    pages = max(1, -(-len(positions) // size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(f"Страница (из {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    start = (page - 1) * size
+    visible = positions[start:start + size]
+    st.dataframe(df.iloc[visible], use_container_width=True, hide_index=True, column_config=column_config)
+    st.caption(f"Строки {start + 1 if len(visible) else 0}–{start + len(visible)} из {len(positions)}"
+               + (f" (всего {len(df)})" if len(positions) != len(df) else ""))
+    return positions
+
+
+def _is_list_column(series: pd.Series) -> bool:
+    if series.dtype != object or series.empty:
+        return False
+    return isinstance(series.iloc[0], (list, tuple, np.ndarray))
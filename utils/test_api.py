@@ -0,0 +1,46 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from utils import api
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.ApiHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as err:
+        return err.code, json.loads(err.read())
+
+
+def test_no_venues_is_a_bad_request(server, monkeypatch):
+    monkeypatch.setattr(api, "venue_names", lambda: ())
+    status, body = get(f"{server}/api/abc")
+    assert status == 400
+    assert "venue" in body["error"]
+
+
+def test_unexpected_error_is_a_json_500(server, monkeypatch):
+    def broken(venues, params):
+        raise RuntimeError("битый файл")
+
+    monkeypatch.setattr(api.store, "data_version", lambda venues: "v1")
+    monkeypatch.setitem(api.ENDPOINTS, "monthly", (broken, ()))
+    monkeypatch.setattr(api.ApiHandler, "log_error", lambda self, *args: None)
+    status, body = get(f"{server}/api/monthly?venue=main")
+    assert status == 500
+    assert body == {"error": "RuntimeError: битый файл"}
@@ -0,0 +1,70 @@
+import time
+
+import pandas as pd
+
+from utils import disk_cache
+from utils.disk_cache import DiskCache, file_digest, make_key
+
+
+def frame(rows):
+    return pd.DataFrame({'value': range(rows)})
+
+
+def test_lru_evicts_least_recently_read(tmp_path):
+    cache = DiskCache(tmp_path / 'cache', max_bytes=10**9)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, frame(1000), name=key)
+        time.sleep(0.01)
+    size = int(cache.entries()['size'].max())
+
+    # 'a' прочитан последним — вытесняются 'b', затем 'c'
+    assert cache.get('a') is not None
+    cache.max_bytes = 2 * size
+    cache.put('d', frame(1000), name='d')
+    assert cache.get('b') is None
+    assert set(cache.entries()['key']) == {'a', 'd'}
+
+    assert cache.evict(size) == 1
+    assert list(cache.entries()['key']) == ['d']
+
+
+def test_invalidate_files(tmp_path):
+    cache = DiskCache(tmp_path / 'cache')
+    source, other = tmp_path / 'sales.parquet', tmp_path / 'abc.parquet'
+    cache.put('from_sales', frame(3), files=[source])
+    cache.put('from_other', frame(3), files=[other])
+    assert cache.invalidate_files([source]) == 1
+    assert cache.get('from_sales') is None
+    pd.testing.assert_frame_equal(cache.get('from_other'), frame(3))
+
+
+def test_key_follows_file_contents(tmp_path):
+    path = tmp_path / 'sales.csv'
+    path.write_text('a\n1\n')
+    before = make_key('load', [path], ('x',))
+    assert make_key('load', [path], ('x',)) == before
+    assert make_key('load', [path], ('y',)) != before
+
+    path.write_text('a\n2\n')
+    assert file_digest(path) != file_digest(tmp_path / 'missing.csv')
+    assert make_key('load', [path], ('x',)) != before
+
+
+def test_disk_cached_reuses_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, 'get_cache', lambda: DiskCache(tmp_path / 'cache'))
+    path = tmp_path / 'sales.csv'
+    path.write_text('value\n1\n2\n')
+    calls = []
+
+    @disk_cache.disk_cached(files=lambda p: [p])
+    def load(p):
+        calls.append(p)
+        return pd.read_csv(p)
+
+    first = load(str(path))
+    pd.testing.assert_frame_equal(load(str(path)), first)
+    assert len(calls) == 1
+
+    path.write_text('value\n1\n2\n3\n')
+    assert len(load(str(path))) == 3
+    assert len(calls) == 2
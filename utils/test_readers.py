@@ -0,0 +1,32 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from utils.readers import load_sales_path
+
+
+def write_sales(path, names, mtime):
+    pd.DataFrame({"open_time": ["2025-07-01 12:00"] * len(names), "article_name": names}).to_csv(path, index=False)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_replaced_file_is_read_again(tmp_path):
+    path = tmp_path / "sales.csv"
+    write_sales(path, ["вино"], 1_000_000_000)
+    assert load_sales_path(str(path), None, ("open_time",), None)["article_name"].tolist() == ["вино"]
+
+    # тот же путь, новое содержимое
+    write_sales(path, ["вино", "игристое"], 2_000_000_000)
+    assert load_sales_path(str(path), None, ("open_time",), None)["article_name"].tolist() == ["вино", "игристое"]
+
+
+def test_dates_are_parsed_day_first(tmp_path):
+    path = tmp_path / "report.csv"
+    pd.DataFrame({
+        "open_time": ["01.07.2025 12:00", "13.07.2025 09:30", "2025-07-02 10:00:00", "05.07.2025", "мусор"],
+        "article_name": ["a", "b", "c", "d", "e"],
+    }).to_csv(path, index=False)
+    df = load_sales_path(str(path), None, ("open_time",), datetime(2025, 7, 1))
+    assert df["open_time"].tolist() == [pd.Timestamp("2025-07-01 12:00"), pd.Timestamp("2025-07-13 09:30"),
+                                        pd.Timestamp("2025-07-02 10:00"), pd.Timestamp("2025-07-05")]
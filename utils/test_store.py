@@ -0,0 +1,106 @@
+import json
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from utils import store
+from utils.venues import Venue
+
+DISH_HEADER = ['Код блюда', 'Блюдо', 'Вр. открытия', '№ смены', '№ заказа', '№ стола',
+               'Цена', 'Кол-во', 'Полн. сумма, р.', 'Скидка', 'Итог. сумма, р.', 'Типы оплаты', '№ гостя']
+
+# (артикул, раздел, подраздел, название, цена, себестоимость)
+CATALOG = [
+    (101, 'Красные вина', 'Франция', 'шато марго', 9000, 3000),
+    (102, 'Белые вина', 'Италия', 'соаве классико', 4000, 1500),
+    (103, 'Красные вина', 'Италия', 'кьянти', 5000, 2000),
+    (201, 'ВИНА ПО БОКАЛАМ 150 МЛ', 'Красные 150 мл', 'кьянти бокал', 900, 300),
+    (202, 'ВИНА ПО БОКАЛАМ 150 МЛ', 'Белые 150 мл', 'соаве бокал', 700, 250),
+]
+
+
+def write_catalog(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Каталог'])
+    ws.append([None] * 6 + ['Артикул', 'Цена, р.', 'Себестоимость, р.', 'Себестоимость, %'])
+    for article, category, sub, name, price, cost in CATALOG:
+        ws.append([None, None, None, category, sub, name, article, price, cost, round(cost / price * 100, 2)])
+    wb.save(path)
+
+
+def write_dish(path, day, orders):
+    wb = Workbook()
+    ws = wb.active
+    for _ in range(3):
+        ws.append(['Отчет по блюдам'])
+    ws.append(DISH_HEADER)
+    for order_id, hour, lines in orders:
+        for article, name, price, qty in lines:
+            ws.append([article, name, f'{day} {hour:02d}:00', 1, order_id, 5,
+                       price, qty, price * qty, 0, price * qty, 'карта', 1])
+    wb.save(path)
+
+
+@pytest.fixture
+def venue_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'PROCESSED_DIR', tmp_path / 'processed')
+    data = tmp_path / 'data'
+    data.mkdir()
+    write_catalog(data / 'Блюда артикулы.xlsx')
+    write_dish(data / 'Отчет по блюдам 01.xlsx', '01.03.2025', [
+        (1, 19, [(101, 'шато марго', 9000, 1), (201, 'кьянти бокал', 900, 2)]),
+        (2, 20, [(102, 'соаве классико', 4000, 1), (202, 'соаве бокал', 700, 3)]),
+        # без кода — сопоставляется по названию
+        (3, 21, [(None, 'Шато Марго', 9000, 1)]),
+    ])
+    write_dish(data / 'Отчет по блюдам 02.xlsx', '02.03.2025', [
+        (4, 18, [(103, 'кьянти', 5000, 2), (202, 'соаве бокал', 700, 1)]),
+        (5, 22, [(201, 'кьянти бокал', 900, 6), (None, 'шато  марго', 9000, 1)]),
+    ])
+    return data
+
+
+def make_venue(data, days):
+    dish_files = tuple(sorted(data.glob('Отчет по блюдам*.xlsx')))[:days]
+    return Venue('test', data, dish_files, (data / 'Блюда артикулы.xlsx',))
+
+
+def read_outputs(name):
+    out = store.venue_dir(name)
+    frames = {}
+    for filename in (store.SALES_FILE, store.DAILY_FILE, store.MAPPING_FILE, store.ORDERS_FILE,
+                     *store.ABC_FILES.values()):
+        df = pd.read_parquet(out / filename)
+        keys = [c for c in ('open_time', 'article_name', 'dish', 'article', 'order_id', 'glass') if c in df.columns]
+        frames[filename] = df.sort_values(keys, kind='stable', na_position='last').reset_index(drop=True)
+    return frames
+
+
+def test_appended_sales_match_full_build(venue_files):
+    first = store.build_venue(make_venue(venue_files, 1))
+    assert 'abc_changes' not in first
+
+    appended = store.build_venue(make_venue(venue_files, 2))
+    assert appended['abc_changes']['бокал'] > 0
+    incremental = read_outputs('test')
+
+    (store.venue_dir('test') / store.MANIFEST_FILE).unlink()
+    full = store.build_venue(make_venue(venue_files, 2))
+    assert 'abc_changes' not in full
+    expected = read_outputs('test')
+
+    for filename, df in expected.items():
+        pd.testing.assert_frame_equal(incremental[filename], df, check_dtype=False, obj=filename)
+
+
+def test_overlapping_order_falls_back_to_full_build(venue_files):
+    store.build_venue(make_venue(venue_files, 1))
+    # заказ 3 продолжается во второй выгрузке
+    write_dish(venue_files / 'Отчет по блюдам 02.xlsx', '02.03.2025', [
+        (3, 1, [(201, 'кьянти бокал', 900, 1)]),
+    ])
+    manifest = store.build_venue(make_venue(venue_files, 2))
+    assert 'abc_changes' not in manifest
+    assert json.loads((store.venue_dir('test') / store.MANIFEST_FILE).read_text())['rows'] == manifest['rows']
@@ -0,0 +1,25 @@
+import threading
+
+from utils.warmup import WarmupState
+
+
+def test_errors_can_be_read_while_the_warmup_thread_writes():
+    state = WarmupState(total=1)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            state.add_error(f"шаг {i % 100}", "OSError")
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            for label, err in state.error_items():
+                assert err == "OSError"
+    finally:
+        stop.set()
+        thread.join()
+    assert len(state.error_items()) == len(state.errors)
@@ -0,0 +1,90 @@
+"""
+Тренды категорий бокалов по месяцам (страницы 05 и 06).
+
+Агрегаты категория × год-месяц считаются один раз сразу для всех метрик
+(utils.data.load_category_trends), страницы только выбирают метрику.
+Картинка 2×2 рендерится в PNG и кэшируется по содержимому данных
+(st.cache_data хэширует DataFrame), поэтому перезапуск страницы без
+изменений не перерисовывает matplotlib.
+"""
+from __future__ import annotations
+
+import io
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import streamlit as st
+
+from preprocessing.scripts.category_trends import TREND_CATEGORIES, TREND_METRICS
+from utils.data import load_category_trends, load_daily_preview
+from utils.preview import estimate, preview_notice, refresh_until_exact, use_preview
+from utils.venues import venue_selector
+
+
+def preview_trends(sample: pd.DataFrame) -> pd.DataFrame:
+    """Оценки category_month_trends по выборке: метрики и их стандартные ошибки (<metric>_stderr)."""
+    rows = sample.loc[sample["glass"] == "бокал"]
+    rows = rows.assign(month=rows["open_time"].dt.to_period("M"))
+    trends = None
+    for metric in TREND_METRICS:
+        part = estimate(rows, metric, by=["only_glass_cat", "month"]) \
+            .rename(columns={"only_glass_cat": "category", "estimate": metric, "stderr": f"{metric}_stderr"}) \
+            .drop(columns="rel_error")
+        trends = part if trends is None else trends.merge(part, on=["category", "month"], how="outer")
+    return trends
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def trend_figure_png(trends: pd.DataFrame, metric: str, categories: tuple[str, ...]) -> bytes:
+    """Рисунок 2×2 (по категории на график) в PNG."""
+    label = TREND_METRICS[metric][2]
+    months = pd.period_range(trends["month"].min(), trends["month"].max(), freq="M") if len(trends) else []
+    stderr_col = f"{metric}_stderr"
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8), sharey=True)
+    axes = axes.ravel()
+    for ax, cat in zip(axes, categories):
+        # полная ось месяцев: отсутствующие = 0
+        dfc = trends.loc[trends["category"] == cat].set_index("month").reindex(months).fillna(0.0)
+        x = [m.strftime("%Y-%m") for m in months]
+        ax.plot(x, dfc[metric], marker="o")
+        if stderr_col in dfc.columns:
+            # ±2σ: где-то здесь окажется точное значение
+            ax.fill_between(x, dfc[metric] - 2 * dfc[stderr_col], dfc[metric] + 2 * dfc[stderr_col], alpha=0.2)
+        ax.set_title(cat)
+        ax.set_xlabel("Месяц")
+        ax.set_ylabel(label)
+        ax.grid(True, linestyle="--", alpha=0.4)
+        ax.tick_params(axis="x", rotation=45)
+
+    # Если категорий меньше 4 — уберём лишние оси
+    for j in range(len(categories), 4):
+        fig.delaxes(axes[j])
+
+    fig.suptitle(f"{label} по категориям бокалов (по месяцам)", fontsize=14, y=0.98)
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def trend_page(default_metric: str, key: str) -> None:
+    """Страница тренда: заведение, метрика, рисунок 2×2 по TREND_CATEGORIES."""
+    venues = venue_selector()
+    metric = st.radio("Метрика", list(TREND_METRICS), index=list(TREND_METRICS).index(default_metric),
+                      format_func=lambda m: TREND_METRICS[m][2], horizontal=True, key=f"{key}_metric")
+
+    # в режиме предпросмотра — оценки по выборке, пока точные дневные продажи считаются в фоне
+    is_preview = use_preview(venues, key)
+    if is_preview:
+        sample = load_daily_preview(venues)
+        preview_notice(sample.loc[sample["glass"] == "бокал"], metric)
+        trends = preview_trends(sample)
+    else:
+        trends = load_category_trends(venues)
+
+    st.image(trend_figure_png(trends, metric, tuple(TREND_CATEGORIES)), use_container_width=True)
+
+    refresh_until_exact(is_preview)
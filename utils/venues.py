@@ -0,0 +1,119 @@
+"""
+Заведения (venues) и их исходные файлы.
+
+Раскладка сырых выгрузок iiko:
+
+    data/
+      <заведение>/
+        Отчет по блюдам *.xlsx     — одна или несколько выгрузок продаж
+        Блюда артикулы*.xlsx       — каталог артикулов этого заведения; несколько выгрузок
+                                     (с датой в имени, иначе по дате файла) — версии каталога
+        article_mapping.csv        — необязательно: проверенные сопоставления продаж без кода
+                                     с каталогом (python -m utils.store mapping)
+        venue.json                 — необязательно: разделы каталога
+                                     {"wine_categories": [...], "glass_category": "...",
+                                      "glass_subcategories": [...]}
+
+Если выгрузки лежат прямо в data/ (старая раскладка на одно заведение),
+они считаются заведением DEFAULT_VENUE.
+Каталог data/ можно переопределить переменной окружения VINOLOGIA_DATA_DIR.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import streamlit as st
+
+from preprocessing.scripts.article_versions import catalog_valid_from
+
+DATA_DIR = Path(os.environ.get("VINOLOGIA_DATA_DIR", "/Users/nl/streamlit_test/data"))
+DEFAULT_VENUE = "main"
+
+DISH_GLOB = "Отчет по блюдам*.xlsx"
+ARTICLE_GLOB = "Блюда артикулы*.xlsx"
+MAPPING_REVIEW_NAME = "article_mapping.csv"
+
+# Подпись «все заведения» в переключателе
+NETWORK = "Вся сеть"
+
+
+@dataclass(frozen=True)
+class Venue:
+    name: str
+    directory: Path
+    dish_files: tuple[Path, ...]
+    article_paths: tuple[Path, ...]
+    catalog_options: dict = field(default_factory=dict, hash=False, compare=False)
+
+    @property
+    def article_path(self) -> Path:
+        """Действующий (самый свежий) каталог."""
+        return self.article_paths[-1]
+
+    @property
+    def mapping_review_path(self) -> Path:
+        """Проверенная вручную таблица сопоставлений (может отсутствовать)."""
+        return self.directory / MAPPING_REVIEW_NAME
+
+    @property
+    def source_files(self) -> list[Path]:
+        review = [self.mapping_review_path] if self.mapping_review_path.exists() else []
+        return [*self.dish_files, *self.article_paths, *review]
+
+
+def _venue_from_dir(name: str, directory: Path) -> Venue | None:
+    dish_files = tuple(sorted(directory.glob(DISH_GLOB)))
+    # несколько каталогов — версии, по дате начала действия
+    articles = sorted(directory.glob(ARTICLE_GLOB), key=lambda p: (catalog_valid_from(p), p.name))
+    if not dish_files or not articles:
+        return None
+    options = {}
+    config = directory / "venue.json"
+    if config.exists():
+        options = json.loads(config.read_text(encoding="utf-8"))
+    return Venue(name, directory, dish_files, tuple(articles), options)
+
+
+def discover_venues(data_dir: str | os.PathLike = DATA_DIR) -> list[Venue]:
+    """Все заведения, для которых есть и выгрузка продаж, и каталог."""
+    data_dir = Path(data_dir)
+    if not data_dir.exists():
+        return []
+    venues = []
+    flat = _venue_from_dir(DEFAULT_VENUE, data_dir)
+    if flat is not None:
+        venues.append(flat)
+    for sub in sorted(p for p in data_dir.iterdir() if p.is_dir() and not p.name.startswith(".")):
+        venue = _venue_from_dir(sub.name, sub)
+        if venue is not None:
+            venues.append(venue)
+    return venues
+
+
+def get_venue(name: str) -> Venue:
+    for venue in discover_venues():
+        if venue.name == name:
+            return venue
+    raise KeyError(f"Заведение '{name}' не найдено в {DATA_DIR}")
+
+
+def venue_names() -> tuple[str, ...]:
+    return tuple(v.name for v in discover_venues())
+
+
+def venue_selector(key: str = "venue") -> tuple[str, ...]:
+    """
+    Переключатель «одно заведение / вся сеть» для страниц.
+    Возвращает кортеж выбранных заведений (кортеж — чтобы его можно было передать в st.cache_data).
+    """
+    names = venue_names()
+    if not names:
+        st.error(f"В {DATA_DIR} не найдено выгрузок: нужны '{DISH_GLOB}' и '{ARTICLE_GLOB}'.")
+        st.stop()
+    if len(names) == 1:
+        return names
+    choice = st.selectbox("Заведение", options=[NETWORK, *names], index=0, key=key)
+    return names if choice == NETWORK else (choice,)
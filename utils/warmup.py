@@ -0,0 +1,88 @@
+"""
+Фоновый прогрев кэша при старте приложения.
+
+app.py вызывает start_warmup(): в отдельном потоке по очереди вызываются
+те же кэшированные загрузчики из utils/data.py, что и на страницах, с теми же
+аргументами по умолчанию. Поток запускается один раз на процесс
+(st.cache_resource), поэтому перезагрузка главной страницы его не дублирует.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Callable
+
+import streamlit as st
+
+from utils import data, readers, store
+from utils.venues import venue_names
+
+
+def _warmup_steps() -> list[tuple[str, Callable[[], object]]]:
+    """Шаги прогрева: (подпись, функция). Порядок = порядок страниц."""
+    # по умолчанию страницы показывают всю сеть (или единственное заведение)
+    venues = venue_names()
+    liquidity_cutoff = datetime.combine(data.LIQUIDITY_AFTER, datetime.min.time())
+    return [
+        ("Сборка processed/ по заведениям", lambda: store.ensure_venues(venues)),
+        ("ABC по бокалам (01)", lambda: data.load_abc('бокал', 'revenue', venues)),
+        ("ABC по бутылкам (02)", lambda: data.load_abc('бутылка', 'revenue', venues)),
+        ("Дневные продажи (04, 05, 06)", lambda: data.load_daily_sales(venues)),
+        ("all_sales.xlsx (03)", lambda: data.load_all_sales()),
+        ("Все позиции (07)", lambda: readers.load_sales_path(
+            str(data.ALL_POSITIONS_PATH), data.ALL_POSITIONS_COLUMNS, ("open_time",), liquidity_cutoff)),
+        ("Побокальные вина (08)", lambda: readers.load_sales_path(
+            str(data.REPORT_DISH_PATH), data.GLASS_REPORT_COLUMNS, ("open_time",), liquidity_cutoff)),
+    ]
+
+
+@dataclass
+class WarmupState:
+    """Состояние прогрева, которое читает главная страница."""
+    total: int = 0
+    done: int = 0
+    current: str = ""
+    errors: dict[str, str] = field(default_factory=dict)
+    finished: bool = False
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    # errors пишет поток прогрева, читает страница — только под замком
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+    def add_error(self, label: str, message: str) -> None:
+        with self._lock:
+            self.errors[label] = message
+
+    def error_items(self) -> list[tuple[str, str]]:
+        """Снимок ошибок: итерировать его можно, пока поток прогрева дописывает новые."""
+        with self._lock:
+            return list(self.errors.items())
+
+
+def _run(state: WarmupState, steps: list[tuple[str, Callable[[], object]]]) -> None:
+    for label, step in steps:
+        state.current = label
+        try:
+            step()
+        except Exception as e:  # файла может не быть — это не повод падать
+            state.add_error(label, f"{type(e).__name__}: {e}")
+        state.done += 1
+    state.current = ""
+    state.finished = True
+    state.finished_at = time.time()
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup() -> WarmupState:
+    """Запускает прогрев в фоне (один раз на процесс) и возвращает его состояние."""
+    steps = _warmup_steps()
+    state = WarmupState(total=len(steps))
+    thread = threading.Thread(target=_run, args=(state, steps), name="cache-warmup", daemon=True)
+    thread.start()
+    return state
@@ -0,0 +1,252 @@
+"""
+Слежение за папкой data/: новые и изменённые выгрузки iiko подхватываются сами.
+
+Раз в несколько секунд (опрос, без внешних сервисов) сравнивается размер и
+mtime файлов в data/ (и «тихих» файлов отчётов 03, 07, 08). Файл считается
+изменённым, когда он перестал меняться между двумя опросами — так
+недокопированная выгрузка не уходит в обработку. Затем:
+
+  • устаревшие заведения пересобираются в processed/<заведение>/
+    (load_and_prepare_dish → load_and_prepare_wine_articles → process_wine_sales
+    и агрегаты, см. utils/store.py); свежие не трогаются. Новая дневная выгрузка
+    продаж дописывается без полной сборки, ABC обновляется инкрементально —
+    сколько позиций сменило класс, видно в IngestEvent.abc_changes;
+  • из дискового кэша удаляются записи, посчитанные из изменённых файлов;
+  • в процессе Streamlit очищается st.cache_data загрузчиков, зависящих
+    от этих файлов.
+
+Файлы, которые не удалось обработать (заведение не собралось, итерация упала),
+не отмечаются просмотренными и уходят в обработку снова на следующем опросе;
+ошибка видна на главной странице (WatchState.error, IngestEvent.errors).
+
+В приложении слежение запускает app.py (start_watcher, один поток на процесс).
+Отдельным процессом, без Streamlit:
+    python -m utils.watch [--interval 10] [--once]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+import streamlit as st
+
+from utils import data, readers, store
+from utils.disk_cache import get_cache
+from utils.venues import DATA_DIR, discover_venues
+
+POLL_SECONDS = float(os.environ.get("VINOLOGIA_WATCH_SECONDS", 10))
+
+# Что считается исходными данными
+WATCH_PATTERNS = ("*.xlsx", "*.xls", "*.csv", "*.gz", "*.parquet", "venue.json")
+EXTRA_FILES = (data.ALL_POSITIONS_PATH, data.REPORT_DISH_PATH)
+
+Stamp = tuple[int, int]
+
+
+def snapshot(data_dir: Path = DATA_DIR, extra_files: Iterable[Path] = EXTRA_FILES) -> dict[str, Stamp]:
+    """{путь: (размер, mtime_ns)} всех исходных файлов."""
+    paths = set()
+    if data_dir.exists():
+        for pattern in WATCH_PATTERNS:
+            paths.update(p for p in data_dir.rglob(pattern) if not p.name.startswith(("~$", ".")))
+    paths.update(Path(p) for p in extra_files if Path(p).exists())
+    stamps = {}
+    for p in paths:
+        try:
+            st_ = p.stat()
+        except FileNotFoundError:  # удалили между rglob и stat
+            continue
+        stamps[str(p.resolve())] = (st_.st_size, st_.st_mtime_ns)
+    return stamps
+
+
+class FolderWatcher:
+    """
+    Опрос папки: poll() возвращает файлы, которые изменились и уже не меняются.
+    Файл считается обработанным только после acknowledge(): иначе следующий
+    poll() вернёт его снова (обработка упала — повторяем).
+    """
+
+    def __init__(self, data_dir: Path = DATA_DIR, extra_files: Iterable[Path] = EXTRA_FILES):
+        self.data_dir = Path(data_dir)
+        self.extra_files = tuple(extra_files)
+        self._seen = snapshot(self.data_dir, self.extra_files)
+        self._pending: dict[str, Stamp | None] = {}
+        self._ready: dict[str, Stamp | None] = {}
+
+    def poll(self) -> list[str]:
+        current = snapshot(self.data_dir, self.extra_files)
+        changed = {p for p in current.keys() | self._seen.keys() if current.get(p) != self._seen.get(p)}
+        # засчитываем изменение, только если с прошлого опроса файл не менялся
+        ready = sorted(p for p in changed if p in self._pending and self._pending[p] == current.get(p))
+        self._pending = {p: current.get(p) for p in changed}
+        self._ready = {p: current.get(p) for p in ready}
+        return ready
+
+    def acknowledge(self, paths: Iterable[str]) -> None:
+        """Отмечает файлы из последнего poll() обработанными."""
+        for p in paths:
+            if p not in self._ready:
+                continue
+            stamp = self._ready.pop(p)
+            if stamp is None:
+                self._seen.pop(p, None)
+            else:
+                self._seen[p] = stamp
+
+
+@dataclass
+class IngestEvent:
+    at: float
+    changed: list[str]
+    rebuilt: list[str]
+    cache_entries: int
+    errors: dict[str, str] = field(default_factory=dict)
+    # заведение -> {режим ABC: сколько позиций сменило класс} для дописанных выгрузок продаж
+    abc_changes: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+def rebuild_stale_venues() -> tuple[list[str], dict[str, str]]:
+    """Пересобирает заведения, у которых поменялись исходники. Возвращает (собранные, ошибки)."""
+    rebuilt, errors = [], {}
+    for venue in discover_venues():
+        try:
+            # через общую с сессиями очередь сборок: одно заведение не собирается дважды одновременно
+            if store.rebuild_if_stale(venue):
+                rebuilt.append(venue.name)
+        except Exception as e:  # выгрузку могли положить битой — остальные заведения собираем
+            errors[venue.name] = f"{type(e).__name__}: {e}"
+    return rebuilt, errors
+
+
+def abc_changes(rebuilt: list[str]) -> dict[str, dict[str, int]]:
+    """Смены классов ABC у заведений, где новые продажи были дописаны (store.append_sales)."""
+    changes = {}
+    for name in rebuilt:
+        manifest = store.read_manifest(name) or {}
+        if "abc_changes" in manifest:
+            changes[name] = manifest["abc_changes"]
+    return changes
+
+
+def failed_paths(event: IngestEvent) -> list[str]:
+    """Изменённые файлы заведений, которые не удалось пересобрать: их обработка повторится."""
+    failed = {str(p.resolve()) for v in discover_venues() if v.name in event.errors for p in v.source_files}
+    return [p for p in event.changed if p in failed]
+
+
+def clear_memory_caches(changed: list[str], rebuilt: list[str]) -> None:
+    """Очищает st.cache_data загрузчиков, которые зависят от изменённых файлов."""
+    venue_sources = {str(p.resolve()) for v in discover_venues() for p in v.source_files}
+    is_venue_file = [p in venue_sources or p.endswith("venue.json") for p in changed]
+    # заведение могло уже пересобрать другое слежение (python -m utils.watch) — тогда rebuilt пуст
+    if rebuilt or any(is_venue_file):
+        for loader in data.VENUE_LOADERS:
+            loader.clear()
+    if not all(is_venue_file):
+        # загрузчики, которые читают файл по пути
+        for loader in (*data.PATH_LOADERS, *readers.PATH_LOADERS):
+            loader.clear()
+
+
+def ingest(changed: list[str], clear_memory: bool = True) -> IngestEvent:
+    """Обработка изменённых файлов: пересборка заведений и инвалидация кэшей."""
+    rebuilt, errors = rebuild_stale_venues()
+    removed = get_cache().invalidate_files(changed)
+    if clear_memory:
+        clear_memory_caches(changed, rebuilt)
+    return IngestEvent(time.time(), changed, rebuilt, removed, errors, abc_changes(rebuilt))
+
+
+@dataclass
+class WatchState:
+    """Состояние слежения, которое показывает главная страница."""
+    started_at: float = field(default_factory=time.time)
+    last_poll: float | None = None
+    events: list[IngestEvent] = field(default_factory=list)
+    # последняя ошибка итерации слежения (None — последняя итерация прошла)
+    error: str | None = None
+
+    @property
+    def last_event(self) -> IngestEvent | None:
+        return self.events[-1] if self.events else None
+
+
+def _record(state: WatchState, event: IngestEvent) -> None:
+    last = state.last_event
+    # повтор той же неудачной обработки не вытесняет из истории остальные события
+    if last is not None and last.errors and (last.changed, last.errors) == (event.changed, event.errors):
+        state.events = state.events[:-1]
+    state.events = (state.events + [event])[-20:]
+
+
+def _loop(state: WatchState, watcher: FolderWatcher, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            changed = watcher.poll()
+            if changed:
+                event = ingest(changed)
+                _record(state, event)
+                failed = set(failed_paths(event))
+                watcher.acknowledge(p for p in changed if p not in failed)
+            state.error = None
+        except Exception as e:  # слежение не должно умирать; файлы не отмечены — следующий опрос повторит
+            state.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        state.last_poll = time.time()
+
+
+@st.cache_resource(show_spinner=False)
+def start_watcher(interval: float = POLL_SECONDS) -> WatchState:
+    """Запускает слежение за data/ в фоне (один раз на процесс) и возвращает его состояние."""
+    state = WatchState()
+    thread = threading.Thread(target=_loop, args=(state, FolderWatcher(), interval),
+                              name="data-watcher", daemon=True)
+    thread.start()
+    return state
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Слежение за data/ и автоматическая обработка выгрузок")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="период опроса, секунд")
+    parser.add_argument("--once", action="store_true", help="только пересобрать устаревшее и выйти")
+    args = parser.parse_args(argv)
+
+    # то, что поменялось, пока слежение не работало
+    rebuilt, errors = rebuild_stale_venues()
+    for name in rebuilt:
+        print(f"✅ {name}: пересобрано")
+    for name, err in errors.items():
+        print(f"⚠️ {name}: {err}")
+    if args.once:
+        return
+
+    watcher = FolderWatcher()
+    print(f"Слежу за {watcher.data_dir} (каждые {args.interval:g} с)…")
+    while True:
+        time.sleep(args.interval)
+        changed = watcher.poll()
+        if not changed:
+            continue
+        # в отдельном процессе кэшей Streamlit нет — их очистит слежение внутри приложения
+        event = ingest(changed, clear_memory=False)
+        failed = set(failed_paths(event))
+        watcher.acknowledge(p for p in changed if p not in failed)
+        stamp = time.strftime("%H:%M:%S", time.localtime(event.at))
+        print(f"[{stamp}] изменено файлов: {len(changed)}, пересобрано: {', '.join(event.rebuilt) or '—'}, "
+              f"удалено из кэша: {event.cache_entries}")
+        for name, modes in event.abc_changes.items():
+            print(f"   {name}: сменили класс ABC — " + ", ".join(f"{m}: {n}" for m, n in modes.items()))
+        for name, err in event.errors.items():
+            print(f"⚠️ {name}: {err}")
+
+
+if __name__ == "__main__":
+    main()